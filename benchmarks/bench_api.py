@@ -0,0 +1,377 @@
+"""End-to-end API benchmarks against the local mock Trading 212 server.
+
+Starts mock_api.py in-process and runs every cache backend in its own
+worker process, since the backend is chosen from the environment at import
+time. Each worker times the sync Trading212Client directly and the async
+client through the MCP tools, first one call at a time (latency
+percentiles) and then with several calls in flight (throughput).
+
+Usage:
+    python benchmarks/bench_api.py [--iterations 50] [--concurrency 8]
+        [--latency 0.02] [--throttle-rate 0.05] [--rate-limits]
+        [--backends memory,sqlite,file,uncached] [--output results/api.json]
+        [--baseline results/api.json] [--max-regression 0.2]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# Rules of utils/cache_policy.py, zeroed for the "uncached" run.
+CACHE_RULES = (
+    "instruments", "exchanges", "pies", "positions", "account", "orders",
+    "exports", "history",
+)
+
+# Calls to the history cases per iteration of the cheap ones: a full walk
+# of the history is a few dozen pages.
+HISTORY_SHARE = 0.1
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def _cache_hits() -> tuple[float, float]:
+    from utils.metrics import cache_requests
+
+    hits = total = 0.0
+    for (_, result), count in cache_requests.values().items():
+        total += count
+        if result == "hit":
+            hits += count
+    return hits, total
+
+
+def _summary(case: str, path: str, first: float, samples: list[float], hits: tuple) -> dict:
+    ordered = sorted(samples)
+    looked_up = hits[1]
+    return {
+        "case": case,
+        "path": path,
+        "calls": len(samples),
+        "first_ms": round(first * 1000, 3),
+        "p50_ms": round(_percentile(ordered, 0.50) * 1000, 3),
+        "p99_ms": round(_percentile(ordered, 0.99) * 1000, 3),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "cache_hit_ratio": round(hits[0] / looked_up, 3) if looked_up else None,
+    }
+
+
+def _sync_cases(client, args) -> list[dict]:
+    tickers = [f"POS{i}_US_EQ" for i in range(0, 500, 7)]
+    history = max(1, int(args.iterations * HISTORY_SHARE))
+    cases = {
+        "get_instruments": (lambda i: client.get_instruments(), args.iterations),
+        "get_account_positions": (lambda i: client.get_account_positions(), args.iterations),
+        "get_positions(ticker)": (
+            lambda i: client.get_positions(ticker=tickers[i % len(tickers)]),
+            args.iterations,
+        ),
+        "iter_historical_orders": (
+            lambda i: list(client.iter_historical_orders(max_items=1000)),
+            history,
+        ),
+        "iter_dividends": (lambda i: list(client.iter_dividends()), history),
+        "iter_history_transactions": (
+            lambda i: list(client.iter_history_transactions()),
+            history,
+        ),
+    }
+
+    results = []
+    for case, (call, calls) in cases.items():
+        hits_before = _cache_hits()
+        start = time.perf_counter()
+        call(0)
+        first = time.perf_counter() - start
+
+        samples = []
+        for i in range(1, calls + 1):
+            start = time.perf_counter()
+            call(i)
+            samples.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            list(pool.map(call, range(calls)))
+        elapsed = time.perf_counter() - start
+
+        hits_after = _cache_hits()
+        result = _summary(
+            case,
+            "sync",
+            first,
+            samples,
+            (hits_after[0] - hits_before[0], hits_after[1] - hits_before[1]),
+        )
+        result["throughput"] = round(calls / elapsed, 2)
+        results.append(result)
+    return results
+
+
+async def _async_cases(mcp, args) -> list[dict]:
+    import payloads
+
+    instruments = payloads.instruments()[:: 15000 // 50]
+    terms = [
+        term
+        for instrument in instruments
+        for term in (
+            instrument["ticker"],
+            instrument["isin"],
+            instrument["name"].split()[0].lower(),
+            instrument["shortName"][:3],
+        )
+    ]
+    tickers = [f"POS{i}_US_EQ" for i in range(0, 500, 7)]
+    history = max(1, int(args.iterations * HISTORY_SHARE))
+    cases = {
+        "search_instrument": (
+            lambda i: ("search_instrument", {"search_term": terms[i % len(terms)]}),
+            args.iterations,
+        ),
+        "fetch_positions": (lambda i: ("fetch_positions", {}), args.iterations),
+        "fetch_positions(ticker)": (
+            lambda i: ("fetch_positions", {"ticker": tickers[i % len(tickers)]}),
+            args.iterations,
+        ),
+        "fetch_all_historical_orders": (
+            lambda i: ("fetch_all_historical_orders", {"max_items": 1000}),
+            history,
+        ),
+        "fetch_all_paid_out_dividends": (
+            lambda i: ("fetch_all_paid_out_dividends", {"max_items": 1000}),
+            history,
+        ),
+        "fetch_all_transactions": (
+            lambda i: ("fetch_all_transactions", {"max_items": 1000}),
+            history,
+        ),
+    }
+
+    async def call(arguments) -> None:
+        await mcp.call_tool(*arguments)
+
+    results = []
+    for case, (arguments, calls) in cases.items():
+        hits_before = _cache_hits()
+        start = time.perf_counter()
+        await call(arguments(0))
+        first = time.perf_counter() - start
+
+        samples = []
+        for i in range(1, calls + 1):
+            start = time.perf_counter()
+            await call(arguments(i))
+            samples.append(time.perf_counter() - start)
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def bounded(i: int) -> None:
+            async with semaphore:
+                await call(arguments(i))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(bounded(i) for i in range(calls)))
+        elapsed = time.perf_counter() - start
+
+        hits_after = _cache_hits()
+        result = _summary(
+            case,
+            "async",
+            first,
+            samples,
+            (hits_after[0] - hits_before[0], hits_after[1] - hits_before[1]),
+        )
+        result["throughput"] = round(calls / elapsed, 2)
+        results.append(result)
+    return results
+
+
+def run_worker(args) -> list[dict]:
+    """Benchmark one backend; the environment was prepared by the parent."""
+    import tools  # noqa: F401 (registers the tools)
+    from mcp_server import mcp, tenants
+    from utils.client import AsyncTrading212Client, Trading212Client
+    from utils.rate_limiter import RateLimiter
+
+    # The published limits would dominate every number, so they only apply
+    # with --rate-limits. Injected 429s are still honoured either way.
+    limiter = RateLimiter() if args.rate_limits else RateLimiter({})
+
+    # Not closed: the clients share the cache storage with the async one.
+    results = _sync_cases(Trading212Client(rate_limiter=limiter), args)
+
+    async def run_async() -> list[dict]:
+        # Through the registry, so resources, the refresher and the
+        # subscriptions use the same client as the tools.
+        tenants.set_default(AsyncTrading212Client(rate_limiter=limiter))
+        return await _async_cases(mcp, args)
+
+    return results + asyncio.run(run_async())
+
+
+def _worker_env(backend: str, base_url: str, directory: str) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "TRADING212_BASE_URL": base_url,
+            "TRADING212_API_KEY": env.get("TRADING212_API_KEY", "benchmark"),
+            "CACHE_BACKEND": "memory" if backend == "uncached" else backend,
+            "CACHE_SQLITE_PATH": str(Path(directory) / "http.sqlite3"),
+            "HISTORY_DB_PATH": str(Path(directory) / "history.sqlite3"),
+            # Sync the history on every call, so each one walks the new pages.
+            "HISTORY_SYNC_INTERVAL": "0",
+            "TRACING_EXPORTER": "off",
+        }
+    )
+    if backend == "uncached":
+        env["CACHE_TTL"] = "0"
+        env.update({f"CACHE_TTL_{rule.upper()}": "0" for rule in CACHE_RULES})
+    return env
+
+
+def run_backend(backend: str, base_url: str, args) -> list[dict]:
+    command = [
+        sys.executable,
+        str(Path(__file__).resolve()),
+        "--worker",
+        "--iterations", str(args.iterations),
+        "--concurrency", str(args.concurrency),
+    ]
+    if args.rate_limits:
+        command.append("--rate-limits")
+    # The file backend writes to ./.cache/hishel, so run in a scratch directory.
+    with tempfile.TemporaryDirectory() as directory:
+        completed = subprocess.run(
+            command,
+            env=_worker_env(backend, base_url, directory),
+            cwd=directory,
+            capture_output=True,
+            text=True,
+        )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{backend} worker failed:\n{completed.stderr}")
+    results = json.loads(completed.stdout.splitlines()[-1])
+    for result in results:
+        result["backend"] = backend
+    return results
+
+
+def compare(results: list[dict], baseline: dict, max_regression: float) -> list[str]:
+    """Cases whose p50 grew by more than ``max_regression`` over the baseline."""
+    baseline = {
+        (item["backend"], item["path"], item["case"]): item
+        for item in baseline["results"]
+    }
+    regressions = []
+    for result in results:
+        before = baseline.get((result["backend"], result["path"], result["case"]))
+        if before is None or not before["p50_ms"]:
+            continue
+        change = result["p50_ms"] / before["p50_ms"] - 1
+        if change > max_regression:
+            regressions.append(
+                f"{result['backend']}/{result['path']}/{result['case']}: p50 "
+                f"{before['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms ({change:+.0%})"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per request")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of 429s")
+    parser.add_argument(
+        "--rate-limits", action="store_true", help="apply the published rate limits"
+    )
+    parser.add_argument(
+        "--backends",
+        default="memory,sqlite,file,uncached",
+        help="comma-separated cache backends; redis needs CACHE_REDIS_URL",
+    )
+    parser.add_argument(
+        "--output", type=Path, default=Path(__file__).parent / "results" / "api.json"
+    )
+    parser.add_argument("--baseline", type=Path, help="earlier --output to compare with")
+    parser.add_argument(
+        "--max-regression", type=float, default=0.2, help="allowed p50 increase"
+    )
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args)))
+        return
+
+    from mock_api import MockTrading212Server
+
+    # Read first: the baseline may be the file about to be overwritten.
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    results = []
+    with MockTrading212Server(latency=args.latency, throttle_rate=args.throttle_rate) as server:
+        for backend in args.backends.split(","):
+            results.extend(run_backend(backend.strip(), server.base_url, args))
+
+    print(
+        f"{'backend':<10}{'path':<7}{'case':<30}{'first ms':>10}{'p50 ms':>10}"
+        f"{'p99 ms':>10}{'ops/s':>10}{'hit ratio':>11}"
+    )
+    for result in results:
+        ratio = result["cache_hit_ratio"]
+        print(
+            f"{result['backend']:<10}{result['path']:<7}{result['case']:<30}"
+            f"{result['first_ms']:>10.2f}{result['p50_ms']:>10.2f}"
+            f"{result['p99_ms']:>10.2f}{result['throughput']:>10.1f}"
+            f"{'-' if ratio is None else f'{ratio:.2f}':>11}"
+        )
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(
+        json.dumps(
+            {
+                "meta": {
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "iterations": args.iterations,
+                    "concurrency": args.concurrency,
+                    "latency": args.latency,
+                    "throttle_rate": args.throttle_rate,
+                    "rate_limits": args.rate_limits,
+                },
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    print(f"Wrote {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
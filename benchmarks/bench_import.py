@@ -0,0 +1,258 @@
+"""Startup benchmarks: how long a freshly spawned server takes to be usable.
+
+MCP hosts start a new stdio server for every session, so the time from
+spawn to the initialize response is paid on each one. Every iteration
+spawns ``src/server.py`` against the local mock Trading 212 server and
+times the initialize response, the tool list and the first tool result,
+next to a bare interpreter and a plain ``import server``. A
+``-X importtime`` run then breaks the import down by package.
+
+Usage:
+    python benchmarks/bench_import.py [--iterations 10] [--top 15]
+        [--output results/import.json]
+        [--baseline results/import.json] [--max-regression 0.2]
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+PROTOCOL_VERSION = "2025-03-26"
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def _env(base_url: str, directory: str) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "PYTHONPATH": str(SRC),
+            "TRANSPORT": "stdio",
+            "TRADING212_BASE_URL": base_url,
+            "TRADING212_API_KEY": env.get("TRADING212_API_KEY", "benchmark"),
+            "CACHE_SQLITE_PATH": str(Path(directory) / "http.sqlite3"),
+            "HISTORY_DB_PATH": str(Path(directory) / "history.sqlite3"),
+            "TRACING_EXPORTER": "off",
+        }
+    )
+    return env
+
+
+def _time_command(command: list[str], env: dict[str, str], cwd: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(command, env=env, cwd=cwd, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def _request(process: subprocess.Popen, message_id: int, method: str, params: dict) -> dict:
+    """Send a JSON-RPC request over stdio and wait for its response."""
+    message = {"jsonrpc": "2.0", "id": message_id, "method": method, "params": params}
+    process.stdin.write(json.dumps(message) + "\n")
+    process.stdin.flush()
+    while True:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError(f"server exited before answering {method}")
+        response = json.loads(line)
+        if response.get("id") == message_id:
+            if "error" in response:
+                raise RuntimeError(f"{method} failed: {response['error']}")
+            return response["result"]
+
+
+def spawn_server(env: dict[str, str], cwd: str) -> dict[str, float]:
+    """Seconds from spawning the server to each step of a first session."""
+    timings = {}
+    with open(Path(cwd) / "server.log", "w") as log:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, str(SRC / "server.py")],
+            env=env,
+            cwd=cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=log,
+            text=True,
+        )
+        try:
+            _request(
+                process,
+                1,
+                "initialize",
+                {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "bench_import", "version": "0"},
+                },
+            )
+            timings["initialize"] = time.perf_counter() - start
+            process.stdin.write(
+                json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"}) + "\n"
+            )
+            process.stdin.flush()
+            _request(process, 2, "tools/list", {})
+            timings["tools/list"] = time.perf_counter() - start
+            result = _request(
+                process,
+                3,
+                "tools/call",
+                {"name": "fetch_account_summary", "arguments": {}},
+            )
+            if result.get("isError"):
+                raise RuntimeError(f"fetch_account_summary failed: {result['content']}")
+            timings["first tool call"] = time.perf_counter() - start
+        except Exception:
+            log.flush()
+            raise RuntimeError(
+                f"server failed:\n{(Path(cwd) / 'server.log').read_text()}"
+            ) from None
+        finally:
+            process.stdin.close()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+    return timings
+
+
+def import_profile(env: dict[str, str], cwd: str, top: int) -> list[dict]:
+    """Self import time per top-level package (our own modules by name)."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        env=env,
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    own = {path.stem for path in SRC.glob("*.py")} | {"utils"}
+    totals: Counter[str] = Counter()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, self_us, _, name = (part.strip() for part in line.replace(":", "|", 1).split("|"))
+        if not self_us.isdigit():
+            continue
+        package = name.split(".")[0]
+        totals[name if package in own else package] += int(self_us)
+    return [
+        {"module": name, "self_ms": round(us / 1000, 3)}
+        for name, us in totals.most_common(top)
+    ]
+
+
+def _summary(case: str, samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "case": case,
+        "runs": len(samples),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "p50_ms": round(_percentile(ordered, 0.50) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def compare(results: list[dict], baseline: dict, max_regression: float) -> list[str]:
+    """Cases whose p50 grew by more than ``max_regression`` over the baseline."""
+    baseline = {item["case"]: item for item in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = baseline.get(result["case"])
+        if before is None or not before["p50_ms"]:
+            continue
+        change = result["p50_ms"] / before["p50_ms"] - 1
+        if change > max_regression:
+            regressions.append(
+                f"{result['case']}: p50 {before['p50_ms']:.1f} -> "
+                f"{result['p50_ms']:.1f} ms ({change:+.0%})"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15, help="packages in the profile")
+    parser.add_argument(
+        "--output", type=Path, default=Path(__file__).parent / "results" / "import.json"
+    )
+    parser.add_argument("--baseline", type=Path, help="earlier --output to compare with")
+    parser.add_argument(
+        "--max-regression", type=float, default=0.2, help="allowed p50 increase"
+    )
+    args = parser.parse_args()
+
+    from mock_api import MockTrading212Server
+
+    # Read first: the baseline may be the file about to be overwritten.
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    samples: dict[str, list[float]] = {}
+    with MockTrading212Server() as server, tempfile.TemporaryDirectory() as directory:
+        env = _env(server.base_url, directory)
+        for _ in range(args.iterations):
+            samples.setdefault("python -c pass", []).append(
+                _time_command([sys.executable, "-c", "pass"], env, directory)
+            )
+            samples.setdefault("import server", []).append(
+                _time_command([sys.executable, "-c", "import server"], env, directory)
+            )
+            for step, elapsed in spawn_server(env, directory).items():
+                samples.setdefault(f"spawn to {step}", []).append(elapsed)
+        profile = import_profile(env, directory, args.top)
+
+    results = [_summary(case, values) for case, values in samples.items()]
+    print(f"{'case':<28}{'min ms':>10}{'p50 ms':>10}{'max ms':>10}")
+    for result in results:
+        print(
+            f"{result['case']:<28}{result['min_ms']:>10.1f}"
+            f"{result['p50_ms']:>10.1f}{result['max_ms']:>10.1f}"
+        )
+    print(f"\n{'import (self time)':<28}{'ms':>10}")
+    for item in profile:
+        print(f"{item['module']:<28}{item['self_ms']:>10.1f}")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(
+        json.dumps(
+            {
+                "meta": {
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "iterations": args.iterations,
+                },
+                "results": results,
+                "import_profile": profile,
+            },
+            indent=2,
+        )
+    )
+    print(f"Wrote {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
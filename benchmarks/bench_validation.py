@@ -0,0 +1,70 @@
+"""Compare the ways a response body can become pydantic models.
+
+Usage:
+    python benchmarks/bench_validation.py [--repeat N]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import payloads  # noqa: E402
+from models import Exchange, Position, TradeableInstrument  # noqa: E402
+from utils.metadata_tables import ExchangeTable, InstrumentTable  # noqa: E402
+from utils.parsing import json_loads, parse_json  # noqa: E402
+
+CASES = {
+    "positions (500)": (Position, payloads.positions(), None),
+    "instruments (15k)": (TradeableInstrument, payloads.instruments(), InstrumentTable),
+    "exchanges (40)": (Exchange, payloads.exchanges(), ExchangeTable),
+}
+
+
+def _time(function, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'payload':<20}{'strategy':<34}{'median ms':>10}")
+    for label, (model, data, table) in CASES.items():
+        content = json.dumps(data).encode()
+        strategies = {
+            "json.loads + validate per item": lambda: [
+                model.model_validate(item) for item in json.loads(content)
+            ],
+            "model_construct per item": lambda: [
+                model.model_construct(**item) for item in json_loads(content)
+            ],
+            "fast: TypeAdapter.validate_json": lambda: parse_json(
+                content, list[model], strict=False
+            ),
+            "strict: TypeAdapter, strict=True": lambda: parse_json(
+                content, list[model], strict=True
+            ),
+        }
+        if table is not None:
+            strategies["raw: column table, no models"] = lambda: table.from_raw(
+                json_loads(content)
+            )
+
+        for name, function in strategies.items():
+            print(f"{label:<20}{name:<34}{_time(function, args.repeat):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
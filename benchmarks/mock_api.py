@@ -0,0 +1,224 @@
+"""A local stand-in for the Trading 212 endpoints used by utils/client.py.
+
+Serves the synthetic payloads from payloads.py with cursor pagination for
+the history endpoints, an optional delay per request and an optional share
+of HTTP 429 responses.
+
+Usage:
+    python benchmarks/mock_api.py [--port 8212] [--latency 0.05] [--throttle-rate 0.1]
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import payloads
+
+_ORDER_ID = re.compile(r"^/equity/orders/(\d+)$")
+_PIE_ID = re.compile(r"^/equity/pies/(\d+)$")
+
+
+class MockData:
+    """Payloads generated once and encoded ahead of time."""
+
+    def __init__(self, seed: int = 0):
+        self.positions = payloads.positions(seed=seed)
+        self.orders = payloads.orders(seed=seed)
+        self.history = {
+            "orders": payloads.historical_orders(seed=seed),
+            "dividends": payloads.dividends(seed=seed),
+            "transactions": payloads.transactions(seed=seed),
+        }
+        self.static = {
+            "/equity/metadata/instruments": _encode(payloads.instruments(seed=seed)),
+            "/equity/metadata/exchanges": _encode(payloads.exchanges(seed=seed)),
+            "/equity/positions": _encode(self.positions),
+            "/equity/orders": _encode(self.orders),
+            "/equity/pies": _encode([]),
+            "/equity/history/exports": _encode([]),
+            "/equity/account/summary": _encode(
+                {
+                    "id": 1,
+                    "currency": "GBP",
+                    "totalValue": 125_000.0,
+                    "cash": {"availableToTrade": 2_500.0, "inPies": 0.0, "reservedForOrders": 0.0},
+                    "investments": {"currentValue": 122_500.0, "totalCost": 100_000.0},
+                }
+            ),
+        }
+
+    def page(self, kind: str, query: dict[str, list[str]]) -> bytes:
+        items = self.history[kind]
+        ticker = query.get("ticker", [None])[0]
+        if ticker:
+            items = [
+                item
+                for item in items
+                if (item.get("order") or item).get("ticker") == ticker
+            ]
+        limit = min(50, int(query.get("limit", ["20"])[0]))
+        start = int(query.get("cursor", ["0"])[0])
+        page = items[start:start + limit]
+        next_page = None
+        if start + limit < len(items):
+            params = {"limit": limit, "cursor": start + limit}
+            if ticker:
+                params["ticker"] = ticker
+            next_page = f"/api/v0/equity/history/{kind}?{urlencode(params)}"
+        return _encode({"items": page, "nextPagePath": next_page})
+
+
+def _encode(data) -> bytes:
+    return json.dumps(data).encode()
+
+
+def make_handler(data: MockData, latency: float, throttle_rate: float, seed: int):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without this, small
+        # responses wait ~40 ms on Nagle's algorithm and delayed ACKs.
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args) -> None:
+            return
+
+        def _send(self, status: int, body: bytes = b"", headers: dict | None = None) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        def _throttled(self) -> bool:
+            with lock:
+                throttled = rng.random() < throttle_rate
+            if throttled:
+                self._send(
+                    429,
+                    _encode({"code": "TooManyRequests"}),
+                    {
+                        "Retry-After": "0.05",
+                        "x-ratelimit-limit": "100",
+                        "x-ratelimit-period": "1",
+                        "x-ratelimit-remaining": "0",
+                        "x-ratelimit-reset": f"{time.time() + 0.05:.3f}",
+                    },
+                )
+            return throttled
+
+        def _route(self) -> tuple[int, bytes]:
+            url = urlparse(self.path)
+            path = url.path.removeprefix("/api/v0").rstrip("/")
+            query = parse_qs(url.query)
+
+            if self.command == "GET":
+                if path == "/equity/positions" and "ticker" in query:
+                    ticker = query["ticker"][0]
+                    return 200, _encode(
+                        [p for p in data.positions if p["instrument"]["ticker"] == ticker]
+                    )
+                if path in data.static:
+                    return 200, data.static[path]
+                if path.startswith("/equity/history/"):
+                    kind = path.rsplit("/", 1)[1]
+                    if kind in data.history:
+                        return 200, data.page(kind, query)
+                match = _ORDER_ID.match(path)
+                if match:
+                    order = next(
+                        (o for o in data.orders if o["id"] == int(match.group(1))), None
+                    )
+                    if order is not None:
+                        return 200, _encode(order)
+            elif self.command == "DELETE" and (_ORDER_ID.match(path) or _PIE_ID.match(path)):
+                return 200, b""
+            elif self.command == "POST" and path.startswith("/equity/orders/"):
+                return 200, _encode(data.orders[0])
+            return 404, _encode({"code": "NotFound"})
+
+        def _handle(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            if latency:
+                time.sleep(latency)
+            if self._throttled():
+                return
+            status, body = self._route()
+            self._send(status, body)
+
+        do_GET = do_POST = do_DELETE = do_HEAD = _handle
+
+    return Handler
+
+
+class MockTrading212Server:
+    """Runs the mock API on a background thread; usable as a context manager."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        throttle_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.data = MockData(seed=seed)
+        self._server = ThreadingHTTPServer(
+            (host, port), make_handler(self.data, latency, throttle_rate, seed)
+        )
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v0"
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def start(self) -> "MockTrading212Server":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockTrading212Server":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8212)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of 429s")
+    args = parser.parse_args()
+
+    server = MockTrading212Server(args.host, args.port, args.latency, args.throttle_rate)
+    print(f"Serving the mock Trading 212 API at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
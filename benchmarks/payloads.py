@@ -0,0 +1,185 @@
+"""Synthetic Trading 212 API payloads with realistic sizes."""
+
+import random
+import string
+from datetime import datetime, timedelta, timezone
+
+CURRENCIES = ["USD", "GBX", "GBP", "EUR", "CHF", "CAD"]
+TYPES = ["STOCK", "ETF", "WARRANT", "CVR"]
+_EPOCH = datetime(2019, 1, 1, tzinfo=timezone.utc)
+
+
+def _iso(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _word(rng: random.Random, low: int = 3, high: int = 10) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(low, high)))
+
+
+def instruments(count: int = 15_000, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        symbol = "".join(rng.choices(string.ascii_uppercase, k=rng.randint(2, 5)))
+        items.append(
+            {
+                "ticker": f"{symbol}{i}_US_EQ",
+                "name": " ".join(_word(rng).title() for _ in range(rng.randint(1, 4))),
+                "shortName": symbol,
+                "isin": f"US{i:010d}",
+                "currencyCode": rng.choice(CURRENCIES),
+                "type": rng.choice(TYPES),
+                "addedOn": _iso(_EPOCH + timedelta(days=rng.randint(0, 2000))),
+                "extendedHours": rng.random() < 0.3,
+                "maxOpenQuantity": float(rng.randint(100, 100_000)),
+                "minTradeQuantity": 0.01,
+                "workingScheduleId": rng.randint(1, 120),
+            }
+        )
+    return items
+
+
+def exchanges(count: int = 40, events_per_schedule: int = 60, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 6, tzinfo=timezone.utc)
+    items = []
+    for i in range(count):
+        schedules = []
+        for j in range(3):
+            events = [
+                {
+                    "date": _iso(start + timedelta(hours=12 * k)),
+                    "type": "OPEN" if k % 2 == 0 else "CLOSE",
+                }
+                for k in range(events_per_schedule)
+            ]
+            schedules.append({"id": i * 3 + j, "timeEvents": events})
+        items.append({"id": i, "name": _word(rng).upper(), "workingSchedules": schedules})
+    return items
+
+
+def positions(count: int = 500, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        quantity = round(rng.uniform(0.1, 500), 4)
+        average_price = round(rng.uniform(1, 900), 2)
+        current_price = round(average_price * rng.uniform(0.5, 2), 2)
+        cost = round(quantity * average_price, 2)
+        value = round(quantity * current_price, 2)
+        items.append(
+            {
+                "averagePricePaid": average_price,
+                "createdAt": _iso(_EPOCH + timedelta(days=rng.randint(0, 2000))),
+                "currentPrice": current_price,
+                "instrument": {
+                    "ticker": f"POS{i}_US_EQ",
+                    "name": f"Position {i}",
+                    "isin": f"US{i:010d}",
+                    "currency": rng.choice(CURRENCIES),
+                },
+                "quantity": quantity,
+                "quantityAvailableForTrading": quantity,
+                "quantityInPies": 0,
+                "walletImpact": {
+                    "currency": "GBP",
+                    "currentValue": value,
+                    "totalCost": cost,
+                    "unrealizedProfitLoss": round(value - cost, 2),
+                    "fxImpact": round(rng.uniform(-5, 5), 2),
+                },
+            }
+        )
+    return items
+
+
+def orders(count: int = 50, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": 1_000_000 + i,
+            "ticker": f"POS{rng.randint(0, 499)}_US_EQ",
+            "type": "LIMIT",
+            "status": "NEW",
+            "side": "BUY",
+            "strategy": "QUANTITY",
+            "quantity": float(rng.randint(1, 10)),
+            "limitPrice": round(rng.uniform(1, 900), 2),
+            "createdAt": _iso(_EPOCH + timedelta(days=2000)),
+        }
+        for i in range(count)
+    ]
+
+
+def historical_orders(count: int = 5_000, seed: int = 0) -> list[dict]:
+    """Filled orders, newest first, spread over several years."""
+    rng = random.Random(seed)
+    items = []
+    for i in range(count, 0, -1):
+        filled_at = _iso(_EPOCH + timedelta(hours=8 * i))
+        quantity = round(rng.uniform(0.1, 20), 4) * rng.choice([1, 1, 1, -1])
+        price = round(rng.uniform(1, 900), 2)
+        items.append(
+            {
+                "order": {
+                    "id": i,
+                    "ticker": f"POS{rng.randint(0, 49)}_US_EQ",
+                    "type": "MARKET",
+                    "status": "FILLED",
+                    "side": "BUY" if quantity > 0 else "SELL",
+                    "quantity": quantity,
+                    "filledQuantity": quantity,
+                    "createdAt": filled_at,
+                    "currency": "GBP",
+                },
+                "fill": {
+                    "id": i,
+                    "filledAt": filled_at,
+                    "price": price,
+                    "quantity": quantity,
+                    "type": "TRADE",
+                    "walletImpact": {
+                        "currency": "GBP",
+                        "fxRate": round(rng.uniform(0.7, 0.9), 4),
+                        "netValue": round(abs(quantity) * price, 2),
+                    },
+                },
+            }
+        )
+    return items
+
+
+def dividends(count: int = 1_000, seed: int = 0) -> list[dict]:
+    """Paid out dividends, newest first."""
+    rng = random.Random(seed)
+    return [
+        {
+            "ticker": f"POS{rng.randint(0, 49)}_US_EQ",
+            "reference": f"DIV{i}",
+            "amount": round(rng.uniform(0.1, 50), 2),
+            "amountInEuro": round(rng.uniform(0.1, 50), 2),
+            "currency": "GBP",
+            "tickerCurrency": "USD",
+            "grossAmountPerShare": round(rng.uniform(0.01, 2), 4),
+            "quantity": round(rng.uniform(1, 100), 4),
+            "paidOn": _iso(_EPOCH + timedelta(days=2 * i)),
+            "type": "ORDINARY",
+        }
+        for i in range(count, 0, -1)
+    ]
+
+
+def transactions(count: int = 500, seed: int = 0) -> list[dict]:
+    """Account movements, newest first."""
+    rng = random.Random(seed)
+    return [
+        {
+            "reference": f"TX{i}",
+            "amount": round(rng.uniform(10, 5000), 2),
+            "currency": "GBP",
+            "dateTime": _iso(_EPOCH + timedelta(days=4 * i)),
+            "type": rng.choice(["DEPOSIT", "WITHDRAW", "FEE", "TRANSFER"]),
+        }
+        for i in range(count, 0, -1)
+    ]
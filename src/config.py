@@ -3,4 +3,124 @@ from dotenv import load_dotenv, find_dotenv
 
 load_dotenv(find_dotenv())
 
-TRANSPORT = os.getenv("TRANSPORT", "stdio")
\ No newline at end of file
+TRANSPORT = os.getenv("TRANSPORT", "stdio")
+
+# Number of times a request rejected with HTTP 429 is queued and re-sent
+# before the error is surfaced to the caller.
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "3"))
+
+# Local SQLite copy of the order, dividend and transaction history, and how
+# often (in seconds) the history tools check the API for new items.
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", ".cache/trading212/history.sqlite3")
+HISTORY_SYNC_INTERVAL = float(os.getenv("HISTORY_SYNC_INTERVAL", "300"))
+
+# Endpoints kept fresh in the background and served from their latest
+# snapshot: any of "account", "positions" and "orders", comma separated;
+# empty disables it. Each is refreshed every REFRESH_INTERVAL seconds (or
+# less often, to use at most half of its rate limit), a snapshot is served
+# for up to REFRESH_MAX_STALE seconds, and refreshing pauses after
+# REFRESH_IDLE_TIMEOUT seconds without reads.
+REFRESH_ENDPOINTS = [
+    name.strip().lower()
+    for name in os.getenv("REFRESH_ENDPOINTS", "").split(",")
+    if name.strip()
+]
+REFRESH_INTERVAL = float(os.getenv("REFRESH_INTERVAL", "10"))
+REFRESH_MAX_STALE = float(os.getenv("REFRESH_MAX_STALE", "60"))
+REFRESH_IDLE_TIMEOUT = float(os.getenv("REFRESH_IDLE_TIMEOUT", "300"))
+
+# Seconds between polls of the order and position lists while a session
+# is subscribed to them (less often if that would use more than half of
+# the endpoint's rate limit).
+SUBSCRIPTION_POLL_INTERVAL = float(os.getenv("SUBSCRIPTION_POLL_INTERVAL", "5"))
+
+# Stateless streamable-http handles every request on its own; resource
+# subscriptions need sessions, so set it to false to use them over HTTP.
+STATELESS_HTTP = os.getenv("STATELESS_HTTP", "true").lower() in ("1", "true", "yes")
+
+# Longest wait_for_order call, and the longest pause between its polls of
+# an order, in seconds. Polls start at the endpoint's rate limit and back
+# off while nothing changes.
+ORDER_WAIT_MAX_TIMEOUT = float(os.getenv("ORDER_WAIT_MAX_TIMEOUT", "300"))
+ORDER_WAIT_MAX_INTERVAL = float(os.getenv("ORDER_WAIT_MAX_INTERVAL", "10"))
+
+# Requests to the HTTP transports without credential headers are refused
+# with HTTP 401. Set to true to run them on TRADING212_API_KEY's account
+# instead, only when every caller that can reach the server may use it.
+HTTP_ALLOW_DEFAULT_ACCOUNT = os.getenv("HTTP_ALLOW_DEFAULT_ACCOUNT", "false").lower() in ("1", "true", "yes")
+
+# Accounts the HTTP transports keep a client, rate limiter and history
+# store for when callers send their own credentials; the least recently
+# used one is closed beyond this. Each account's history is stored next to
+# HISTORY_DB_PATH, under tenants/.
+TENANT_MAX_CLIENTS = int(os.getenv("TENANT_MAX_CLIENTS", "64"))
+# Accounts with resource subscriptions are not closed while subscribed;
+# at most this many may hold subscriptions at once.
+TENANT_MAX_SUBSCRIBED = int(os.getenv("TENANT_MAX_SUBSCRIBED", "16"))
+
+# First day (MM-DD) of the tax year used to group realised gains, e.g.
+# 04-06 for the UK.
+TAX_YEAR_START = os.getenv("TAX_YEAR_START", "01-01")
+
+# Seconds before the in-memory instrument catalog is refreshed in the
+# background.
+INSTRUMENT_CATALOG_REFRESH_INTERVAL = float(
+    os.getenv("INSTRUMENT_CATALOG_REFRESH_INTERVAL", "3600")
+)
+
+# "fast" validates responses leniently in one pass from the raw bytes;
+# "strict" also rejects type coercions, surfacing upstream schema drift.
+VALIDATION_MODE = os.getenv("VALIDATION_MODE", "fast")
+
+# HTTP response cache: "memory" (per-process LRU), "sqlite" (shared by the
+# processes on one host), "redis" (any Redis-protocol server) or "file"
+# (hishel's file storage). Each backend evicts least recently used entries
+# beyond CACHE_MAX_BYTES.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+
+# Seconds a response stays cached when no rule in utils/cache_policy.py
+# matches its endpoint; CACHE_TTL_<RULE> (e.g. CACHE_TTL_POSITIONS=5)
+# overrides the TTL of a single rule.
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+CACHE_TTL_OVERRIDES = {
+    name[len("CACHE_TTL_"):].lower(): float(value)
+    for name, value in os.environ.items()
+    if name.startswith("CACHE_TTL_")
+}
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", ".cache/trading212/http.sqlite3")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+# Connection pool and timeouts of the HTTP clients. HTTP/2 multiplexes
+# requests over one connection and is used when the h2 package is
+# installed (pip install "trading212-mcp-server[http2]").
+# HTTP_WARMUP_CONNECTIONS connections are opened when the server starts a
+# session; 0 disables it.
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "20"))
+HTTP_WRITE_TIMEOUT = float(os.getenv("HTTP_WRITE_TIMEOUT", "10"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "10"))
+HTTP_HTTP2 = os.getenv("HTTP_HTTP2", "true").lower() in ("1", "true", "yes")
+HTTP_WARMUP_CONNECTIONS = int(os.getenv("HTTP_WARMUP_CONNECTIONS", "1"))
+
+# Retries of failed idempotent requests (GET, DELETE) after transport
+# errors and 5xx responses: at most RETRY_MAX_RETRIES re-sends with
+# jittered exponential backoff between RETRY_BASE_DELAY and
+# RETRY_MAX_DELAY seconds, all within RETRY_BUDGET seconds. Waits before
+# re-sending a request rejected with HTTP 429 count against the same budget.
+RETRY_MAX_RETRIES = int(os.getenv("RETRY_MAX_RETRIES", "3"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.25"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "4"))
+RETRY_BUDGET = float(os.getenv("RETRY_BUDGET", "10"))
+
+# OpenTelemetry tracing of tools, resources, cache lookups, HTTP calls and
+# validation: "off", "otlp" (OTLP/HTTP, configured with the standard
+# OTEL_EXPORTER_OTLP_* variables), "file" (JSON lines at TRACING_FILE_PATH)
+# or "console". Requires the "tracing" extra.
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "off")
+TRACING_FILE_PATH = os.getenv("TRACING_FILE_PATH", ".cache/trading212/traces.jsonl")
+TRACING_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "trading212-mcp-server")
@@ -1,15 +1,170 @@
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator
+
+import anyio
 from mcp.server.fastmcp import FastMCP
 from dotenv import find_dotenv, load_dotenv
-from utils.client import Trading212Client
+from pydantic import AnyUrl
+from config import HTTP_WARMUP_CONNECTIONS, REFRESH_ENDPOINTS, STATELESS_HTTP
+from utils.instrument_catalog import InstrumentCatalog
+from utils.metrics import mcp_in_flight, resource_duration, tool_duration
+from utils.tenants import TenantMiddleware, TenantRegistry
+from utils.tracing import setup_tracing, span
 
 load_dotenv(find_dotenv())
+setup_tracing()
+
+
+_warm_ups: set[asyncio.Task] = set()
+
+# Subscriptions made in the running session, as (Subscriptions, session)
+# pairs, so they can be dropped when it ends.
+_session_subscriptions: ContextVar[set | None] = ContextVar(
+    "_session_subscriptions", default=None
+)
+
+
+async def _warm_up() -> None:
+    try:
+        # Creating the first client imports hishel and opens the response
+        # cache, so it runs in a thread.
+        tenant = await asyncio.to_thread(tenants.current)
+    except ValueError:
+        # No credentials configured; the first tool call reports it.
+        return
+    tenant.client.start_warm_up()
+    tenant.client.start_refresh()
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    # Entered for every session (every request with stateless HTTP), before
+    # the initialize handshake is answered. The client is created, its
+    # connections opened and the hot endpoints fetched in the background,
+    # so the handshake does not wait for them but they are ready by the
+    # time the first tool call arrives. The warm-up runs once per client.
+    if HTTP_WARMUP_CONNECTIONS > 0 or REFRESH_ENDPOINTS:
+        task = asyncio.create_task(_warm_up())
+        _warm_ups.add(task)
+        task.add_done_callback(_warm_ups.discard)
+    subscribed: set = set()
+    token = _session_subscriptions.set(subscribed)
+    try:
+        yield
+    finally:
+        _session_subscriptions.reset(token)
+        # Exited after the session has closed. Clients that disconnect
+        # without unsubscribing, and every stateless HTTP request, would
+        # otherwise keep the poller running for nobody.
+        with anyio.CancelScope(shield=True):
+            for subscriptions, session in subscribed:
+                await subscriptions.remove_session(session)
+
+
+class Trading212MCP(FastMCP):
+    """FastMCP server that times and traces every tool and resource, and
+    runs each on the client of the caller's account."""
+
+    def streamable_http_app(self):
+        app = super().streamable_http_app()
+        app.add_middleware(TenantMiddleware, paths=(self.settings.streamable_http_path,))
+        return app
+
+    def sse_app(self, mount_path: str | None = None):
+        app = super().sse_app(mount_path)
+        # The session runs in the SSE stream's request, so the headers of
+        # that request pick the account.
+        app.add_middleware(
+            TenantMiddleware,
+            paths=(self.settings.sse_path, self.settings.message_path),
+        )
+        return app
+
+    def _setup_handlers(self) -> None:
+        super()._setup_handlers()
+        self._mcp_server.subscribe_resource()(self.subscribe_resource)
+        self._mcp_server.unsubscribe_resource()(self.unsubscribe_resource)
+
+        # The low-level server always advertises subscribe=False.
+        get_capabilities = self._mcp_server.get_capabilities
+
+        def with_subscriptions(*args, **kwargs):
+            capabilities = get_capabilities(*args, **kwargs)
+            if capabilities.resources is not None:
+                capabilities.resources.subscribe = True
+            return capabilities
+
+        self._mcp_server.get_capabilities = with_subscriptions
+
+    async def subscribe_resource(self, uri: AnyUrl) -> None:
+        """Notify the requesting session when the orders or positions behind
+        ``uri`` change; see utils/subscriptions.py."""
+        session = self._mcp_server.request_context.session
+        async with tenants.use() as tenant:
+            tenants.check_subscribable(tenant)
+            await tenant.subscriptions.subscribe(str(uri), session)
+        subscribed = _session_subscriptions.get()
+        if subscribed is not None:
+            subscribed.add((tenant.subscriptions, session))
+
+    async def unsubscribe_resource(self, uri: AnyUrl) -> None:
+        session = self._mcp_server.request_context.session
+        async with tenants.use() as tenant:
+            await tenant.subscriptions.unsubscribe(str(uri), session)
+        subscribed = _session_subscriptions.get()
+        if subscribed is not None and not tenant.subscriptions.has_session(session):
+            subscribed.discard((tenant.subscriptions, session))
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]):
+        with mcp_in_flight.track(kind="tool"), tool_duration.time(
+            tool=name, status="error"
+        ) as observed, span(f"tool {name}", **{"mcp.tool.name": name}):
+            async with tenants.use():
+                result = await super().call_tool(name, arguments)
+            observed["status"] = "ok"
+            return result
+
+    async def read_resource(self, uri: AnyUrl | str):
+        name = self._resource_name(uri)
+        with mcp_in_flight.track(kind="resource"), resource_duration.time(
+            resource=name, status="error"
+        ) as observed, span(
+            f"resource {name}", **{"mcp.resource.name": name, "mcp.resource.uri": str(uri)}
+        ):
+            async with tenants.use():
+                result = await super().read_resource(uri)
+            observed["status"] = "ok"
+            return result
+
+    def _resource_name(self, uri: AnyUrl | str) -> str:
+        # Label templated resources by their template, not by every ticker.
+        uri = str(uri)
+        if uri in self._resource_manager._resources:
+            return uri
+        for template in self._resource_manager._templates.values():
+            if template.matches(uri) is not None:
+                return template.uri_template
+        return "unknown"
+
 
-mcp = FastMCP(
+mcp = Trading212MCP(
     name="Trading212",
     dependencies=["hishel", "pydantic"],
-    stateless_http=True,
+    stateless_http=STATELESS_HTTP,
     host="127.0.0.1",
     port=8000,
+    lifespan=lifespan,
 )
 
-client = Trading212Client()
+# With the HTTP transports each request carries the credentials of its
+# own account (see utils/tenants.py); these names resolve to that
+# account's objects for the duration of a call. Instruments are the same
+# for every account, so the catalog is shared.
+tenants = TenantRegistry()
+client = tenants.proxy("client")
+history_store = tenants.proxy("history_store")
+cost_basis = tenants.proxy("cost_basis")
+dividend_ledger = tenants.proxy("dividend_ledger")
+instrument_catalog = InstrumentCatalog()
@@ -439,4 +439,163 @@ class TradeableInstrument(ApiModel):
     workingScheduleId: Optional[int] = None
 
 
+# --- TOOL RESULTS ---
+# Not part of the Trading 212 API; returned by the batch tools.
+class PositionLookup(ApiModel):
+    ticker: str
+    position: Optional[Position] = None
+    error: Optional[str] = None
+
+
+class OrderLookup(ApiModel):
+    orderId: int
+    order: Optional[Order] = None
+    error: Optional[str] = None
+
+
+# Returned by the wait_for_order tool. ``source`` is "orders" while the
+# order was still active and "history" once it had left the active list;
+# ``reached`` is false on a timeout or when the order ended in a final
+# state that was not asked for.
+class OrderWait(ApiModel):
+    orderId: int
+    status: Optional[OrderStatusEnum] = None
+    reached: bool = False
+    timedOut: bool = False
+    source: Optional[str] = None
+    order: Optional[Order] = None
+    fills: List[Fill] = []
+    polls: int = 0
+    waitedSeconds: float = 0.0
+
+
+# Returned by the portfolio_analytics tool. Amounts are in the account
+# currency and weights are shares of the invested value.
+class PositionWeight(ApiModel):
+    ticker: str
+    name: Optional[str] = None
+    currency: Optional[str] = None
+    value: float
+    weight: float
+    unrealizedProfitLoss: float
+    unrealizedProfitLossPct: Optional[float] = None
+
+
+class Exposure(ApiModel):
+    key: str
+    positions: int
+    value: float
+    weight: float
+    unrealizedProfitLoss: float
+
+
+class PortfolioConcentration(ApiModel):
+    herfindahlIndex: float
+    effectiveHoldings: float
+    top1Weight: float
+    top5Weight: float
+    top10Weight: float
+
+
+class PiesSummary(ApiModel):
+    pies: int
+    value: float
+    investedValue: float
+    result: float
+    cash: float
+    # Value of the positions' quantityInPies, from the positions endpoint.
+    positionValueInPies: float
+
+
+class PortfolioAnalytics(ApiModel):
+    currency: Optional[str] = None
+    totalValue: float
+    cash: float
+    cashWeight: Optional[float] = None
+    investedValue: float
+    totalCost: float
+    unrealizedProfitLoss: float
+    unrealizedProfitLossPct: Optional[float] = None
+    fxImpact: float
+    realizedProfitLoss: Optional[float] = None
+    positions: int
+    concentration: PortfolioConcentration
+    topPositions: List[PositionWeight]
+    currencyExposure: List[Exposure]
+    exchangeExposure: List[Exposure]
+    typeExposure: List[Exposure]
+    pies: Optional[PiesSummary] = None
+
+
+# Returned by the realised_gains tool. Amounts are in the account currency.
+class CostBasisMethodEnum(str, Enum):
+    FIFO = "FIFO"
+    AVERAGE = "AVERAGE"
+
+
+class TaxYearGains(ApiModel):
+    taxYear: str
+    disposals: int
+    proceeds: float
+    costBasis: float
+    realisedProfitLoss: float
+    fxImpact: float
+
+
+class TickerCostBasis(ApiModel):
+    ticker: str
+    quantity: float
+    costBasis: float
+    averageCost: Optional[float] = None
+    realisedProfitLoss: float
+    fxImpact: float
+    fees: float
+    # Sum of the realisedProfitLoss Trading 212 reports on the fills.
+    reportedRealisedProfitLoss: Optional[float] = None
+    # Sold without a matching purchase in the history (e.g. transfers in).
+    unmatchedQuantity: float
+
+
+class RealisedGains(ApiModel):
+    method: CostBasisMethodEnum
+    taxYearStart: str
+    fills: int
+    realisedProfitLoss: float
+    fxImpact: float
+    fees: float
+    taxYears: List[TaxYearGains]
+    tickers: List[TickerCostBasis]
+
+
+# Returned by the dividend_summary tool. Amounts are in the account currency.
+class DividendBucket(ApiModel):
+    key: str
+    payments: int
+    amount: float
+
+
+class DividendYield(ApiModel):
+    ticker: str
+    trailing12Months: float
+    costBasis: float
+    yieldOnCost: Optional[float] = None
+
+
+class DividendSummary(ApiModel):
+    currency: Optional[str] = None
+    payments: int
+    total: float
+    trailing12Months: float
+    # Trailing 12 month dividends of the open positions over their cost.
+    yieldOnCost: Optional[float] = None
+    # From the pies' dividend details; the rest was paid out as cash.
+    reinvested: Optional[float] = None
+    paidOut: Optional[float] = None
+    byYear: List[DividendBucket]
+    byMonth: List[DividendBucket]
+    byTicker: List[DividendBucket]
+    byCurrency: List[DividendBucket]
+    yields: List[DividendYield]
+
+
 WorkingSchedule.model_rebuild()
@@ -6,7 +6,7 @@ from mcp_server import mcp, client
 
 
 @mcp.prompt("analyse_trading212_data")
-def analyse_trading212_data_prompt():
+async def analyse_trading212_data_prompt():
     """Analyse trading212 data."""
 
     prompt = dedent(
@@ -20,7 +20,7 @@ def analyse_trading212_data_prompt():
     )
 
     try:
-        account_info = client.get_account_summary()
+        account_info = await client.get_account_summary()
     except Exception as e:
         print(f"Error fetching account info: {e}")
         return prompt
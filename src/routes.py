@@ -0,0 +1,14 @@
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from mcp_server import mcp
+from utils.metrics import metrics
+
+
+# ---- HTTP routes (sse and streamable-http transports only) ----
+@mcp.custom_route("/metrics", methods=["GET"], include_in_schema=False)
+async def get_metrics(request: Request) -> PlainTextResponse:
+    """Prometheus metrics for the API client and the MCP tools."""
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -5,6 +5,7 @@ from mcp_server import mcp
 from tools import *
 from prompts import *
 from resources import *
+from routes import *
 
 load_dotenv(find_dotenv())
 
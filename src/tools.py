@@ -1,39 +1,42 @@
+import asyncio
 from typing import Optional
-from mcp_server import mcp, client
+from mcp_server import (
+    mcp,
+    client,
+    cost_basis,
+    dividend_ledger,
+    history_store,
+    instrument_catalog,
+)
 
 from models import *
+from utils.order_waiter import wait_for_state
+from utils.portfolio_analytics import analyse_portfolio
 
 
 # Instruments Metadata
 @mcp.tool("search_instrument")
-def search_instrument(search_term: str = None) -> list[TradeableInstrument]:
+async def search_instrument(
+    search_term: str = None, limit: int = 20
+) -> list[TradeableInstrument]:
     """
-    Fetch instruments, optionally filtered by ticker or name.
+    Search instruments by ticker, ISIN or name, best matches first.
 
     Args:
-        search_term: Search term to filter instruments by ticker or name
-        (case-insensitive)
+        search_term: Ticker (e.g., 'AAPL' or 'AAPL_US_EQ'), ISIN or part of
+        the instrument name (case-insensitive)
+        limit: Maximum number of instruments to return. Defaults to 20
 
     Returns:
-        List of matching TradeableInstrument objects, or all instruments if no
-        search term is provided
+        List of matching TradeableInstrument objects ranked by relevance, or
+        the first `limit` instruments if no search term is provided
     """
-    instruments = client.get_instruments()
-
-    if not search_term:
-        return instruments
-
-    search_lower = search_term.lower()
-    return [
-        inst
-        for inst in instruments
-        if (inst.ticker and search_lower in inst.ticker.lower())
-        or (inst.name and search_lower in inst.name.lower())
-    ]
+    await instrument_catalog.ensure_loaded(client)
+    return instrument_catalog.search(search_term, limit=limit)
 
 
 @mcp.tool("search_exchange")
-def search_exchange(search_term: str = None) -> list[Exchange]:
+async def search_exchange(search_term: str = None) -> list[Exchange]:
     """
     Fetch exchanges, optionally filtered by name or ID.
 
@@ -45,29 +48,32 @@ def search_exchange(search_term: str = None) -> list[Exchange]:
         List of matching Exchange objects, or all exchanges if no search term
         is provided
     """
-    exchanges = client.get_exchanges()
+    exchanges = await client.get_exchanges_table()
 
     if not search_term:
-        return exchanges
+        return exchanges.rows()
 
     search_lower = search_term.lower()
-    return [
-        exch
-        for exch in exchanges
-        if (exch.name and search_lower in exch.name.lower())
-        or (str(exch.id) == search_term)
-    ]
+    return exchanges.rows(
+        [
+            index
+            for index, (exchange_id, name) in enumerate(
+                zip(exchanges.id, exchanges.name)
+            )
+            if search_lower in name.lower() or str(exchange_id) == search_term
+        ]
+    )
 
 
 # Pies
 @mcp.tool("fetch_pies")
-def fetch_pies() -> list[AccountBucketResultResponse]:
+async def fetch_pies() -> list[AccountBucketResultResponse]:
     """Fetch all pies."""
-    return client.get_pies()
+    return await client.get_pies()
 
 
 @mcp.tool("create_pie")
-def create_pie(
+async def create_pie(
     name: str,
     instrument_shares: dict[str, float],
     dividend_cash_action: Optional[DividendCashActionEnum] = None,
@@ -101,23 +107,23 @@ def create_pie(
         goal=goal,
         icon=icon,
     )
-    return client.create_pie(pie_data)
+    return await client.create_pie(pie_data)
 
 
 @mcp.tool("delete_pie")
-def delete_pie(pie_id: int):
+async def delete_pie(pie_id: int):
     """Delete a pie."""
-    return client.delete_pie(pie_id)
+    return await client.delete_pie(pie_id)
 
 
 @mcp.tool("fetch_a_pie")
-def fetch_a_pie(pie_id: int) -> AccountBucketInstrumentsDetailedResponse:
+async def fetch_a_pie(pie_id: int) -> AccountBucketInstrumentsDetailedResponse:
     """Fetch a specific pie by ID."""
-    return client.get_pie_by_id(pie_id)
+    return await client.get_pie_by_id(pie_id)
 
 
 @mcp.tool("update_pie")
-def update_pie(
+async def update_pie(
     pie_id: int,
     name: str = None,
     instrument_shares: dict[str, float] = None,
@@ -154,11 +160,11 @@ def update_pie(
         goal=goal,
         icon=icon,
     )
-    return client.update_pie(pie_id, pie_data)
+    return await client.update_pie(pie_id, pie_data)
 
 
 @mcp.tool("duplicate_pie")
-def duplicate_pie(
+async def duplicate_pie(
     pie_id: int, name: Optional[str] = None, icon: Optional[str] = None
 ) -> AccountBucketInstrumentsDetailedResponse:
     """
@@ -173,18 +179,18 @@ def duplicate_pie(
         AccountBucketInstrumentsDetailedResponse: Details of the duplicated pie
     """
     duplicate_request = DuplicateBucketRequest(name=name, icon=icon)
-    return client.duplicate_pie(pie_id, duplicate_request)
+    return await client.duplicate_pie(pie_id, duplicate_request)
 
 
 # Equity Orders
 @mcp.tool("fetch_all_orders")
-def fetch_orders() -> list[Order]:
+async def fetch_orders() -> list[Order]:
     """Fetch all equity orders."""
-    return client.get_orders()
+    return await client.get_orders()
 
 
 @mcp.tool("place_limit_order")
-def place_limit_order(
+async def place_limit_order(
     ticker: str,
     quantity: float,
     limit_price: float,
@@ -209,11 +215,11 @@ def place_limit_order(
         limitPrice=limit_price,
         timeValidity=time_validity,
     )
-    return client.place_limit_order(limit_request)
+    return await client.place_limit_order(limit_request)
 
 
 @mcp.tool("place_market_order")
-def place_market_order(
+async def place_market_order(
     ticker: str, quantity: float, extended_hours: bool = False
 ) -> Order:
     """
@@ -231,11 +237,11 @@ def place_market_order(
     market_request = MarketRequest(
         ticker=ticker, quantity=quantity, extendedHours=extended_hours
     )
-    return client.place_market_order(market_request)
+    return await client.place_market_order(market_request)
 
 
 @mcp.tool("place_stop_order")
-def place_stop_order(
+async def place_stop_order(
     ticker: str,
     quantity: float,
     stop_price: float,
@@ -261,11 +267,11 @@ def place_stop_order(
         stopPrice=stop_price,
         timeValidity=time_validity,
     )
-    return client.place_stop_order(stop_request)
+    return await client.place_stop_order(stop_request)
 
 
 @mcp.tool("place_stop_limit_order")
-def place_stop_limit_order(
+async def place_stop_limit_order(
     ticker: str,
     quantity: float,
     stop_price: float,
@@ -295,96 +301,377 @@ def place_stop_limit_order(
         limitPrice=limit_price,
         timeValidity=time_validity,
     )
-    return client.place_stop_limit_order(stop_limit_request)
+    return await client.place_stop_limit_order(stop_limit_request)
 
 
 @mcp.tool("cancel_order")
-def cancel_order_by_id(order_id: int) -> None:
+async def cancel_order_by_id(order_id: int) -> None:
     """Cancel an existing order."""
-    return client.cancel_order(order_id)
+    return await client.cancel_order(order_id)
 
 
 @mcp.tool("fetch_order")
-def fetch_order_by_id(order_id: int) -> Order:
+async def fetch_order_by_id(order_id: int) -> Order:
     """Fetch a specific order by ID."""
-    return client.get_order_by_id(order_id)
+    return await client.get_order_by_id(order_id)
+
+
+@mcp.tool("wait_for_order")
+async def wait_for_order(
+    order_id: int,
+    states: Optional[list[OrderStatusEnum]] = None,
+    timeout: float = 60,
+) -> OrderWait:
+    """
+    Wait until an order reaches one of the given states, instead of
+    fetching it repeatedly. The order is polled with backoff within its
+    rate limit, and looked up in the order history once it is no longer
+    active. Also returns when the order ends in a final state that was not
+    asked for (e.g. REJECTED), or on timeout.
+
+    Args:
+        order_id: ID of the order, as returned when it was placed
+        states: Order states to wait for. Defaults to FILLED and CANCELLED
+        timeout: Seconds to wait at most. Defaults to 60
+
+    Returns:
+        OrderWait: The last known state of the order, its fills once it is
+        in the history, and whether a requested state was reached
+    """
+    if states is None:
+        states = [OrderStatusEnum.FILLED, OrderStatusEnum.CANCELLED]
+    return await wait_for_state(client, history_store, order_id, states, timeout)
+
+
+async def _lookup_order(order_id: int) -> OrderLookup:
+    try:
+        return OrderLookup(orderId=order_id, order=await client.get_order_by_id(order_id))
+    except Exception as exc:
+        return OrderLookup(orderId=order_id, error=str(exc))
+
+
+@mcp.tool("fetch_orders_batch")
+async def fetch_orders_batch(order_ids: list[int]) -> list[OrderLookup]:
+    """
+    Fetch several orders by ID in one call.
+    Orders found in the list of active orders are served from a single
+    request; the remaining IDs are fetched concurrently.
+
+    Args:
+        order_ids: Order IDs to look up
+
+    Returns:
+        One OrderLookup per distinct ID, in the order given, holding either
+        the order or the error that prevented fetching it
+    """
+    order_ids = list(dict.fromkeys(order_ids))
+    try:
+        active = {order.id: order for order in await client.get_orders()}
+    except Exception:
+        active = {}
+
+    missing = [order_id for order_id in order_ids if order_id not in active]
+    fetched = dict(
+        zip(missing, await asyncio.gather(*map(_lookup_order, missing)))
+    )
+    return [
+        OrderLookup(orderId=order_id, order=active[order_id])
+        if order_id in active
+        else fetched[order_id]
+        for order_id in order_ids
+    ]
 
 
 # Account Data
 @mcp.tool("fetch_account_info")
-def fetch_account_info() -> AccountSummary:
+async def fetch_account_info() -> AccountSummary:
     """Fetch the account summary."""
-    return client.get_account_summary()
+    return await client.get_account_summary()
 
 
 @mcp.tool("fetch_account_summary")
-def fetch_account_summary() -> AccountSummary:
+async def fetch_account_summary() -> AccountSummary:
     """Fetch the account summary."""
-    return client.get_account_summary()
+    return await client.get_account_summary()
 
 
 @mcp.tool("fetch_account_cash")
-def fetch_account_cash() -> Cash:
+async def fetch_account_cash() -> Cash:
     """Fetch account cash balance."""
-    return client.get_account_cash()
+    return await client.get_account_cash()
 
 
 # Personal Portfolio
 @mcp.tool("fetch_positions")
-def fetch_positions(ticker: str | None = None) -> list[Position]:
+async def fetch_positions(ticker: str | None = None) -> list[Position]:
     """Fetch open positions, optionally filtered by ticker."""
-    return client.get_positions(ticker=ticker)
+    return await client.get_positions(ticker=ticker)
 
 
 @mcp.tool("fetch_position_by_ticker")
-def fetch_position_by_ticker(ticker: str) -> Position:
+async def fetch_position_by_ticker(ticker: str) -> Position:
     """Fetch a single open position by ticker."""
-    return client.get_position_by_ticker(ticker)
+    return await client.get_position_by_ticker(ticker)
+
+
+async def _lookup_position(ticker: str) -> PositionLookup:
+    try:
+        return PositionLookup(
+            ticker=ticker, position=await client.get_position_by_ticker(ticker)
+        )
+    except Exception as exc:
+        return PositionLookup(ticker=ticker, error=str(exc))
+
+
+@mcp.tool("fetch_positions_batch")
+async def fetch_positions_batch(tickers: list[str]) -> list[PositionLookup]:
+    """
+    Fetch the open positions for several tickers in one call.
+    All tickers are answered from a single request for every open position;
+    only if that request fails are the tickers fetched one by one.
+
+    Args:
+        tickers: Tickers to look up (e.g., ['AAPL_US_EQ', 'VUSAl_EQ'])
+
+    Returns:
+        One PositionLookup per distinct ticker, in the order given, holding
+        either the position or the reason it could not be returned
+    """
+    tickers = list(dict.fromkeys(tickers))
+    try:
+        positions = await client.get_account_positions()
+    except Exception:
+        return list(await asyncio.gather(*map(_lookup_position, tickers)))
+
+    by_ticker = {
+        position.instrument.ticker.upper(): position
+        for position in positions
+        if position.instrument and position.instrument.ticker
+    }
+    return [
+        PositionLookup(ticker=ticker, position=by_ticker[ticker.upper()])
+        if ticker.upper() in by_ticker
+        else PositionLookup(
+            ticker=ticker, error=f"No open position found for ticker '{ticker}'"
+        )
+        for ticker in tickers
+    ]
+
+
+@mcp.tool("portfolio_analytics")
+async def portfolio_analytics(top: int = 10) -> PortfolioAnalytics:
+    """
+    Summarise the whole portfolio in one call instead of doing arithmetic
+    over fetch_positions: weights, unrealised P&L, FX impact, currency
+    exposure (GBX pence counted as GBP), concentration, breakdowns by
+    exchange and instrument type, and pie totals.
+
+    Args:
+        top: Number of largest positions to list. Defaults to 10
+
+    Returns:
+        PortfolioAnalytics with amounts in the account currency and weights
+        as shares of the invested value
+    """
+    positions, summary, pies, exchanges, _ = await asyncio.gather(
+        client.get_account_positions(),
+        client.get_account_summary(),
+        client.get_pies(),
+        client.get_exchanges_table(),
+        instrument_catalog.ensure_loaded(client),
+    )
+    schedules = exchanges.schedule_names()
+    instrument_types, venues = {}, {}
+    for position in positions:
+        ticker = position.instrument.ticker if position.instrument else None
+        if ticker:
+            instrument_type, schedule_id = instrument_catalog.classify(ticker)
+            instrument_types[ticker] = instrument_type
+            venues[ticker] = schedules.get(schedule_id)
+    return analyse_portfolio(
+        positions,
+        summary=summary,
+        pies=pies,
+        instrument_types=instrument_types,
+        exchanges=venues,
+        top=top,
+    )
 
 
 @mcp.tool("fetch_all_open_positions")
-def fetch_all_open_positions() -> list[Position]:
+async def fetch_all_open_positions() -> list[Position]:
     """Deprecated alias for fetch_positions()."""
-    return client.get_account_positions()
+    return await client.get_account_positions()
 
 
 @mcp.tool("fetch_open_position_by_ticker")
-def fetch_open_position_by_ticker(ticker: str) -> Position:
+async def fetch_open_position_by_ticker(ticker: str) -> Position:
     """Deprecated alias for fetch_position_by_ticker()."""
-    return client.get_account_position_by_ticker(ticker)
+    return await client.get_account_position_by_ticker(ticker)
 
 
 @mcp.tool("search_specific_position_by_ticker")
-def search_position_by_ticker(ticker: str) -> Position:
+async def search_position_by_ticker(ticker: str) -> Position:
     """Deprecated alias for fetch_position_by_ticker()."""
-    return client.search_position_by_ticker(ticker)
+    return await client.search_position_by_ticker(ticker)
 
 
 # Historical items
 @mcp.tool("fetch_historical_order_data")
-def fetch_historical_order_data(
+async def fetch_historical_order_data(
     cursor: int = None, ticker: str = None, limit: int = 20
 ) -> PaginatedResponseHistoricalOrder:
     """Fetch historical order data with pagination."""
-    return client.get_historical_order_data(cursor=cursor, ticker=ticker, limit=limit)
+    return await client.get_historical_order_data(cursor=cursor, ticker=ticker, limit=limit)
 
 
 @mcp.tool("fetch_paid_out_dividends")
-def fetch_paid_out_dividends(
+async def fetch_paid_out_dividends(
     cursor: int = None, ticker: str = None, limit: int = 20
 ) -> PaginatedResponseHistoryDividendItem:
     """Fetch historical dividend data with pagination."""
-    return client.get_dividends(cursor=cursor, ticker=ticker, limit=limit)
+    return await client.get_dividends(cursor=cursor, ticker=ticker, limit=limit)
+
+
+async def _synced_history(kind: str) -> None:
+    # Pull anything newer than the local copy, at most once per sync interval.
+    # Concurrent calls wait for one sync instead of walking the history twice.
+    async with history_store.sync_locks[kind]:
+        if await asyncio.to_thread(history_store.needs_sync, kind):
+            await history_store.sync_async(client, kind)
+
+
+@mcp.tool("fetch_all_historical_orders")
+async def fetch_all_historical_orders(
+    ticker: str = None,
+    since: datetime = None,
+    until: datetime = None,
+    max_items: int = 1000,
+) -> list[HistoricalOrder]:
+    """
+    Fetch historical orders across all pages in a single call, newest first.
+    Results are served from a local copy of the history that is synced
+    incrementally.
+
+    Args:
+        ticker: Optional ticker to filter by (e.g., 'AAPL_US_EQ')
+        since: Only include orders at or after this time in ISO 8601 format
+            (e.g., '2024-01-01T00:00:00Z')
+        until: Only include orders before this time in ISO 8601 format
+            (e.g., '2025-01-01T00:00:00Z')
+        max_items: Maximum number of orders to return. Defaults to 1000
+
+    Returns:
+        List of HistoricalOrder objects
+    """
+    await _synced_history("orders")
+    return await asyncio.to_thread(
+        history_store.query,
+        "orders",
+        ticker=ticker,
+        time_from=since,
+        time_to=until,
+        limit=max_items,
+    )
+
+
+@mcp.tool("realised_gains")
+async def realised_gains(
+    method: CostBasisMethodEnum = CostBasisMethodEnum.FIFO,
+    ticker: str = None,
+    tax_year_start: str = None,
+) -> RealisedGains:
+    """
+    Compute realised gains and the remaining cost basis from the full order
+    history, per ticker and per tax year, including the FX part of each
+    gain. Only tickers with new fills are recomputed between calls.
+
+    Args:
+        method: Cost basis method. Defaults to FIFO.
+            Possible values: FIFO, AVERAGE
+        ticker: Optional ticker to report on (e.g., 'AAPL_US_EQ'); the tax
+            years then cover that ticker only
+        tax_year_start: First day of the tax year as MM-DD (e.g., '04-06'
+            for the UK). Defaults to TAX_YEAR_START (01-01)
+
+    Returns:
+        RealisedGains with amounts in the account currency
+    """
+    await _synced_history("orders")
+    await asyncio.to_thread(cost_basis.update, history_store)
+    return cost_basis.report(method, ticker=ticker, tax_year_start=tax_year_start)
+
+
+@mcp.tool("fetch_all_paid_out_dividends")
+async def fetch_all_paid_out_dividends(
+    ticker: str = None,
+    since: datetime = None,
+    until: datetime = None,
+    max_items: int = 1000,
+) -> list[HistoryDividendItem]:
+    """
+    Fetch paid out dividends across all pages in a single call, newest first.
+    Results are served from a local copy of the history that is synced
+    incrementally.
+
+    Args:
+        ticker: Optional ticker to filter by (e.g., 'VUSAl_EQ')
+        since: Only include dividends paid at or after this time in ISO 8601
+            format (e.g., '2024-01-01T00:00:00Z')
+        until: Only include dividends paid before this time in ISO 8601
+            format (e.g., '2025-01-01T00:00:00Z')
+        max_items: Maximum number of dividends to return. Defaults to 1000
+
+    Returns:
+        List of HistoryDividendItem objects
+    """
+    await _synced_history("dividends")
+    return await asyncio.to_thread(
+        history_store.query,
+        "dividends",
+        ticker=ticker,
+        time_from=since,
+        time_to=until,
+        limit=max_items,
+    )
+
+
+@mcp.tool("dividend_summary")
+async def dividend_summary(
+    ticker: str = None, months: int = 24, top: int = 20
+) -> DividendSummary:
+    """
+    Summarise all paid out dividends in one call: totals by year, month,
+    ticker and currency, trailing 12 month income and yield on cost of the
+    open positions, and how much was reinvested by pies versus paid out.
+
+    Args:
+        ticker: Optional ticker to summarise (e.g., 'VUSAl_EQ')
+        months: Number of most recent months to list. Defaults to 24
+        top: Number of tickers and position yields to list. Defaults to 20
+
+    Returns:
+        DividendSummary with amounts in the account currency
+    """
+    await _synced_history("dividends")
+    positions, pies, _ = await asyncio.gather(
+        client.get_account_positions(),
+        client.get_pies(),
+        asyncio.to_thread(dividend_ledger.update, history_store),
+    )
+    return dividend_ledger.summary(
+        positions, pies, ticker=ticker, months=months, top=top
+    )
 
 
 @mcp.tool("fetch_exports_list")
-def fetch_exports_list() -> list[ReportResponse]:
+async def fetch_exports_list() -> list[ReportResponse]:
     """Lists detailed information about all csv account exports."""
-    return client.get_reports()
+    return await client.get_reports()
 
 
 @mcp.tool("request_csv_export")
-def request_csv_export(
+async def request_csv_export(
     include_dividends: bool = True,
     include_interest: bool = True,
     include_orders: bool = True,
@@ -421,15 +708,44 @@ def request_csv_export(
         includeOrders=include_orders,
         includeTransactions=include_transactions,
     )
-    return client.request_export(
+    return await client.request_export(
         data_included=data_included, time_from=time_from, time_to=time_to
     )
 
 
 @mcp.tool("fetch_transaction_list")
-def fetch_transaction_list(
+async def fetch_transaction_list(
     cursor: str | None = None, time: str | None = None, limit: int = 20
 ) -> PaginatedResponseHistoryTransactionItem:
     """Fetch superficial information about movements to and from your
     account."""
-    return client.get_history_transactions(cursor=cursor, time_from=time, limit=limit)
+    return await client.get_history_transactions(cursor=cursor, time_from=time, limit=limit)
+
+
+@mcp.tool("fetch_all_transactions")
+async def fetch_all_transactions(
+    since: datetime = None, until: datetime = None, max_items: int = 1000
+) -> list[HistoryTransactionItem]:
+    """
+    Fetch movements to and from your account across all pages in a single
+    call, newest first. Results are served from a local copy of the history
+    that is synced incrementally.
+
+    Args:
+        since: Only include movements at or after this time in ISO 8601
+            format (e.g., '2024-01-01T00:00:00Z')
+        until: Only include movements before this time in ISO 8601 format
+            (e.g., '2025-01-01T00:00:00Z')
+        max_items: Maximum number of movements to return. Defaults to 1000
+
+    Returns:
+        List of HistoryTransactionItem objects
+    """
+    await _synced_history("transactions")
+    return await asyncio.to_thread(
+        history_store.query,
+        "transactions",
+        time_from=since,
+        time_to=until,
+        limit=max_items,
+    )
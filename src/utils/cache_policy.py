@@ -0,0 +1,210 @@
+import hashlib
+import secrets
+import threading
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Optional, Union
+
+import hishel
+from hishel._controller import get_age
+from hishel._utils import generate_key
+from httpcore import Request, Response
+
+from config import CACHE_TTL, CACHE_TTL_OVERRIDES
+from utils.rate_limiter import endpoint_key
+
+
+@dataclass(frozen=True)
+class CacheRule:
+    name: str
+    pattern: str
+    ttl: float
+
+
+# How long (in seconds) a GET response may be served from the cache, keyed
+# by a glob over the path below /api/v0. The first matching rule wins and a
+# TTL of 0 disables caching. Override a rule with CACHE_TTL_<NAME>, e.g.
+# CACHE_TTL_POSITIONS=5.
+DEFAULT_CACHE_RULES = [
+    CacheRule("instruments", "/equity/metadata/instruments", 24 * 60 * 60),
+    CacheRule("exchanges", "/equity/metadata/exchanges", 24 * 60 * 60),
+    CacheRule("pies", "/equity/pies*", 60),
+    CacheRule("positions", "/equity/positions*", 2),
+    # Cash is read from the account summary.
+    CacheRule("account", "/equity/account/*", 5),
+    CacheRule("orders", "/equity/orders*", 0),
+    CacheRule("exports", "/equity/history/exports*", 10),
+    # HistoryStore keeps its own copy; a cached first page would hide new items.
+    CacheRule("history", "/equity/history/*", 0),
+]
+
+
+# Cache rules whose responses a successful write makes stale, keyed like
+# the rate limits ("<METHOD> <path template>").
+CACHE_INVALIDATIONS: dict[str, tuple[str, ...]] = {
+    "POST /equity/orders/market": ("orders", "positions", "account"),
+    "POST /equity/orders/limit": ("orders", "positions", "account"),
+    "POST /equity/orders/stop": ("orders", "positions", "account"),
+    "POST /equity/orders/stop_limit": ("orders", "positions", "account"),
+    "DELETE /equity/orders/{id}": ("orders", "account"),
+    "POST /equity/pies": ("pies", "account"),
+    "POST /equity/pies/{id}": ("pies", "account"),
+    "POST /equity/pies/{id}/duplicate": ("pies", "account"),
+    "DELETE /equity/pies/{id}": ("pies", "positions", "account"),
+    "POST /equity/history/exports": ("exports",),
+}
+
+
+def _path(url: Union[str, bytes]) -> str:
+    if isinstance(url, bytes):
+        url = url.decode("ascii")
+    path = url.split("?", 1)[0]
+    if path.startswith("/api/"):
+        _, _, path = path.partition("/api/v0")
+    return path.rstrip("/") or "/"
+
+
+def cache_namespace(authorization: Union[str, bytes, None]) -> str:
+    """Opaque cache namespace of the account behind an Authorization header."""
+    if not authorization:
+        return ""
+    if isinstance(authorization, str):
+        authorization = authorization.encode("utf-8")
+    return hashlib.blake2b(authorization, digest_size=8).hexdigest()
+
+
+def _request_namespace(request: Request) -> str:
+    for name, value in request.headers:
+        if name.lower() == b"authorization":
+            return cache_namespace(value)
+    return ""
+
+
+class CachePolicy:
+    """Per-endpoint cache TTLs and write invalidation.
+
+    Cache keys carry a generation number per rule. A write bumps the
+    generation of every rule it invalidates, so earlier responses, including
+    the ``?ticker=`` variants of an endpoint, are never looked up again and
+    age out of the storage on their own. This works the same for every
+    storage backend without having to enumerate keys.
+
+    Generations live in process memory, so rules that writes invalidate
+    start at a random generation in each process. Otherwise a process
+    restarted soon after a write would read back responses cached before
+    it from a persistent storage. Responses of those rules are therefore
+    not shared between processes; the rest (instruments, exchanges) are.
+
+    hishel's keys ignore request headers, so each key also carries the
+    namespace of the request's Authorization header: accounts sharing a
+    storage never see each other's responses, and a write only invalidates
+    the responses of its own account.
+    """
+
+    def __init__(
+        self,
+        rules: list[CacheRule] | None = None,
+        default_ttl: float = CACHE_TTL,
+        overrides: dict[str, float] | None = None,
+        invalidations: dict[str, tuple[str, ...]] | None = None,
+    ):
+        overrides = CACHE_TTL_OVERRIDES if overrides is None else overrides
+        self.rules = [
+            CacheRule(rule.name, rule.pattern, overrides.get(rule.name, rule.ttl))
+            for rule in (DEFAULT_CACHE_RULES if rules is None else rules)
+        ]
+        self.default_ttl = default_ttl
+        self.invalidations = dict(
+            CACHE_INVALIDATIONS if invalidations is None else invalidations
+        )
+        # (namespace, rule) -> generation; a few bytes per account and rule.
+        self._generations: dict[tuple[str, str], int] = {}
+        self._invalidated = {
+            name for names in self.invalidations.values() for name in names
+        }
+        self._seed = secrets.randbits(48) + 1
+        self._lock = threading.Lock()
+
+    @property
+    def max_ttl(self) -> float:
+        return max([self.default_ttl, *(rule.ttl for rule in self.rules)])
+
+    def rule_for(self, request: Union[Request, str]) -> CacheRule | None:
+        url = request if isinstance(request, str) else request.url.target
+        path = _path(url)
+        for rule in self.rules:
+            if fnmatchcase(path, rule.pattern):
+                return rule
+        return None
+
+    def ttl_for(self, request: Union[Request, str]) -> float:
+        """TTL for a request (or a path) in seconds."""
+        rule = self.rule_for(request)
+        return self.default_ttl if rule is None else rule.ttl
+
+    def generation(self, request: Union[Request, str], namespace: str = "") -> int:
+        """How many times the cached responses for a request were invalidated.
+
+        A path is looked up in ``namespace``; a request in the namespace of
+        its Authorization header.
+        """
+        if not isinstance(request, str):
+            namespace = _request_namespace(request)
+        rule = self.rule_for(request)
+        if rule is None or rule.name not in self._invalidated:
+            return 0
+        return self._generations.get((namespace, rule.name), self._seed)
+
+    def cache_key(self, request: Request, body: Optional[bytes] = b"") -> str:
+        """hishel key generator that appends the account namespace and the
+        generation of the rule."""
+        key = generate_key(request, body or b"")
+        namespace = _request_namespace(request)
+        if namespace:
+            key = f"{key}.{namespace}"
+        generation = self.generation(request)
+        return f"{key}.{generation}" if generation else key
+
+    def invalidate(self, method: str, path: str, namespace: str = "") -> tuple[str, ...]:
+        """Drop the cached responses of ``namespace`` made stale by a write
+        to ``path``."""
+        names = self.invalidations.get(endpoint_key(method, _path(path)), ())
+        with self._lock:
+            for name in names:
+                key = (namespace, name)
+                self._generations[key] = self._generations.get(key, self._seed) + 1
+        return names
+
+    def table(self) -> list[dict]:
+        return [
+            {"name": rule.name, "pattern": rule.pattern, "ttl": rule.ttl}
+            for rule in self.rules
+        ] + [{"name": "default", "pattern": "*", "ttl": self.default_ttl}]
+
+
+class CachePolicyController(hishel.Controller):
+    """hishel controller that applies a CachePolicy.
+
+    Endpoints with a TTL of 0 are never stored, and a stored response is
+    only reused while its age (from its Date header) is below the TTL of
+    its endpoint. The storages expire entries on the same policy, so this
+    check matters mostly for the file storage, whose TTL is global.
+    """
+
+    def __init__(self, policy: CachePolicy, **kwargs):
+        super().__init__(key_generator=policy.cache_key, **kwargs)
+        self.policy = policy
+
+    def is_cachable(self, request: Request, response: Response) -> bool:
+        if self.policy.ttl_for(request) <= 0:
+            return False
+        return super().is_cachable(request=request, response=response)
+
+    def construct_response_from_cache(
+        self, request: Request, response: Response, original_request: Request
+    ) -> Union[Response, Request, None]:
+        if get_age(response, self._clock) >= self.policy.ttl_for(request):
+            return None
+        return super().construct_response_from_cache(
+            request=request, response=response, original_request=original_request
+        )
@@ -0,0 +1,370 @@
+import abc
+import asyncio
+import datetime
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Union
+
+import hishel
+from httpcore import Request, Response
+from hishel._serializers import Metadata
+
+from utils.tracing import span
+
+try:
+    import redis
+except ImportError:  # pragma: no cover
+    redis = None
+
+if TYPE_CHECKING:
+    from utils.cache_policy import CachePolicy
+
+RemoveTypes = Union[str, Response]
+
+
+class CacheBackend(abc.ABC):
+    """Byte-oriented key/value store behind the hishel storages below.
+
+    Entries expire after ``ttl`` seconds, or the backend's default TTL when
+    it is None, and each backend applies its own eviction policy.
+    ``keep_ttl`` updates the value of an entry without renewing its
+    expiry, which is what hishel needs when it bumps the hit counter of a
+    cached response.
+    """
+
+    @abc.abstractmethod
+    def get(self, key: str) -> bytes | None:
+        ...
+
+    @abc.abstractmethod
+    def set(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[float] = None,
+        keep_ttl: bool = False,
+    ) -> None:
+        ...
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    def close(self) -> None:
+        return
+
+
+class MemoryBackend(CacheBackend):
+    """LRU cache bounded by entry count and total payload size."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: Optional[float] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[float] = None,
+        keep_ttl: bool = False,
+    ) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._pop(key)
+            if keep_ttl and previous:
+                expires_at = previous[1]
+            else:
+                expires_at = _expires_at(time.monotonic(), ttl, self.ttl)
+            self._entries[key] = (value, expires_at)
+            self.size += len(value)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def _pop(self, key: str) -> tuple[bytes, float] | None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+        return entry
+
+
+class SQLiteBackend(CacheBackend):
+    """SQLite cache that evicts least recently used rows beyond ``max_bytes``.
+
+    WAL mode lets several server processes on one host share the file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl: Optional[float] = None,
+    ):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)"
+            )
+
+    def get(self, key: str) -> bytes | None:
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT data, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now >= row[1]:
+                self._connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            self._connection.execute(
+                "UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            return row[0]
+
+    def set(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[float] = None,
+        keep_ttl: bool = False,
+    ) -> None:
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock, self._connection:
+            if keep_ttl:
+                updated = self._connection.execute(
+                    "UPDATE cache SET data = ?, size = ?, accessed_at = ? WHERE key = ?",
+                    (value, len(value), now, key),
+                )
+                if updated.rowcount:
+                    return
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache (key, data, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), _expires_at(now, ttl, self.ttl), now),
+            )
+            self._evict(now)
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def _evict(self, now: float) -> None:
+        self._connection.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        (total,) = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        # Drop the least recently used rows until we are back under budget.
+        rows = self._connection.execute(
+            "SELECT key, size FROM cache ORDER BY accessed_at"
+        )
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._connection.executemany("DELETE FROM cache WHERE key = ?", stale)
+
+
+class RedisBackend(CacheBackend):
+    """Any Redis-protocol server (Redis, Valkey, KeyDB, ...) shared by replicas.
+
+    Entries expire through Redis TTLs; the total size is bounded by the
+    server's own ``maxmemory`` and ``maxmemory-policy`` settings.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_entry_bytes: int = 16 * 1024 * 1024,
+        ttl: Optional[float] = None,
+        prefix: str = "trading212:",
+    ):
+        if redis is None:
+            raise RuntimeError(
+                "CACHE_BACKEND=redis requires the redis package: "
+                'pip install "trading212-mcp-server[redis]"'
+            )
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> bytes | None:
+        return self._client.get(self.prefix + key)
+
+    def set(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[float] = None,
+        keep_ttl: bool = False,
+    ) -> None:
+        if len(value) > self.max_entry_bytes:
+            return
+        if keep_ttl:
+            self._client.set(self.prefix + key, value, keepttl=True, xx=True)
+            return
+        ttl = self.ttl if ttl is None else ttl
+        px = None if ttl is None else max(1, int(ttl * 1000))
+        self._client.set(self.prefix + key, value, px=px)
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self.prefix + key)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def _expires_at(now: float, ttl: Optional[float], default: Optional[float]) -> float:
+    ttl = default if ttl is None else ttl
+    return math.inf if ttl is None else now + ttl
+
+
+def _metadata(key: str, metadata: Metadata | None) -> Metadata:
+    return metadata or Metadata(
+        cache_key=key,
+        created_at=datetime.datetime.now(datetime.timezone.utc),
+        number_of_uses=0,
+    )
+
+
+def _remove_key(key: RemoveTypes) -> str:
+    if isinstance(key, Response):
+        return key.extensions["cache_metadata"]["cache_key"]
+    return key
+
+
+class CacheStorage(hishel.BaseStorage):
+    """hishel storage that serialises responses into a CacheBackend.
+
+    With a ``policy``, each response expires after the TTL of its endpoint
+    rather than the backend's default.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        serializer=None,
+        policy: Optional["CachePolicy"] = None,
+    ):
+        super().__init__(serializer)
+        self.backend = backend
+        self.policy = policy
+
+    def _dumps(self, response, request, metadata) -> bytes:
+        data = self._serializer.dumps(response=response, request=request, metadata=metadata)
+        return data if isinstance(data, bytes) else data.encode("utf-8")
+
+    def store(self, key: str, response: Response, request: Request, metadata: Metadata | None = None) -> None:
+        ttl = None if self.policy is None else self.policy.ttl_for(request)
+        self.backend.set(
+            key, self._dumps(response, request, _metadata(key, metadata)), ttl=ttl
+        )
+
+    def remove(self, key: RemoveTypes) -> None:
+        self.backend.delete(_remove_key(key))
+
+    def update_metadata(self, key: str, response: Response, request: Request, metadata: Metadata) -> None:
+        self.backend.set(key, self._dumps(response, request, metadata), keep_ttl=True)
+
+    def retrieve(self, key: str):
+        with span("cache lookup", **{"cache.backend": type(self.backend).__name__}) as current:
+            data = self.backend.get(key)
+            current.set_attribute("cache.hit", data is not None)
+        if data is None:
+            return None
+        return self._serializer.loads(data if self._serializer.is_binary else data.decode("utf-8"))
+
+    def close(self) -> None:
+        # Every client shares the backend, so closing one client must not
+        # close it; the backend lives as long as the process.
+        pass
+
+
+class AsyncCacheStorage(hishel.AsyncBaseStorage):
+    """Async counterpart of CacheStorage.
+
+    Backends that block on I/O (SQLite, Redis) are called from a worker
+    thread so that cache lookups never stall the event loop.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        serializer=None,
+        policy: Optional["CachePolicy"] = None,
+    ):
+        super().__init__(serializer)
+        self.backend = backend
+        self._sync = CacheStorage(backend, serializer=self._serializer, policy=policy)
+        self._offload = not isinstance(backend, MemoryBackend)
+
+    async def _call(self, function, *args, **kwargs):
+        if self._offload:
+            return await asyncio.to_thread(function, *args, **kwargs)
+        return function(*args, **kwargs)
+
+    async def store(self, key: str, response: Response, request: Request, metadata: Metadata | None = None) -> None:
+        await self._call(self._sync.store, key, response, request, metadata)
+
+    async def remove(self, key: RemoveTypes) -> None:
+        await self._call(self._sync.remove, key)
+
+    async def update_metadata(self, key: str, response: Response, request: Request, metadata: Metadata) -> None:
+        await self._call(self._sync.update_metadata, key, response, request, metadata)
+
+    async def retrieve(self, key: str):
+        return await self._call(self._sync.retrieve, key)
+
+    async def aclose(self) -> None:
+        # See CacheStorage.close().
+        pass
@@ -1,21 +1,74 @@
+import asyncio
 import base64
 import os
-from typing import Any, Optional
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Iterator, Optional
 
-import hishel
 import httpx
 
+from config import HTTP_WARMUP_CONNECTIONS, REFRESH_ENDPOINTS
 from models import *
-from utils.hishel_config import controller, storage
+from utils.http_config import create_async_transport, create_transport, timeout
+from utils.metadata_tables import ExchangeTable, InstrumentTable
+from utils.metrics import (
+    AsyncMetricsTransport,
+    MetricsTransport,
+    cache_requests,
+    client_request_duration,
+    endpoint_labels,
+    validation_duration,
+)
+from utils.parsing import parse_json
+from utils.refresher import Refresher
+from utils.rate_limiter import (
+    AsyncRateLimitedTransport,
+    RateLimitedTransport,
+    RateLimiter,
+    rate_limiter as default_rate_limiter,
+)
+from utils.single_flight import AsyncSingleFlight, SingleFlight
+from utils.tracing import span
 
 
-class Trading212Client:
+def as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes as UTC so they compare with API timestamps."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def history_item_date(item: Any) -> datetime | None:
+    """The time a history item happened, used to order and bound history."""
+    if isinstance(item, HistoricalOrder):
+        filled_at = item.fill.filledAt if item.fill else None
+        return filled_at or (item.order.createdAt if item.order else None)
+    if isinstance(item, HistoryDividendItem):
+        return item.paidOn
+    if isinstance(item, HistoryTransactionItem):
+        return item.dateTime
+    return None
+
+
+def _model_name(response_model: Any) -> str:
+    if response_model is None:
+        return "raw"
+    if hasattr(response_model, "__args__"):
+        # Generic aliases such as list[Position].
+        return str(response_model).replace("models.", "")
+    return getattr(response_model, "__name__", str(response_model))
+
+
+class BaseTrading212Client:
+    """Connection settings and response handling shared by both clients."""
+
     def __init__(
         self,
         api_key: str | None = None,
         api_secret: str | None = None,
         environment: str | None = None,
         version: str = "v0",
+        rate_limiter: RateLimiter | None = None,
+        base_url: str | None = None,
     ):
         api_key = api_key or os.getenv("TRADING212_API_KEY")
         api_secret = api_secret or os.getenv("TRADING212_API_SECRET")
@@ -24,15 +77,28 @@ class Trading212Client:
         if not api_key:
             raise ValueError("TRADING212_API_KEY must be configured")
 
-        base_url = f"https://{environment}.trading212.com/api/{version}"
-        headers = self._build_headers(api_key=api_key, api_secret=api_secret)
-
-        self.client = hishel.CacheClient(
-            base_url=base_url,
-            storage=storage,
-            controller=controller,
-            headers=headers,
+        # TRADING212_BASE_URL points the clients at a proxy or a mock server.
+        base_url = base_url or os.getenv("TRADING212_BASE_URL")
+        self.base_url = (
+            base_url.rstrip("/")
+            if base_url
+            else f"https://{environment}.trading212.com/api/{version}"
         )
+        self.headers = self._build_headers(api_key=api_key, api_secret=api_secret)
+
+        # hishel and the cache backend are loaded with the first client
+        # rather than on import, keeping them off the server's startup path.
+        from utils.cache_policy import cache_namespace
+        from utils.hishel_config import controller
+
+        self.controller = controller
+        # Cached responses and their invalidation are scoped to the account.
+        self.cache_namespace = cache_namespace(self.headers["Authorization"])
+        self.rate_limiter = rate_limiter or default_rate_limiter
+
+    def rate_limit_stats(self) -> dict[str, dict]:
+        """Per-endpoint quota usage, queue depth and wait times."""
+        return self.rate_limiter.stats()
 
     @staticmethod
     def _build_headers(api_key: str, api_secret: str | None) -> dict[str, str]:
@@ -58,9 +124,54 @@ class Trading212Client:
             return rest or "/"
         return path
 
-    def _make_request(self, method: str, url: str, **kwargs) -> Any:
-        response = self.client.request(method, self._normalise_path(url), **kwargs)
+    def _flight_key(self, path: str, response_model: Any, params: Any) -> tuple:
+        # A write to the endpoint starts a new generation, so GETs issued
+        # after it never join a request that started before it.
+        if isinstance(params, dict):
+            params = tuple(sorted((str(k), str(v)) for k, v in params.items()))
+        generation = self.controller.policy.generation(path, self.cache_namespace)
+        return (path, str(params), response_model, generation)
 
+    @staticmethod
+    def _span(labels: dict[str, str]):
+        return span(
+            f"trading212 {labels['method']} {labels['endpoint']}",
+            **{
+                "http.request.method": labels["method"],
+                "trading212.endpoint": labels["endpoint"],
+            },
+        )
+
+    @staticmethod
+    def _annotate_span(current: Any, response: httpx.Response, cache: str) -> None:
+        current.set_attributes(
+            {
+                "trading212.cache": cache,
+                "http.response.status_code": response.status_code,
+                "http.response.body.size": len(response.content),
+            }
+        )
+
+    def _record_cache_result(
+        self, method: str, path: str, response: httpx.Response
+    ) -> str:
+        if method.upper() != "GET" or self.controller.policy.ttl_for(path) <= 0:
+            return "bypass"
+        result = "hit" if response.extensions.get("from_cache") else "miss"
+        cache_requests.inc(endpoint=endpoint_labels(method, path)["endpoint"], result=result)
+        return result
+
+    def _invalidate_cache(self, method: str, path: str) -> None:
+        # Writes make cached orders, positions, pies or the account summary
+        # stale; see CACHE_INVALIDATIONS. Failed and timed-out writes also
+        # invalidate, since they may have reached the server.
+        if method.upper() != "GET":
+            self.controller.policy.invalidate(method, path, self.cache_namespace)
+
+    @staticmethod
+    def _parse_response(
+        method: str, response: httpx.Response, response_model: Any = None
+    ) -> Any:
         try:
             response.raise_for_status()
         except httpx.HTTPStatusError as exc:
@@ -78,12 +189,153 @@ class Trading212Client:
         if response.status_code == 204 or not response.content:
             return None
 
-        return response.json()
+        model = _model_name(response_model)
+        with validation_duration.time(model=model), span(
+            "validate",
+            **{"trading212.model": model, "http.response.body.size": len(response.content)},
+        ):
+            return parse_json(response.content, response_model)
+
+    @staticmethod
+    def _history_params(
+        cursor: Optional[int | str] = None,
+        limit: int = 20,
+        **filters: Any,
+    ) -> dict[str, Any]:
+        params = {"limit": min(50, max(1, limit))}
+        if cursor is not None:
+            params["cursor"] = cursor
+        params.update(
+            {name: value for name, value in filters.items() if value is not None}
+        )
+        return params
+
+    @staticmethod
+    def _is_before(item: Any, since: datetime | None) -> bool:
+        if since is None:
+            return False
+        item_date = history_item_date(item)
+        if item_date is None:
+            return False
+        return as_utc(item_date) < as_utc(since)
+
+
+class Trading212Client(BaseTrading212Client):
+    """Blocking client, kept for scripts and interactive use."""
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        api_secret: str | None = None,
+        environment: str | None = None,
+        version: str = "v0",
+        rate_limiter: RateLimiter | None = None,
+        base_url: str | None = None,
+    ):
+        super().__init__(
+            api_key=api_key,
+            api_secret=api_secret,
+            environment=environment,
+            version=version,
+            rate_limiter=rate_limiter,
+            base_url=base_url,
+        )
+        import hishel
+        from utils.hishel_config import storage
+
+        self._single_flight = SingleFlight()
+        self.client = hishel.CacheClient(
+            base_url=self.base_url,
+            storage=storage,
+            controller=self.controller,
+            headers=self.headers,
+            transport=RateLimitedTransport(
+                MetricsTransport(create_transport()), self.rate_limiter
+            ),
+            timeout=timeout,
+        )
+
+    def close(self) -> None:
+        self.client.close()
+
+    def warm_up(self) -> None:
+        """Open a pooled connection (TCP, TLS) ahead of the first API call."""
+        try:
+            self.client.head("/")
+        except httpx.HTTPError:
+            pass
+
+    def _make_request(
+        self, method: str, url: str, response_model: Any = None, **kwargs
+    ) -> Any:
+        path = self._normalise_path(url)
+        if method.upper() == "GET" and kwargs.keys() <= {"params"}:
+            # Concurrent identical GETs share one request and parsed result.
+            return self._single_flight.do(
+                self._flight_key(path, response_model, kwargs.get("params")),
+                lambda: self._send(method, path, response_model, **kwargs),
+            )
+        return self._send(method, path, response_model, **kwargs)
+
+    def _send(self, method: str, path: str, response_model: Any = None, **kwargs) -> Any:
+        labels = endpoint_labels(method, path)
+        with client_request_duration.time(
+            **labels, cache="bypass"
+        ) as observed, self._span(labels) as current:
+            try:
+                response = self.client.request(method, path, **kwargs)
+            finally:
+                self._invalidate_cache(method, path)
+            observed["cache"] = self._record_cache_result(method, path, response)
+            self._annotate_span(current, response, observed["cache"])
+            return self._parse_response(method, response, response_model)
+
+    def _paginate(
+        self,
+        path: str,
+        page_model: type[ApiModel],
+        params: dict[str, Any],
+        since: datetime | None = None,
+        max_items: int | None = None,
+    ) -> Iterator[Any]:
+        count = 0
+        for page in self._pages(path, page_model, params):
+            for item in page.items:
+                # History is returned newest first, so the first item older
+                # than ``since`` ends the walk.
+                if self._is_before(item, since) or (
+                    max_items is not None and count >= max_items
+                ):
+                    return
+                yield item
+                count += 1
+
+    def _pages(
+        self, path: str, page_model: type[ApiModel], params: dict[str, Any] | None
+    ) -> Iterator[Any]:
+        next_path = path
+        while next_path:
+            page = self._make_request(
+                "GET", next_path, params=params, response_model=page_model
+            )
+            yield page
+            # nextPagePath already carries the cursor, limit and filters.
+            next_path, params = page.nextPagePath, None
+
+    def iter_history_pages(
+        self, path: str, page_model: type[ApiModel], next_page: str | None = None
+    ) -> Iterator[Any]:
+        """Yield the pages of a history endpoint newest first, from the first
+        one or from the ``nextPagePath`` of a page fetched earlier."""
+        if next_page is not None:
+            return self._pages(next_page, page_model, None)
+        return self._pages(path, page_model, self._history_params(limit=50))
 
     def get_account_summary(self) -> AccountSummary:
         """Fetch the account summary."""
-        data = self._make_request("GET", "/equity/account/summary")
-        return AccountSummary.model_validate(data)
+        return self._make_request(
+            "GET", "/equity/account/summary", response_model=AccountSummary
+        )
 
     def get_account_cash(self) -> Cash:
         """Fetch account cash from the account summary endpoint."""
@@ -92,14 +344,16 @@ class Trading212Client:
 
     def get_account_positions(self) -> list[Position]:
         """Fetch all open positions."""
-        data = self._make_request("GET", "/equity/positions")
-        return [Position.model_validate(position) for position in data]
+        return self._make_request(
+            "GET", "/equity/positions", response_model=list[Position]
+        )
 
     def get_positions(self, ticker: str | None = None) -> list[Position]:
         """Fetch positions, optionally filtered by ticker."""
         params = {"ticker": ticker} if ticker else None
-        data = self._make_request("GET", "/equity/positions", params=params)
-        return [Position.model_validate(position) for position in data]
+        return self._make_request(
+            "GET", "/equity/positions", params=params, response_model=list[Position]
+        )
 
     def get_position_by_ticker(self, ticker: str) -> Position:
         """Fetch a single open position by ticker via the current filter API."""
@@ -123,53 +377,55 @@ class Trading212Client:
         limit: int = 20,
     ) -> PaginatedResponseHistoryDividendItem:
         """Fetch dividend history with optional pagination."""
-        params = {}
-        if cursor is not None:
-            params["cursor"] = cursor
-        if ticker is not None:
-            params["ticker"] = ticker
-        params["limit"] = min(50, max(1, limit))
-
-        data = self._make_request("GET", "/equity/history/dividends", params=params)
-        return PaginatedResponseHistoryDividendItem.model_validate(data)
+        params = self._history_params(cursor=cursor, limit=limit, ticker=ticker)
+        return self._make_request(
+            "GET",
+            "/equity/history/dividends",
+            params=params,
+            response_model=PaginatedResponseHistoryDividendItem,
+        )
 
     def get_orders(self) -> list[Order]:
         """Fetch current orders."""
-        data = self._make_request("GET", "/equity/orders")
-        return [Order.model_validate(order) for order in data]
+        return self._make_request("GET", "/equity/orders", response_model=list[Order])
 
     def get_order_by_id(self, order_id: int) -> Order:
         """Fetch a specific order by ID."""
-        data = self._make_request("GET", f"/equity/orders/{order_id}")
-        return Order.model_validate(data)
+        return self._make_request(
+            "GET", f"/equity/orders/{order_id}", response_model=Order
+        )
 
     def get_pies(self) -> list[AccountBucketResultResponse]:
         """Fetch all pies."""
-        data = self._make_request("GET", "/equity/pies")
-        return [AccountBucketResultResponse.model_validate(pie) for pie in data]
+        return self._make_request(
+            "GET", "/equity/pies", response_model=list[AccountBucketResultResponse]
+        )
 
     def get_pie_by_id(self, pie_id: int) -> AccountBucketInstrumentsDetailedResponse:
         """Fetch a specific pie by ID."""
-        data = self._make_request("GET", f"/equity/pies/{pie_id}")
-        return AccountBucketInstrumentsDetailedResponse.model_validate(data)
+        return self._make_request(
+            "GET",
+            f"/equity/pies/{pie_id}",
+            response_model=AccountBucketInstrumentsDetailedResponse,
+        )
 
     def create_pie(self, pie_data: PieRequest) -> AccountBucketInstrumentsDetailedResponse:
         """Create a new pie."""
-        data = self._make_request(
+        return self._make_request(
             "POST",
             "/equity/pies",
             json=pie_data.model_dump(mode="json", exclude_none=True),
+            response_model=AccountBucketInstrumentsDetailedResponse,
         )
-        return AccountBucketInstrumentsDetailedResponse.model_validate(data)
 
     def update_pie(self, pie_id: int, pie_data: PieRequest) -> AccountBucketInstrumentsDetailedResponse:
         """Update a specific pie by ID."""
-        data = self._make_request(
+        return self._make_request(
             "POST",
             f"/equity/pies/{pie_id}",
             json=pie_data.model_dump(mode="json", exclude_none=True),
+            response_model=AccountBucketInstrumentsDetailedResponse,
         )
-        return AccountBucketInstrumentsDetailedResponse.model_validate(data)
 
     def duplicate_pie(
         self,
@@ -177,12 +433,12 @@ class Trading212Client:
         duplicate_bucket_request: DuplicateBucketRequest,
     ) -> AccountBucketInstrumentsDetailedResponse:
         """Duplicate a pie."""
-        data = self._make_request(
+        return self._make_request(
             "POST",
             f"/equity/pies/{pie_id}/duplicate",
             json=duplicate_bucket_request.model_dump(mode="json", exclude_none=True),
+            response_model=AccountBucketInstrumentsDetailedResponse,
         )
-        return AccountBucketInstrumentsDetailedResponse.model_validate(data)
 
     def delete_pie(self, pie_id: int) -> None:
         """Delete a pie."""
@@ -195,14 +451,13 @@ class Trading212Client:
         limit: int = 20,
     ) -> PaginatedResponseHistoricalOrder:
         """Fetch historical order data with pagination."""
-        params = {"limit": min(50, max(1, limit))}
-        if cursor is not None:
-            params["cursor"] = cursor
-        if ticker is not None:
-            params["ticker"] = ticker
-
-        data = self._make_request("GET", "/equity/history/orders", params=params)
-        return PaginatedResponseHistoricalOrder.model_validate(data)
+        params = self._history_params(cursor=cursor, limit=limit, ticker=ticker)
+        return self._make_request(
+            "GET",
+            "/equity/history/orders",
+            params=params,
+            response_model=PaginatedResponseHistoricalOrder,
+        )
 
     def get_history_transactions(
         self,
@@ -211,60 +466,117 @@ class Trading212Client:
         limit: int = 20,
     ) -> PaginatedResponseHistoryTransactionItem:
         """Fetch movements to and from the account."""
-        params = {"limit": min(50, max(1, limit))}
-        if cursor is not None:
-            params["cursor"] = cursor
-        if time_from is not None:
-            params["time"] = time_from
+        params = self._history_params(cursor=cursor, limit=limit, time=time_from)
+        return self._make_request(
+            "GET",
+            "/equity/history/transactions",
+            params=params,
+            response_model=PaginatedResponseHistoryTransactionItem,
+        )
 
-        data = self._make_request("GET", "/equity/history/transactions", params=params)
-        return PaginatedResponseHistoryTransactionItem.model_validate(data)
+    def iter_historical_orders(
+        self,
+        ticker: Optional[str] = None,
+        since: datetime | None = None,
+        max_items: int | None = None,
+    ) -> Iterator[HistoricalOrder]:
+        """Yield historical orders newest first, following every page."""
+        return self._paginate(
+            "/equity/history/orders",
+            PaginatedResponseHistoricalOrder,
+            self._history_params(limit=50, ticker=ticker),
+            since=since,
+            max_items=max_items,
+        )
+
+    def iter_dividends(
+        self,
+        ticker: Optional[str] = None,
+        since: datetime | None = None,
+        max_items: int | None = None,
+    ) -> Iterator[HistoryDividendItem]:
+        """Yield paid out dividends newest first, following every page."""
+        return self._paginate(
+            "/equity/history/dividends",
+            PaginatedResponseHistoryDividendItem,
+            self._history_params(limit=50, ticker=ticker),
+            since=since,
+            max_items=max_items,
+        )
+
+    def iter_history_transactions(
+        self,
+        since: datetime | None = None,
+        max_items: int | None = None,
+    ) -> Iterator[HistoryTransactionItem]:
+        """Yield account movements newest first, following every page."""
+        return self._paginate(
+            "/equity/history/transactions",
+            PaginatedResponseHistoryTransactionItem,
+            self._history_params(limit=50),
+            since=since,
+            max_items=max_items,
+        )
 
     def get_instruments(self) -> list[TradeableInstrument]:
         """Fetch all tradeable instruments."""
-        data = self._make_request("GET", "/equity/metadata/instruments")
-        return [TradeableInstrument.model_validate(instrument) for instrument in data]
+        return self._make_request(
+            "GET",
+            "/equity/metadata/instruments",
+            response_model=list[TradeableInstrument],
+        )
 
     def get_exchanges(self) -> list[Exchange]:
         """Fetch all exchanges and their working schedules."""
+        return self._make_request(
+            "GET", "/equity/metadata/exchanges", response_model=list[Exchange]
+        )
+
+    def get_instruments_table(self) -> InstrumentTable:
+        """Fetch all tradeable instruments into a compact, unvalidated table."""
+        data = self._make_request("GET", "/equity/metadata/instruments")
+        return InstrumentTable.from_raw(data)
+
+    def get_exchanges_table(self) -> ExchangeTable:
+        """Fetch all exchanges into a compact, unvalidated table."""
         data = self._make_request("GET", "/equity/metadata/exchanges")
-        return [Exchange.model_validate(exchange) for exchange in data]
+        return ExchangeTable.from_raw(data)
 
     def place_market_order(self, order_data: MarketRequest) -> Order:
         """Place a market order."""
-        data = self._make_request(
+        return self._make_request(
             "POST",
             "/equity/orders/market",
             json=order_data.model_dump(mode="json", exclude_none=True),
+            response_model=Order,
         )
-        return Order.model_validate(data)
 
     def place_limit_order(self, order_data: LimitRequest) -> Order:
         """Place a limit order."""
-        data = self._make_request(
+        return self._make_request(
             "POST",
             "/equity/orders/limit",
             json=order_data.model_dump(mode="json", exclude_none=True),
+            response_model=Order,
         )
-        return Order.model_validate(data)
 
     def place_stop_order(self, order_data: StopRequest) -> Order:
         """Place a stop order."""
-        data = self._make_request(
+        return self._make_request(
             "POST",
             "/equity/orders/stop",
             json=order_data.model_dump(mode="json", exclude_none=True),
+            response_model=Order,
         )
-        return Order.model_validate(data)
 
     def place_stop_limit_order(self, order_data: StopLimitRequest) -> Order:
         """Place a stop-limit order."""
-        data = self._make_request(
+        return self._make_request(
             "POST",
             "/equity/orders/stop_limit",
             json=order_data.model_dump(mode="json", exclude_none=True),
+            response_model=Order,
         )
-        return Order.model_validate(data)
 
     def cancel_order(self, order_id: int) -> None:
         """Cancel an existing order."""
@@ -272,8 +584,9 @@ class Trading212Client:
 
     def get_reports(self) -> list[ReportResponse]:
         """Get account export reports."""
-        data = self._make_request("GET", "/equity/history/exports")
-        return [ReportResponse.model_validate(report) for report in data]
+        return self._make_request(
+            "GET", "/equity/history/exports", response_model=list[ReportResponse]
+        )
 
     def request_export(
         self,
@@ -291,5 +604,441 @@ class Trading212Client:
         if time_to:
             payload["timeTo"] = time_to
 
-        data = self._make_request("POST", "/equity/history/exports", json=payload)
-        return EnqueuedReportResponse.model_validate(data)
+        return self._make_request(
+            "POST",
+            "/equity/history/exports",
+            json=payload,
+            response_model=EnqueuedReportResponse,
+        )
+
+
+class AsyncTrading212Client(BaseTrading212Client):
+    """Non-blocking client used by the MCP server so that tool calls can run
+    concurrently on one event loop."""
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        api_secret: str | None = None,
+        environment: str | None = None,
+        version: str = "v0",
+        rate_limiter: RateLimiter | None = None,
+        base_url: str | None = None,
+    ):
+        super().__init__(
+            api_key=api_key,
+            api_secret=api_secret,
+            environment=environment,
+            version=version,
+            rate_limiter=rate_limiter,
+            base_url=base_url,
+        )
+        import hishel
+        from utils.hishel_config import async_storage
+
+        self._single_flight = AsyncSingleFlight()
+        self.client = hishel.AsyncCacheClient(
+            base_url=self.base_url,
+            storage=async_storage,
+            controller=self.controller,
+            headers=self.headers,
+            transport=AsyncRateLimitedTransport(
+                AsyncMetricsTransport(create_async_transport()), self.rate_limiter
+            ),
+            timeout=timeout,
+        )
+        self._warm_up_task: asyncio.Task | None = None
+        self.refresher = Refresher(self) if REFRESH_ENDPOINTS else None
+
+    async def aclose(self) -> None:
+        if self.refresher is not None:
+            await self.refresher.aclose()
+        await self.client.aclose()
+
+    async def warm_up(self, connections: int = HTTP_WARMUP_CONNECTIONS) -> None:
+        """Open ``connections`` pooled connections ahead of the first API call.
+
+        The requests are unauthenticated HEADs outside every rate limit, and
+        their responses are irrelevant; failures are left to the first real
+        request to report.
+        """
+        results = await asyncio.gather(
+            *(self.client.head("/") for _ in range(connections)),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(
+                result, httpx.HTTPError
+            ):
+                raise result
+
+    def start_warm_up(self) -> None:
+        """Run warm_up() in the background, once per client."""
+        if self._warm_up_task is None and HTTP_WARMUP_CONNECTIONS > 0:
+            self._warm_up_task = asyncio.create_task(self.warm_up())
+
+    def start_refresh(self) -> None:
+        """Start refreshing REFRESH_ENDPOINTS in the background, if set."""
+        if self.refresher is not None:
+            self.refresher.start()
+
+    async def _make_request(
+        self, method: str, url: str, response_model: Any = None, **kwargs
+    ) -> Any:
+        path = self._normalise_path(url)
+        if method.upper() == "GET" and kwargs.keys() <= {"params"}:
+            params = kwargs.get("params")
+            if (
+                not params
+                and self.refresher is not None
+                and self.refresher.handles(path, response_model)
+            ):
+                return await self.refresher.get(path)
+            return await self._fetch(path, response_model, params)
+        return await self._send(method, path, response_model, **kwargs)
+
+    async def _fetch(self, path: str, response_model: Any = None, params: Any = None) -> Any:
+        # Concurrent identical GETs share one request and parsed result.
+        kwargs = {} if params is None else {"params": params}
+        return await self._single_flight.do(
+            self._flight_key(path, response_model, params),
+            lambda: self._send("GET", path, response_model, **kwargs),
+        )
+
+    async def _send(
+        self, method: str, path: str, response_model: Any = None, **kwargs
+    ) -> Any:
+        labels = endpoint_labels(method, path)
+        with client_request_duration.time(
+            **labels, cache="bypass"
+        ) as observed, self._span(labels) as current:
+            try:
+                response = await self.client.request(method, path, **kwargs)
+            finally:
+                self._invalidate_cache(method, path)
+            observed["cache"] = self._record_cache_result(method, path, response)
+            self._annotate_span(current, response, observed["cache"])
+            return self._parse_response(method, response, response_model)
+
+    async def _paginate(
+        self,
+        path: str,
+        page_model: type[ApiModel],
+        params: dict[str, Any],
+        since: datetime | None = None,
+        max_items: int | None = None,
+    ) -> AsyncIterator[Any]:
+        count = 0
+        async for page in self._pages(path, page_model, params):
+            for item in page.items:
+                # History is returned newest first, so the first item older
+                # than ``since`` ends the walk.
+                if self._is_before(item, since) or (
+                    max_items is not None and count >= max_items
+                ):
+                    return
+                yield item
+                count += 1
+
+    async def _pages(
+        self, path: str, page_model: type[ApiModel], params: dict[str, Any] | None
+    ) -> AsyncIterator[Any]:
+        next_path = path
+        while next_path:
+            page = await self._make_request(
+                "GET", next_path, params=params, response_model=page_model
+            )
+            yield page
+            # nextPagePath already carries the cursor, limit and filters.
+            next_path, params = page.nextPagePath, None
+
+    def iter_history_pages(
+        self, path: str, page_model: type[ApiModel], next_page: str | None = None
+    ) -> AsyncIterator[Any]:
+        """Yield the pages of a history endpoint newest first, from the first
+        one or from the ``nextPagePath`` of a page fetched earlier."""
+        if next_page is not None:
+            return self._pages(next_page, page_model, None)
+        return self._pages(path, page_model, self._history_params(limit=50))
+
+    async def get_account_summary(self) -> AccountSummary:
+        """Fetch the account summary."""
+        return await self._make_request(
+            "GET", "/equity/account/summary", response_model=AccountSummary
+        )
+
+    async def get_account_cash(self) -> Cash:
+        """Fetch account cash from the account summary endpoint."""
+        account_summary = await self.get_account_summary()
+        return Cash.model_validate(account_summary.cash.model_dump() if account_summary.cash else {})
+
+    async def get_account_positions(self) -> list[Position]:
+        """Fetch all open positions."""
+        return await self._make_request(
+            "GET", "/equity/positions", response_model=list[Position]
+        )
+
+    async def get_positions(self, ticker: str | None = None) -> list[Position]:
+        """Fetch positions, optionally filtered by ticker."""
+        params = {"ticker": ticker} if ticker else None
+        return await self._make_request(
+            "GET", "/equity/positions", params=params, response_model=list[Position]
+        )
+
+    async def get_position_by_ticker(self, ticker: str) -> Position:
+        """Fetch a single open position by ticker via the current filter API."""
+        positions = await self.get_positions(ticker=ticker)
+        if not positions:
+            raise RuntimeError(f"No open position found for ticker '{ticker}'")
+        return positions[0]
+
+    async def get_account_position_by_ticker(self, ticker: str) -> Position:
+        """Deprecated alias for fetching a single position by ticker."""
+        return await self.get_position_by_ticker(ticker)
+
+    async def search_position_by_ticker(self, ticker: str) -> Position:
+        """Deprecated alias for fetching a single position by ticker."""
+        return await self.get_position_by_ticker(ticker)
+
+    async def get_dividends(
+        self,
+        cursor: Optional[int] = None,
+        ticker: Optional[str] = None,
+        limit: int = 20,
+    ) -> PaginatedResponseHistoryDividendItem:
+        """Fetch dividend history with optional pagination."""
+        params = self._history_params(cursor=cursor, limit=limit, ticker=ticker)
+        return await self._make_request(
+            "GET",
+            "/equity/history/dividends",
+            params=params,
+            response_model=PaginatedResponseHistoryDividendItem,
+        )
+
+    async def get_orders(self) -> list[Order]:
+        """Fetch current orders."""
+        return await self._make_request(
+            "GET", "/equity/orders", response_model=list[Order]
+        )
+
+    async def get_order_by_id(self, order_id: int) -> Order:
+        """Fetch a specific order by ID."""
+        return await self._make_request(
+            "GET", f"/equity/orders/{order_id}", response_model=Order
+        )
+
+    async def get_pies(self) -> list[AccountBucketResultResponse]:
+        """Fetch all pies."""
+        return await self._make_request(
+            "GET", "/equity/pies", response_model=list[AccountBucketResultResponse]
+        )
+
+    async def get_pie_by_id(self, pie_id: int) -> AccountBucketInstrumentsDetailedResponse:
+        """Fetch a specific pie by ID."""
+        return await self._make_request(
+            "GET",
+            f"/equity/pies/{pie_id}",
+            response_model=AccountBucketInstrumentsDetailedResponse,
+        )
+
+    async def create_pie(self, pie_data: PieRequest) -> AccountBucketInstrumentsDetailedResponse:
+        """Create a new pie."""
+        return await self._make_request(
+            "POST",
+            "/equity/pies",
+            json=pie_data.model_dump(mode="json", exclude_none=True),
+            response_model=AccountBucketInstrumentsDetailedResponse,
+        )
+
+    async def update_pie(self, pie_id: int, pie_data: PieRequest) -> AccountBucketInstrumentsDetailedResponse:
+        """Update a specific pie by ID."""
+        return await self._make_request(
+            "POST",
+            f"/equity/pies/{pie_id}",
+            json=pie_data.model_dump(mode="json", exclude_none=True),
+            response_model=AccountBucketInstrumentsDetailedResponse,
+        )
+
+    async def duplicate_pie(
+        self,
+        pie_id: int,
+        duplicate_bucket_request: DuplicateBucketRequest,
+    ) -> AccountBucketInstrumentsDetailedResponse:
+        """Duplicate a pie."""
+        return await self._make_request(
+            "POST",
+            f"/equity/pies/{pie_id}/duplicate",
+            json=duplicate_bucket_request.model_dump(mode="json", exclude_none=True),
+            response_model=AccountBucketInstrumentsDetailedResponse,
+        )
+
+    async def delete_pie(self, pie_id: int) -> None:
+        """Delete a pie."""
+        await self._make_request("DELETE", f"/equity/pies/{pie_id}")
+
+    async def get_historical_order_data(
+        self,
+        cursor: Optional[int] = None,
+        ticker: Optional[str] = None,
+        limit: int = 20,
+    ) -> PaginatedResponseHistoricalOrder:
+        """Fetch historical order data with pagination."""
+        params = self._history_params(cursor=cursor, limit=limit, ticker=ticker)
+        return await self._make_request(
+            "GET",
+            "/equity/history/orders",
+            params=params,
+            response_model=PaginatedResponseHistoricalOrder,
+        )
+
+    async def get_history_transactions(
+        self,
+        cursor: Optional[str] = None,
+        time_from: Optional[str] = None,
+        limit: int = 20,
+    ) -> PaginatedResponseHistoryTransactionItem:
+        """Fetch movements to and from the account."""
+        params = self._history_params(cursor=cursor, limit=limit, time=time_from)
+        return await self._make_request(
+            "GET",
+            "/equity/history/transactions",
+            params=params,
+            response_model=PaginatedResponseHistoryTransactionItem,
+        )
+
+    def iter_historical_orders(
+        self,
+        ticker: Optional[str] = None,
+        since: datetime | None = None,
+        max_items: int | None = None,
+    ) -> AsyncIterator[HistoricalOrder]:
+        """Yield historical orders newest first, following every page."""
+        return self._paginate(
+            "/equity/history/orders",
+            PaginatedResponseHistoricalOrder,
+            self._history_params(limit=50, ticker=ticker),
+            since=since,
+            max_items=max_items,
+        )
+
+    def iter_dividends(
+        self,
+        ticker: Optional[str] = None,
+        since: datetime | None = None,
+        max_items: int | None = None,
+    ) -> AsyncIterator[HistoryDividendItem]:
+        """Yield paid out dividends newest first, following every page."""
+        return self._paginate(
+            "/equity/history/dividends",
+            PaginatedResponseHistoryDividendItem,
+            self._history_params(limit=50, ticker=ticker),
+            since=since,
+            max_items=max_items,
+        )
+
+    def iter_history_transactions(
+        self,
+        since: datetime | None = None,
+        max_items: int | None = None,
+    ) -> AsyncIterator[HistoryTransactionItem]:
+        """Yield account movements newest first, following every page."""
+        return self._paginate(
+            "/equity/history/transactions",
+            PaginatedResponseHistoryTransactionItem,
+            self._history_params(limit=50),
+            since=since,
+            max_items=max_items,
+        )
+
+    async def get_instruments(self) -> list[TradeableInstrument]:
+        """Fetch all tradeable instruments."""
+        return await self._make_request(
+            "GET",
+            "/equity/metadata/instruments",
+            response_model=list[TradeableInstrument],
+        )
+
+    async def get_exchanges(self) -> list[Exchange]:
+        """Fetch all exchanges and their working schedules."""
+        return await self._make_request(
+            "GET", "/equity/metadata/exchanges", response_model=list[Exchange]
+        )
+
+    async def get_instruments_table(self) -> InstrumentTable:
+        """Fetch all tradeable instruments into a compact, unvalidated table."""
+        data = await self._make_request("GET", "/equity/metadata/instruments")
+        return InstrumentTable.from_raw(data)
+
+    async def get_exchanges_table(self) -> ExchangeTable:
+        """Fetch all exchanges into a compact, unvalidated table."""
+        data = await self._make_request("GET", "/equity/metadata/exchanges")
+        return ExchangeTable.from_raw(data)
+
+    async def place_market_order(self, order_data: MarketRequest) -> Order:
+        """Place a market order."""
+        return await self._make_request(
+            "POST",
+            "/equity/orders/market",
+            json=order_data.model_dump(mode="json", exclude_none=True),
+            response_model=Order,
+        )
+
+    async def place_limit_order(self, order_data: LimitRequest) -> Order:
+        """Place a limit order."""
+        return await self._make_request(
+            "POST",
+            "/equity/orders/limit",
+            json=order_data.model_dump(mode="json", exclude_none=True),
+            response_model=Order,
+        )
+
+    async def place_stop_order(self, order_data: StopRequest) -> Order:
+        """Place a stop order."""
+        return await self._make_request(
+            "POST",
+            "/equity/orders/stop",
+            json=order_data.model_dump(mode="json", exclude_none=True),
+            response_model=Order,
+        )
+
+    async def place_stop_limit_order(self, order_data: StopLimitRequest) -> Order:
+        """Place a stop-limit order."""
+        return await self._make_request(
+            "POST",
+            "/equity/orders/stop_limit",
+            json=order_data.model_dump(mode="json", exclude_none=True),
+            response_model=Order,
+        )
+
+    async def cancel_order(self, order_id: int) -> None:
+        """Cancel an existing order."""
+        await self._make_request("DELETE", f"/equity/orders/{order_id}")
+
+    async def get_reports(self) -> list[ReportResponse]:
+        """Get account export reports."""
+        return await self._make_request(
+            "GET", "/equity/history/exports", response_model=list[ReportResponse]
+        )
+
+    async def request_export(
+        self,
+        data_included: ReportDataIncluded | None = None,
+        time_from: str | None = None,
+        time_to: str | None = None,
+    ) -> EnqueuedReportResponse:
+        """Request a CSV export of the account history."""
+        data_included = data_included or ReportDataIncluded()
+        payload: dict[str, Any] = {
+            "dataIncluded": data_included.model_dump(mode="json", exclude_none=True),
+        }
+        if time_from:
+            payload["timeFrom"] = time_from
+        if time_to:
+            payload["timeTo"] = time_to
+
+        return await self._make_request(
+            "POST",
+            "/equity/history/exports",
+            json=payload,
+            response_model=EnqueuedReportResponse,
+        )
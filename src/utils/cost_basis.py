@@ -0,0 +1,283 @@
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+
+from config import TAX_YEAR_START
+from models import (
+    CostBasisMethodEnum,
+    HistoricalOrder,
+    OrderSideEnum,
+    RealisedGains,
+    TaxYearGains,
+    TickerCostBasis,
+)
+from utils.history_store import HistoryStore
+from utils.portfolio_analytics import MINOR_CURRENCIES, _money
+
+# Quantities below this are rounding noise from fractional shares.
+_EPSILON = 1e-9
+
+
+def parse_tax_year_start(value: str) -> tuple[int, int]:
+    """Parse an MM-DD tax year start such as ``04-06``."""
+    try:
+        month, day = (int(part) for part in value.split("-"))
+        datetime(2000, month, day)
+    except ValueError:
+        raise ValueError(
+            f"Invalid tax year start {value!r}; expected MM-DD, e.g. 04-06"
+        ) from None
+    return month, day
+
+
+def tax_year(date: datetime, start: tuple[int, int]) -> str:
+    """Label of the tax year ``date`` falls in: ``2024``, or ``2024/25`` when
+    the tax year does not start on 1 January."""
+    year = date.year if (date.month, date.day) >= start else date.year - 1
+    return str(year) if start == (1, 1) else f"{year}/{(year + 1) % 100:02d}"
+
+
+@dataclass
+class Disposal:
+    filled_at: datetime
+    quantity: float
+    proceeds: float
+    fifo_cost: float
+    average_cost: float
+    fifo_fx_impact: float
+    average_fx_impact: float
+
+    def cost(self, method: CostBasisMethodEnum) -> float:
+        return self.fifo_cost if method == CostBasisMethodEnum.FIFO else self.average_cost
+
+    def fx_impact(self, method: CostBasisMethodEnum) -> float:
+        if method == CostBasisMethodEnum.FIFO:
+            return self.fifo_fx_impact
+        return self.average_fx_impact
+
+
+class TickerLedger:
+    """Lots and disposals of one ticker, replayed from its fills in order.
+
+    Both methods are tracked at once: FIFO keeps every purchase as a lot
+    and sells from the oldest, AVERAGE pools all shares at one average
+    cost. Costs and proceeds are the fills' wallet net values in the
+    account currency. The same amounts in the instrument currency (price x
+    quantity, GBX in GBP) split each gain into its price and FX parts:
+    the FX impact is the gain minus the instrument-currency gain converted
+    at the fill's rate. Corporate actions (splits, stock dividends) are
+    applied like trades at their wallet value.
+    """
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self.fills = 0
+        self.fees = 0.0
+        self.reported: float | None = None
+        self.unmatched = 0.0
+        self.disposals: list[Disposal] = []
+        # FIFO lots of [quantity, cost, cost in the instrument currency]
+        self.lots: deque[list[float]] = deque()
+        self.quantity = 0.0
+        self.cost = 0.0
+        self.native_cost = 0.0
+
+    def apply(self, item: HistoricalOrder) -> None:
+        fill, order = item.fill, item.order
+        if fill is None or not fill.quantity:
+            return
+        wallet = fill.walletImpact
+        rate = wallet.fxRate if wallet else None
+        quantity = abs(fill.quantity)
+
+        currency = (order.instrument.currency if order and order.instrument else None) or ""
+        minor = MINOR_CURRENCIES.get(currency.upper())
+        native = (
+            abs(fill.price) * quantity / (minor[1] if minor else 1.0)
+            if fill.price is not None
+            else math.nan
+        )
+        if wallet and wallet.netValue is not None:
+            value = abs(wallet.netValue)
+        else:
+            value = 0.0 if math.isnan(native) else native * (rate or 1.0)
+
+        self.fills += 1
+        if wallet:
+            self.fees += sum(tax.quantity or 0.0 for tax in wallet.taxes or [])
+            if wallet.realisedProfitLoss is not None:
+                self.reported = (self.reported or 0.0) + wallet.realisedProfitLoss
+
+        side = order.side if order else None
+        if side == OrderSideEnum.SELL or (side is None and fill.quantity < 0):
+            self._dispose(fill.filledAt, quantity, value, native, rate)
+        else:
+            self.lots.append([quantity, value, native])
+            self.quantity += quantity
+            self.cost += value
+            self.native_cost += native
+
+    def _dispose(
+        self,
+        filled_at: datetime,
+        quantity: float,
+        value: float,
+        native: float,
+        rate: float | None,
+    ) -> None:
+        matched = min(quantity, self.quantity)
+        self.unmatched += quantity - matched
+        if matched <= _EPSILON:
+            return
+        proceeds = value * matched / quantity
+        native_proceeds = native * matched / quantity
+
+        fifo_cost = fifo_native = 0.0
+        remaining = matched
+        while remaining > _EPSILON and self.lots:
+            lot = self.lots[0]
+            taken = min(remaining, lot[0])
+            share = taken / lot[0]
+            fifo_cost += lot[1] * share
+            fifo_native += lot[2] * share
+            lot[0] -= taken
+            lot[1] -= lot[1] * share
+            lot[2] -= lot[2] * share
+            remaining -= taken
+            if lot[0] <= _EPSILON:
+                self.lots.popleft()
+
+        share = matched / self.quantity
+        average_cost = self.cost * share
+        average_native = self.native_cost * share
+        self.quantity -= matched
+        self.cost -= average_cost
+        self.native_cost -= average_native
+        if self.quantity <= _EPSILON:
+            self.quantity = self.cost = self.native_cost = 0.0
+            self.lots.clear()
+
+        def fx_impact(cost: float, native_cost: float) -> float:
+            native_gain = native_proceeds - native_cost
+            if not rate or math.isnan(native_gain):
+                return 0.0
+            return (proceeds - cost) - native_gain * rate
+
+        self.disposals.append(
+            Disposal(
+                filled_at=filled_at,
+                quantity=matched,
+                proceeds=proceeds,
+                fifo_cost=fifo_cost,
+                average_cost=average_cost,
+                fifo_fx_impact=fx_impact(fifo_cost, fifo_native),
+                average_fx_impact=fx_impact(average_cost, average_native),
+            )
+        )
+
+    def remaining_cost(self, method: CostBasisMethodEnum) -> float:
+        if method == CostBasisMethodEnum.FIFO:
+            return sum(lot[1] for lot in self.lots)
+        return self.cost
+
+
+def _tax_years(
+    disposals: list[Disposal], method: CostBasisMethodEnum, start: tuple[int, int]
+) -> list[TaxYearGains]:
+    years: dict[str, list[float]] = {}
+    for disposal in disposals:
+        if disposal.filled_at is None:
+            continue
+        totals = years.setdefault(tax_year(disposal.filled_at, start), [0, 0.0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += disposal.proceeds
+        totals[2] += disposal.cost(method)
+        totals[3] += disposal.fx_impact(method)
+    return [
+        TaxYearGains(
+            taxYear=year,
+            disposals=int(count),
+            proceeds=_money(proceeds),
+            costBasis=_money(cost),
+            realisedProfitLoss=_money(proceeds - cost),
+            fxImpact=_money(fx_impact),
+        )
+        for year, (count, proceeds, cost, fx_impact) in sorted(years.items())
+    ]
+
+
+class CostBasisLedger:
+    """Realised gains and cost basis for every ticker in the order history.
+
+    Reads the fills from the HistoryStore rather than the API. After each
+    history sync only the tickers the sync touched are replayed, so keeping
+    it current costs a few fills, not years of them.
+    """
+
+    def __init__(self):
+        self._tickers: dict[str, TickerLedger] = {}
+        self._change = 0
+        self._lock = threading.Lock()
+
+    def update(self, store: HistoryStore) -> set[str]:
+        """Replay the tickers with new fills; returns their names."""
+        with self._lock:
+            change, tickers = store.changes("orders", after=self._change)
+            for ticker in tickers:
+                ledger = TickerLedger(ticker)
+                # The store returns the newest first.
+                for item in reversed(store.query("orders", ticker=ticker)):
+                    ledger.apply(item)
+                self._tickers[ticker] = ledger
+            self._change = change
+            return tickers
+
+    def report(
+        self,
+        method: CostBasisMethodEnum = CostBasisMethodEnum.FIFO,
+        ticker: str | None = None,
+        tax_year_start: str | None = None,
+    ) -> RealisedGains:
+        tax_year_start = tax_year_start or TAX_YEAR_START
+        start = parse_tax_year_start(tax_year_start)
+        with self._lock:
+            ledgers = [
+                ledger
+                for name, ledger in sorted(self._tickers.items())
+                if ledger.fills and (ticker is None or name.upper() == ticker.upper())
+            ]
+
+        tickers = []
+        for ledger in ledgers:
+            cost = ledger.remaining_cost(method)
+            realised = sum(d.proceeds - d.cost(method) for d in ledger.disposals)
+            tickers.append(
+                TickerCostBasis(
+                    ticker=ledger.ticker,
+                    quantity=round(ledger.quantity, 8),
+                    costBasis=_money(cost),
+                    averageCost=round(cost / ledger.quantity, 6) if ledger.quantity else None,
+                    realisedProfitLoss=_money(realised),
+                    fxImpact=_money(sum(d.fx_impact(method) for d in ledger.disposals)),
+                    fees=_money(ledger.fees),
+                    reportedRealisedProfitLoss=(
+                        None if ledger.reported is None else _money(ledger.reported)
+                    ),
+                    unmatchedQuantity=round(ledger.unmatched, 8),
+                )
+            )
+
+        return RealisedGains(
+            method=method,
+            taxYearStart=tax_year_start,
+            fills=sum(ledger.fills for ledger in ledgers),
+            realisedProfitLoss=_money(sum(t.realisedProfitLoss for t in tickers)),
+            fxImpact=_money(sum(t.fxImpact for t in tickers)),
+            fees=_money(sum(t.fees for t in tickers)),
+            taxYears=_tax_years(
+                [d for ledger in ledgers for d in ledger.disposals], method, start
+            ),
+            tickers=tickers,
+        )
@@ -0,0 +1,171 @@
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from models import (
+    AccountBucketResultResponse,
+    DividendBucket,
+    DividendSummary,
+    DividendYield,
+    HistoryDividendItem,
+    Position,
+)
+from utils.history_store import HistoryStore
+from utils.portfolio_analytics import MINOR_CURRENCIES, UNKNOWN, _money
+
+
+class TickerDividends:
+    """Dividends of one ticker with their totals by month, year and currency."""
+
+    def __init__(self, ticker: str, items: list[HistoryDividendItem]):
+        self.ticker = ticker
+        self.currency: str | None = None
+        # (paid on, amount), oldest first
+        self.payments: list[tuple[datetime, float]] = []
+        self.amounts: Counter[tuple[str, str]] = Counter()
+        self.counts: Counter[tuple[str, str]] = Counter()
+
+        for item in sorted(
+            (item for item in items if item.paidOn and item.amount is not None),
+            key=lambda item: item.paidOn,
+        ):
+            self.currency = self.currency or item.currency
+            self.payments.append((item.paidOn, item.amount))
+            for bucket in (
+                ("month", item.paidOn.strftime("%Y-%m")),
+                ("year", str(item.paidOn.year)),
+                ("currency", (item.tickerCurrency or item.currency or UNKNOWN).upper()),
+            ):
+                self.amounts[bucket] += item.amount
+                self.counts[bucket] += 1
+
+    @property
+    def total(self) -> float:
+        return sum(amount for _, amount in self.payments)
+
+    def since(self, start: datetime) -> float:
+        return sum(amount for paid_on, amount in self.payments if paid_on >= start)
+
+
+def _buckets(amounts: Counter, counts: Counter, kind: str) -> list[DividendBucket]:
+    return [
+        DividendBucket(key=key, payments=counts[(kind, key)], amount=_money(amount))
+        for (bucket_kind, key), amount in sorted(amounts.items())
+        if bucket_kind == kind
+    ]
+
+
+def _position_cost(position: Position) -> float:
+    wallet = position.walletImpact
+    if wallet and wallet.totalCost is not None:
+        return wallet.totalCost
+    if position.quantity is None or position.averagePricePaid is None:
+        return 0.0
+    currency = (position.instrument.currency if position.instrument else None) or ""
+    minor = MINOR_CURRENCIES.get(currency.upper())
+    return position.quantity * position.averagePricePaid / (minor[1] if minor else 1.0)
+
+
+class DividendLedger:
+    """Dividend totals per ticker, memoised between calls.
+
+    Reads the dividends from the HistoryStore and, after each sync, only
+    re-aggregates the tickers the sync touched, so repeat summaries never
+    walk the history again.
+    """
+
+    def __init__(self):
+        self._tickers: dict[str, TickerDividends] = {}
+        self._change = 0
+        self._lock = threading.Lock()
+
+    def update(self, store: HistoryStore) -> set[str]:
+        """Re-aggregate the tickers with new dividends; returns their names."""
+        with self._lock:
+            change, tickers = store.changes("dividends", after=self._change)
+            for ticker in tickers:
+                self._tickers[ticker] = TickerDividends(
+                    ticker, store.query("dividends", ticker=ticker)
+                )
+            self._change = change
+            return tickers
+
+    def summary(
+        self,
+        positions: list[Position] | None = None,
+        pies: list[AccountBucketResultResponse] | None = None,
+        ticker: str | None = None,
+        months: int = 24,
+        top: int = 20,
+        now: datetime | None = None,
+    ) -> DividendSummary:
+        now = now or datetime.now(timezone.utc)
+        trailing_start = now - timedelta(days=365)
+        with self._lock:
+            ledgers = [
+                ledger
+                for name, ledger in sorted(self._tickers.items())
+                if ticker is None or name.upper() == ticker.upper()
+            ]
+
+        amounts: Counter[tuple[str, str]] = Counter()
+        counts: Counter[tuple[str, str]] = Counter()
+        for ledger in ledgers:
+            amounts.update(ledger.amounts)
+            counts.update(ledger.counts)
+        by_ticker = sorted(ledgers, key=lambda ledger: ledger.total, reverse=True)
+        trailing = {ledger.ticker: ledger.since(trailing_start) for ledger in ledgers}
+
+        yields = []
+        for position in positions or []:
+            held = position.instrument.ticker if position.instrument else None
+            if not held or held not in trailing:
+                continue
+            cost = _position_cost(position)
+            yields.append(
+                DividendYield(
+                    ticker=held,
+                    trailing12Months=_money(trailing[held]),
+                    costBasis=_money(cost),
+                    yieldOnCost=round(trailing[held] / cost, 4) if cost else None,
+                )
+            )
+        yields.sort(key=lambda item: item.trailing12Months, reverse=True)
+        held_cost = sum(item.costBasis for item in yields)
+        held_trailing = sum(item.trailing12Months for item in yields)
+
+        total = sum(ledger.total for ledger in ledgers)
+        # Pie dividend details are not broken down by ticker.
+        reinvested = None
+        if pies is not None and ticker is None:
+            reinvested = sum(
+                pie.dividendDetails.reinvested or 0.0
+                for pie in pies
+                if pie.dividendDetails
+            )
+
+        return DividendSummary(
+            currency=next((ledger.currency for ledger in ledgers if ledger.currency), None),
+            payments=sum(len(ledger.payments) for ledger in ledgers),
+            total=_money(total),
+            trailing12Months=_money(sum(trailing.values())),
+            yieldOnCost=round(held_trailing / held_cost, 4) if held_cost else None,
+            reinvested=None if reinvested is None else _money(reinvested),
+            paidOut=None if reinvested is None else _money(total - reinvested),
+            byYear=_buckets(amounts, counts, "year"),
+            byMonth=_buckets(amounts, counts, "month")[-months:] if months > 0 else [],
+            byTicker=[
+                DividendBucket(
+                    key=ledger.ticker,
+                    payments=len(ledger.payments),
+                    amount=_money(ledger.total),
+                )
+                for ledger in by_ticker[:top]
+            ],
+            byCurrency=sorted(
+                _buckets(amounts, counts, "currency"),
+                key=lambda bucket: bucket.amount,
+                reverse=True,
+            ),
+            yields=yields[:top],
+        )
@@ -1,10 +1,58 @@
 import hishel
 
-storage = hishel.FileStorage(ttl=300)
+from config import (
+    CACHE_BACKEND,
+    CACHE_MAX_BYTES,
+    CACHE_MAX_ENTRIES,
+    CACHE_REDIS_URL,
+    CACHE_SQLITE_PATH,
+    CACHE_TTL,
+)
+from utils.cache_policy import CachePolicy, CachePolicyController
+from utils.cache_storage import (
+    AsyncCacheStorage,
+    CacheBackend,
+    CacheStorage,
+    MemoryBackend,
+    RedisBackend,
+    SQLiteBackend,
+)
+
+
+def create_cache_backend(name: str = CACHE_BACKEND) -> CacheBackend:
+    """Build the cache backend selected by ``CACHE_BACKEND``."""
+    if name == "memory":
+        return MemoryBackend(
+            max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL
+        )
+    if name == "sqlite":
+        return SQLiteBackend(CACHE_SQLITE_PATH, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL)
+    if name == "redis":
+        return RedisBackend(CACHE_REDIS_URL, max_entry_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL)
+    raise ValueError(
+        f"Unknown CACHE_BACKEND {name!r}; expected memory, sqlite, redis or file"
+    )
+
+
+cache_policy = CachePolicy()
+
+if CACHE_BACKEND == "file":
+    # The file storage has a single TTL; the controller enforces the
+    # shorter per-endpoint ones.
+    storage = hishel.FileStorage(ttl=cache_policy.max_ttl)
+    async_storage = hishel.AsyncFileStorage(ttl=cache_policy.max_ttl)
+else:
+    # The sync and async storages share one backend, so scripts using
+    # Trading212Client and the MCP server see each other's responses.
+    cache_backend = create_cache_backend()
+    storage = CacheStorage(cache_backend, policy=cache_policy)
+    async_storage = AsyncCacheStorage(cache_backend, policy=cache_policy)
 
 # The API exposes non-idempotent POST endpoints for orders, pies, and exports,
 # so we only cache GET requests.
-controller = hishel.Controller(
+controller = CachePolicyController(
+    cache_policy,
+
     # Cache only GET methods
     cacheable_methods=["GET"],
 
@@ -0,0 +1,376 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from config import HISTORY_DB_PATH, HISTORY_SYNC_INTERVAL
+from models import (
+    HistoricalOrder,
+    HistoryDividendItem,
+    HistoryTransactionItem,
+    PaginatedResponseHistoricalOrder,
+    PaginatedResponseHistoryDividendItem,
+    PaginatedResponseHistoryTransactionItem,
+)
+from utils.client import (
+    AsyncTrading212Client,
+    Trading212Client,
+    as_utc,
+    history_item_date,
+)
+
+_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+@dataclass(frozen=True)
+class _HistoryKind:
+    table: str
+    model: type
+    key: Callable[[Any], str]
+    ticker: Callable[[Any], str | None]
+    path: str
+    page_model: type
+
+
+def _order_key(item: HistoricalOrder) -> str:
+    order_id = item.order.id if item.order else None
+    fill_id = item.fill.id if item.fill else None
+    if order_id is None and fill_id is None:
+        # Without ids, items would all share one key and replace each other.
+        digest = hashlib.blake2b(item.model_dump_json().encode("utf-8"), digest_size=16)
+        return f"item:{digest.hexdigest()}"
+    return f"{order_id}:{fill_id}"
+
+
+def _order_ticker(item: HistoricalOrder) -> str | None:
+    if not item.order:
+        return None
+    if item.order.ticker:
+        return item.order.ticker
+    return item.order.instrument.ticker if item.order.instrument else None
+
+
+def _dividend_key(item: HistoryDividendItem) -> str:
+    return item.reference or f"{item.ticker}:{item.paidOn}:{item.amount}:{item.type}"
+
+
+def _transaction_key(item: HistoryTransactionItem) -> str:
+    return item.reference or f"{item.type}:{item.dateTime}:{item.amount}"
+
+
+HISTORY_KINDS = {
+    "orders": _HistoryKind(
+        table="historical_orders",
+        model=HistoricalOrder,
+        key=_order_key,
+        ticker=_order_ticker,
+        path="/equity/history/orders",
+        page_model=PaginatedResponseHistoricalOrder,
+    ),
+    "dividends": _HistoryKind(
+        table="dividends",
+        model=HistoryDividendItem,
+        key=_dividend_key,
+        ticker=lambda item: item.ticker,
+        path="/equity/history/dividends",
+        page_model=PaginatedResponseHistoryDividendItem,
+    ),
+    "transactions": _HistoryKind(
+        table="transactions",
+        model=HistoryTransactionItem,
+        key=_transaction_key,
+        ticker=lambda item: None,
+        path="/equity/history/transactions",
+        page_model=PaginatedResponseHistoryTransactionItem,
+    ),
+}
+
+
+def _format_date(value: datetime | None) -> str | None:
+    if value is None:
+        return None
+    return as_utc(value).astimezone(timezone.utc).strftime(_DATE_FORMAT)
+
+
+def _parse_date(value: str | None) -> datetime | None:
+    if value is None:
+        return None
+    return datetime.strptime(value, _DATE_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def _page_items(page: Any, since: datetime | None) -> tuple[list[Any], bool]:
+    """Items of a page newer than ``since``, and whether the walk ends here."""
+    items = []
+    for item in page.items:
+        # History is returned newest first, so the first item older than
+        # ``since`` ends the walk.
+        item_date = history_item_date(item)
+        if since is not None and item_date is not None:
+            if as_utc(item_date) < as_utc(since):
+                return items, True
+        items.append(item)
+    return items, not page.nextPagePath
+
+
+class HistoryStore:
+    """SQLite copy of the account history, synced incrementally.
+
+    History is append-only and returned newest first, so a sync only walks
+    pages down to the newest item already stored. Each page is stored as it
+    arrives, together with the next page to fetch, so a sync that is
+    interrupted (a cancelled tool call, a restart) resumes where it
+    stopped instead of starting over. Queries are then served from the
+    local indexes without touching the API.
+
+    Calls block on SQLite; async code runs them in a thread, and holds
+    ``sync_locks[kind]`` around a sync so concurrent calls walk the history
+    once.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike = HISTORY_DB_PATH,
+        sync_interval: float = HISTORY_SYNC_INTERVAL,
+    ):
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.sync_interval = sync_interval
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self.sync_locks = {kind: asyncio.Lock() for kind in HISTORY_KINDS}
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        with self._lock, self._connection:
+            for kind in HISTORY_KINDS.values():
+                self._connection.executescript(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {kind.table} (
+                        key TEXT PRIMARY KEY,
+                        order_id INTEGER,
+                        ticker TEXT,
+                        date TEXT,
+                        data TEXT NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS {kind.table}_ticker_date
+                        ON {kind.table} (ticker, date);
+                    CREATE INDEX IF NOT EXISTS {kind.table}_date
+                        ON {kind.table} (date);
+                    CREATE INDEX IF NOT EXISTS {kind.table}_order_id
+                        ON {kind.table} (order_id);
+                    """
+                )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state "
+                "(kind TEXT PRIMARY KEY, synced_at REAL NOT NULL)"
+            )
+            # Where an unfinished sync stopped: the next page to fetch, and
+            # the newest item stored before it started, which ends the walk.
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS sync_progress "
+                "(kind TEXT PRIMARY KEY, since TEXT, next_page TEXT NOT NULL)"
+            )
+            # Which tickers each store() touched, for incremental consumers.
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS changes ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, ticker TEXT)"
+            )
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def latest(self, kind: str) -> datetime | None:
+        """Timestamp of the newest stored item of ``kind``."""
+        table = HISTORY_KINDS[kind].table
+        with self._lock:
+            row = self._connection.execute(f"SELECT MAX(date) FROM {table}").fetchone()
+        return _parse_date(row[0])
+
+    def needs_sync(self, kind: str) -> bool:
+        """Whether ``kind`` was last synced over ``sync_interval`` ago, or
+        its last sync did not finish."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT synced_at FROM sync_state WHERE kind = ?", (kind,)
+            ).fetchone()
+            unfinished = self._connection.execute(
+                "SELECT 1 FROM sync_progress WHERE kind = ?", (kind,)
+            ).fetchone()
+        return (
+            row is None
+            or unfinished is not None
+            or time.time() - row[0] >= self.sync_interval
+        )
+
+    def _rows(self, kind: str, items: Iterable[Any]) -> list[tuple]:
+        spec = HISTORY_KINDS[kind]
+        return [
+            (
+                spec.key(item),
+                item.order.id if kind == "orders" and item.order else None,
+                spec.ticker(item),
+                _format_date(history_item_date(item)),
+                item.model_dump_json(),
+            )
+            for item in items
+        ]
+
+    def _insert(self, kind: str, rows: list[tuple]) -> None:
+        # Called with the lock held, inside a transaction.
+        self._connection.executemany(
+            f"INSERT OR REPLACE INTO {HISTORY_KINDS[kind].table} "
+            "(key, order_id, ticker, date, data) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        self._connection.executemany(
+            "INSERT INTO changes (kind, ticker) VALUES (?, ?)",
+            [(kind, ticker) for ticker in {row[2] for row in rows}],
+        )
+
+    def _mark_synced(self, kind: str) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO sync_state (kind, synced_at) VALUES (?, ?)",
+            (kind, time.time()),
+        )
+        self._connection.execute("DELETE FROM sync_progress WHERE kind = ?", (kind,))
+
+    def store(self, kind: str, items: Iterable[Any]) -> int:
+        """Insert or replace ``items`` and mark ``kind`` as freshly synced."""
+        rows = self._rows(kind, items)
+        with self._lock, self._connection:
+            self._insert(kind, rows)
+            self._mark_synced(kind)
+        return len(rows)
+
+    def _sync_start(self, kind: str) -> tuple[datetime | None, str | None]:
+        """Where the next sync of ``kind`` starts: the bound and next page of
+        an unfinished one, or the newest stored item and the first page."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT since, next_page FROM sync_progress WHERE kind = ?", (kind,)
+            ).fetchone()
+        if row is None:
+            return self.latest(kind), None
+        return _parse_date(row[0]), row[1]
+
+    def _store_page(
+        self, kind: str, items: list[Any], since: datetime | None, next_page: str | None
+    ) -> int:
+        """Store one page of a sync and where it continues; ``next_page`` is
+        None on the last one."""
+        rows = self._rows(kind, items)
+        with self._lock, self._connection:
+            self._insert(kind, rows)
+            if next_page is None:
+                self._mark_synced(kind)
+            else:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO sync_progress (kind, since, next_page) "
+                    "VALUES (?, ?, ?)",
+                    (kind, _format_date(since), next_page),
+                )
+        return len(rows)
+
+    def changes(self, kind: str, after: int = 0) -> tuple[int, set[str]]:
+        """Tickers of ``kind`` stored since change ``after``, and the latest change.
+
+        With ``after=0`` every stored ticker is returned, including those
+        stored before the change log existed.
+        """
+        table = HISTORY_KINDS[kind].table
+        with self._lock:
+            (latest,) = self._connection.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM changes"
+            ).fetchone()
+            if after:
+                rows = self._connection.execute(
+                    "SELECT DISTINCT ticker FROM changes "
+                    "WHERE kind = ? AND seq > ? AND ticker IS NOT NULL",
+                    (kind, after),
+                ).fetchall()
+            else:
+                rows = self._connection.execute(
+                    f"SELECT DISTINCT ticker FROM {table} WHERE ticker IS NOT NULL"
+                ).fetchall()
+        return latest, {ticker for (ticker,) in rows}
+
+    def sync(self, client: Trading212Client, kind: str) -> int:
+        """Fetch and store items newer than the newest stored one, finishing
+        an interrupted sync first."""
+        spec = HISTORY_KINDS[kind]
+        stored = 0
+        while True:
+            since, resume_at = self._sync_start(kind)
+            for page in client.iter_history_pages(spec.path, spec.page_model, resume_at):
+                items, done = _page_items(page, since)
+                stored += self._store_page(
+                    kind, items, since, None if done else page.nextPagePath
+                )
+                if done:
+                    break
+            # After finishing an interrupted sync, fetch what is new since.
+            if resume_at is None:
+                return stored
+
+    async def sync_async(self, client: AsyncTrading212Client, kind: str) -> int:
+        """Async counterpart of sync(), storing pages in a thread."""
+        spec = HISTORY_KINDS[kind]
+        stored = 0
+        while True:
+            since, resume_at = await asyncio.to_thread(self._sync_start, kind)
+            async for page in client.iter_history_pages(
+                spec.path, spec.page_model, resume_at
+            ):
+                items, done = _page_items(page, since)
+                next_page = None if done else page.nextPagePath
+                stored += await asyncio.to_thread(
+                    self._store_page, kind, items, since, next_page
+                )
+                if done:
+                    break
+            # After finishing an interrupted sync, fetch what is new since.
+            if resume_at is None:
+                return stored
+
+    def query(
+        self,
+        kind: str,
+        ticker: str | None = None,
+        order_id: int | None = None,
+        time_from: datetime | None = None,
+        time_to: datetime | None = None,
+        limit: int | None = None,
+    ) -> list[Any]:
+        """Stored items of ``kind`` matching the filters, newest first."""
+        spec = HISTORY_KINDS[kind]
+        clauses, params = [], []
+        if ticker is not None:
+            clauses.append("ticker = ?")
+            params.append(ticker)
+        if order_id is not None:
+            clauses.append("order_id = ?")
+            params.append(order_id)
+        if time_from is not None:
+            clauses.append("date >= ?")
+            params.append(_format_date(time_from))
+        if time_to is not None:
+            clauses.append("date < ?")
+            params.append(_format_date(time_to))
+
+        sql = f"SELECT data FROM {spec.table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY date DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+        return [spec.model.model_validate_json(data) for (data,) in rows]
@@ -0,0 +1,39 @@
+import importlib.util
+
+import httpx
+
+from config import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_HTTP2,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_POOL_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_WRITE_TIMEOUT,
+)
+
+# httpx only speaks HTTP/2 with the optional h2 package; without it we
+# quietly stay on HTTP/1.1 keep-alive connections.
+http2 = HTTP_HTTP2 and importlib.util.find_spec("h2") is not None
+
+limits = httpx.Limits(
+    max_connections=HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+)
+
+timeout = httpx.Timeout(
+    connect=HTTP_CONNECT_TIMEOUT,
+    read=HTTP_READ_TIMEOUT,
+    write=HTTP_WRITE_TIMEOUT,
+    pool=HTTP_POOL_TIMEOUT,
+)
+
+
+def create_transport() -> httpx.HTTPTransport:
+    return httpx.HTTPTransport(http2=http2, limits=limits)
+
+
+def create_async_transport() -> httpx.AsyncHTTPTransport:
+    return httpx.AsyncHTTPTransport(http2=http2, limits=limits)
@@ -0,0 +1,195 @@
+import asyncio
+import bisect
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+
+from config import INSTRUMENT_CATALOG_REFRESH_INTERVAL
+from models import TradeableInstrument
+from utils.client import AsyncTrading212Client
+from utils.metadata_tables import InstrumentTable
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+@dataclass(frozen=True)
+class _Index:
+    """An instrument table with its lookup indexes, never changed once built."""
+
+    table: InstrumentTable = field(default_factory=InstrumentTable)
+    by_ticker: dict[str, int] = field(default_factory=dict)
+    by_isin: dict[str, list[int]] = field(default_factory=dict)
+    trigrams: dict[str, set[int]] = field(default_factory=dict)
+    prefixes: list[tuple[str, int]] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, table: InstrumentTable) -> "_Index":
+        by_ticker: dict[str, int] = {}
+        by_isin: dict[str, list[int]] = {}
+        trigrams: dict[str, set[int]] = {}
+        prefixes: list[tuple[str, int]] = []
+
+        for index in range(len(table)):
+            ticker, isin = table.ticker[index], table.isin[index]
+            if ticker:
+                by_ticker[ticker.upper()] = index
+            if isin:
+                by_isin.setdefault(isin.upper(), []).append(index)
+            for text in (ticker, table.name[index], table.short_name[index]):
+                if not text:
+                    continue
+                text = text.lower()
+                for trigram in _trigrams(text):
+                    trigrams.setdefault(trigram, set()).add(index)
+                prefixes.extend((word, index) for word in _WORD.findall(text))
+
+        prefixes.sort()
+        return cls(table, by_ticker, by_isin, trigrams, prefixes)
+
+    def candidates(self, term: str) -> set[int]:
+        if len(term) >= 3:
+            postings = sorted(
+                (self.trigrams.get(trigram, set()) for trigram in _trigrams(term)),
+                key=len,
+            )
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates &= posting
+                if not candidates:
+                    break
+            return candidates
+
+        # Too short for trigrams: fall back to word prefixes.
+        start = bisect.bisect_left(self.prefixes, (term, -1))
+        candidates = set()
+        for word, index in self.prefixes[start:]:
+            if not word.startswith(term):
+                break
+            candidates.add(index)
+        return candidates
+
+    def score(self, index: int, term: str) -> int:
+        ticker = (self.table.ticker[index] or "").lower()
+        names = [
+            name.lower()
+            for name in (self.table.name[index], self.table.short_name[index])
+            if name
+        ]
+        # Tickers look like AAPL_US_EQ, so also match the symbol on its own.
+        symbol = ticker.split("_", 1)[0]
+
+        if term in (ticker, symbol) or term in names:
+            return 100
+        if symbol.startswith(term):
+            return 80
+        if any(name.startswith(term) for name in names):
+            return 70
+        if any(term in _WORD.findall(name) for name in names):
+            return 60
+        if any(
+            word.startswith(term) for name in names for word in _WORD.findall(name)
+        ):
+            return 50
+        if any(term in name for name in names):
+            return 40
+        if term in ticker:
+            return 30
+        return 0
+
+
+class InstrumentCatalog:
+    """Process-wide, indexed copy of /equity/metadata/instruments.
+
+    The instrument list is fetched once into an InstrumentTable and
+    refreshed in the background when it is older than ``refresh_interval``;
+    searches never wait for a refresh once the first load has completed.
+    A refresh builds a new _Index and replaces the old one in a single
+    assignment, so a lookup that reads it once never mixes the two. Only
+    the rows a search returns are turned into TradeableInstrument models.
+    """
+
+    def __init__(self, refresh_interval: float = INSTRUMENT_CATALOG_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self.loaded_at: float | None = None
+        self._index = _Index()
+        self._load_lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._index.table)
+
+    def load(self, table: InstrumentTable) -> None:
+        """Build the indexes and swap them in atomically."""
+        self._index = _Index.build(table)
+        self.loaded_at = time.monotonic()
+
+    async def refresh(self, client: AsyncTrading212Client) -> None:
+        table = await client.get_instruments_table()
+        await asyncio.to_thread(self.load, table)
+
+    async def ensure_loaded(self, client: AsyncTrading212Client) -> None:
+        """Load on first use and schedule a background refresh when stale."""
+        if self.loaded_at is None:
+            async with self._load_lock:
+                if self.loaded_at is None:
+                    await self.refresh(client)
+            return
+
+        stale = time.monotonic() - self.loaded_at >= self.refresh_interval
+        if stale and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self.refresh(client))
+            self._refresh_task.add_done_callback(self._refresh_done)
+
+    @staticmethod
+    def _refresh_done(task: asyncio.Task) -> None:
+        # The stale index keeps being served; the next search retries.
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(
+                "Instrument catalog refresh failed", exc_info=task.exception()
+            )
+
+    def get(self, ticker: str) -> TradeableInstrument | None:
+        index = self._index
+        row = index.by_ticker.get(ticker.upper())
+        return None if row is None else index.table.row(row)
+
+    def classify(self, ticker: str) -> tuple[str | None, int | None]:
+        """Instrument type and working schedule ID, without building a model."""
+        index = self._index
+        row = index.by_ticker.get(ticker.upper())
+        if row is None:
+            return None, None
+        schedule_id = index.table.working_schedule_id[row]
+        return index.table.type[row], None if schedule_id < 0 else schedule_id
+
+    def search(self, term: str | None = None, limit: int = 20) -> list[TradeableInstrument]:
+        """Instruments matching ``term`` by ticker, ISIN or name, best first."""
+        index = self._index
+        table = index.table
+        if not term:
+            return table.rows(range(min(limit, len(table))))
+
+        exact = index.by_ticker.get(term.upper())
+        if exact is not None:
+            return table.rows([exact][:limit])
+
+        isin_matches = index.by_isin.get(term.upper(), [])
+        if isin_matches:
+            return table.rows(isin_matches[:limit])
+
+        term = term.lower()
+        scored = []
+        for row in index.candidates(term):
+            score = index.score(row, term)
+            if score:
+                scored.append((-score, len(table.name[row] or ""), row))
+
+        scored.sort()
+        return table.rows([row for _, _, row in scored[:limit]])
@@ -0,0 +1,221 @@
+import bisect
+import math
+import sys
+from array import array
+from datetime import datetime, timezone
+from typing import Any
+
+from models import (
+    Exchange,
+    TimeEvent,
+    TimeEventTypeEnum,
+    TradeableInstrument,
+    WorkingSchedule,
+)
+
+# Sentinels for missing values in typed columns.
+_NO_INT = -1
+_NO_BOOL = -1
+
+
+def _intern(value: str | None) -> str | None:
+    return None if value is None else sys.intern(value)
+
+
+def _float_or_nan(value: Any) -> float:
+    return math.nan if value is None else float(value)
+
+
+def _nan_to_none(value: float) -> float | None:
+    return None if math.isnan(value) else value
+
+
+def _timestamp(value: str) -> float:
+    # Dates without an offset are UTC, not the host's local time.
+    date = datetime.fromisoformat(value)
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.timestamp()
+
+
+class InstrumentTable:
+    """Column-backed copy of /equity/metadata/instruments.
+
+    Built straight from the decoded JSON without pydantic. Numbers live in
+    typed arrays and the low-cardinality strings (currency, type) are
+    interned, so ~15k instruments take a fraction of the memory of the
+    equivalent TradeableInstrument models. Rows become models only when
+    they are returned via row().
+    """
+
+    __slots__ = (
+        "ticker",
+        "name",
+        "short_name",
+        "isin",
+        "currency_code",
+        "type",
+        "added_on",
+        "extended_hours",
+        "max_open_quantity",
+        "min_trade_quantity",
+        "working_schedule_id",
+    )
+
+    def __init__(self):
+        self.ticker: list[str | None] = []
+        self.name: list[str | None] = []
+        self.short_name: list[str | None] = []
+        self.isin: list[str | None] = []
+        self.currency_code: list[str | None] = []
+        self.type: list[str | None] = []
+        # Kept as the raw ISO string; parsed when a row is materialised.
+        self.added_on: list[str | None] = []
+        self.extended_hours = array("b")
+        self.max_open_quantity = array("d")
+        self.min_trade_quantity = array("d")
+        self.working_schedule_id = array("q")
+
+    @classmethod
+    def from_raw(cls, data: list[dict[str, Any]]) -> "InstrumentTable":
+        table = cls()
+        for item in data:
+            table.ticker.append(item.get("ticker"))
+            table.name.append(item.get("name"))
+            table.short_name.append(item.get("shortName"))
+            table.isin.append(item.get("isin"))
+            table.currency_code.append(_intern(item.get("currencyCode")))
+            table.type.append(_intern(item.get("type")))
+            table.added_on.append(item.get("addedOn"))
+            extended_hours = item.get("extendedHours")
+            table.extended_hours.append(
+                _NO_BOOL if extended_hours is None else int(extended_hours)
+            )
+            table.max_open_quantity.append(_float_or_nan(item.get("maxOpenQuantity")))
+            table.min_trade_quantity.append(
+                _float_or_nan(item.get("minTradeQuantity"))
+            )
+            schedule_id = item.get("workingScheduleId")
+            table.working_schedule_id.append(
+                _NO_INT if schedule_id is None else schedule_id
+            )
+        return table
+
+    def __len__(self) -> int:
+        return len(self.ticker)
+
+    def row(self, index: int) -> TradeableInstrument:
+        extended_hours = self.extended_hours[index]
+        schedule_id = self.working_schedule_id[index]
+        return TradeableInstrument.model_validate(
+            {
+                "ticker": self.ticker[index],
+                "name": self.name[index],
+                "shortName": self.short_name[index],
+                "isin": self.isin[index],
+                "currencyCode": self.currency_code[index],
+                "type": self.type[index],
+                "addedOn": self.added_on[index],
+                "extendedHours": None if extended_hours == _NO_BOOL else bool(extended_hours),
+                "maxOpenQuantity": _nan_to_none(self.max_open_quantity[index]),
+                "minTradeQuantity": _nan_to_none(self.min_trade_quantity[index]),
+                "workingScheduleId": None if schedule_id == _NO_INT else schedule_id,
+            }
+        )
+
+    def rows(self, indexes: list[int] | range | None = None) -> list[TradeableInstrument]:
+        indexes = range(len(self)) if indexes is None else indexes
+        return [self.row(index) for index in indexes]
+
+
+class ExchangeTable:
+    """Column-backed copy of /equity/metadata/exchanges.
+
+    Working schedules and their time events are flattened into parallel
+    arrays that point back at their parent row, with event times stored as
+    epoch seconds and event types as indexes into TimeEventTypeEnum.
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "schedule_exchange",
+        "schedule_id",
+        "event_schedule",
+        "event_time",
+        "event_type",
+    )
+
+    _EVENT_TYPES = list(TimeEventTypeEnum)
+    _EVENT_TYPE_INDEX = {event_type.value: i for i, event_type in enumerate(_EVENT_TYPES)}
+
+    def __init__(self):
+        self.id = array("q")
+        self.name: list[str] = []
+        self.schedule_exchange = array("l")
+        self.schedule_id = array("q")
+        self.event_schedule = array("l")
+        self.event_time = array("d")
+        self.event_type = array("b")
+
+    @classmethod
+    def from_raw(cls, data: list[dict[str, Any]]) -> "ExchangeTable":
+        table = cls()
+        for item in data:
+            exchange_index = len(table.id)
+            table.id.append(item["id"])
+            table.name.append(item["name"])
+            for schedule in item.get("workingSchedules") or []:
+                schedule_index = len(table.schedule_id)
+                table.schedule_exchange.append(exchange_index)
+                table.schedule_id.append(schedule["id"])
+                for event in schedule.get("timeEvents") or []:
+                    table.event_schedule.append(schedule_index)
+                    table.event_time.append(_timestamp(event["date"]))
+                    table.event_type.append(cls._EVENT_TYPE_INDEX[event["type"]])
+        return table
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    @staticmethod
+    def _children(parents: array, parent_index: int) -> range:
+        # Rows are appended in order, so the children of a row are a
+        # contiguous run of the (sorted) parent column.
+        return range(
+            bisect.bisect_left(parents, parent_index),
+            bisect.bisect_right(parents, parent_index),
+        )
+
+    def _events(self, schedule_index: int) -> list[TimeEvent]:
+        return [
+            TimeEvent.model_construct(
+                date=datetime.fromtimestamp(self.event_time[i], tz=timezone.utc),
+                type=self._EVENT_TYPES[self.event_type[i]],
+            )
+            for i in self._children(self.event_schedule, schedule_index)
+        ]
+
+    def row(self, index: int) -> Exchange:
+        return Exchange.model_construct(
+            id=self.id[index],
+            name=self.name[index],
+            workingSchedules=[
+                WorkingSchedule.model_construct(
+                    id=self.schedule_id[schedule_index],
+                    timeEvents=self._events(schedule_index),
+                )
+                for schedule_index in self._children(self.schedule_exchange, index)
+            ],
+        )
+
+    def rows(self, indexes: list[int] | range | None = None) -> list[Exchange]:
+        indexes = range(len(self)) if indexes is None else indexes
+        return [self.row(index) for index in indexes]
+
+    def schedule_names(self) -> dict[int, str]:
+        """Exchange name by working schedule ID, as referenced by instruments."""
+        return {
+            schedule_id: self.name[exchange_index]
+            for schedule_id, exchange_index in zip(self.schedule_id, self.schedule_exchange)
+        }
@@ -0,0 +1,364 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+import httpx
+
+from utils.rate_limiter import endpoint_key
+from utils.tracing import span
+
+# Upper bounds (seconds) of the latency histogram buckets.
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30,
+)
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, **extra: str) -> str:
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self) -> dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for key, value in sorted(self.values().items()):
+            lines.append(
+                f"{self.name}_total{_format_labels(self.labels, key)} {_format_value(value)}"
+            )
+        return lines
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (non-cumulative) + overflow, sum]
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[dict[str, str]]:
+        """Observe the duration of the block; labels may be added inside it."""
+        labels = dict(labels)
+        started = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            series = sorted(
+                (key, (list(counts), total[0])) for key, (counts, total) in self._series.items()
+            )
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                labels = _format_labels(self.labels, key, le=_format_value(bound))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """A minimal Prometheus registry, so metrics need no extra dependency."""
+
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def collector(self, function: Callable[[], None]) -> Callable[[], None]:
+        """Register a function that updates derived gauges before rendering."""
+        self._collectors.append(function)
+        return function
+
+    def render(self) -> str:
+        """The registry in the Prometheus text exposition format."""
+        for collect in self._collectors:
+            collect()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+http_request_duration = metrics.histogram(
+    "trading212_http_request_duration_seconds",
+    "Upstream Trading 212 API latency, excluding rate-limit queueing.",
+    ("method", "endpoint", "status"),
+)
+http_throttled = metrics.counter(
+    "trading212_http_throttled",
+    "Responses rejected by Trading 212 with HTTP 429.",
+    ("method", "endpoint"),
+)
+http_in_flight = metrics.gauge(
+    "trading212_http_in_flight",
+    "Requests currently sent to Trading 212.",
+    ("method", "endpoint"),
+)
+client_request_duration = metrics.histogram(
+    "trading212_client_request_duration_seconds",
+    "Client call latency including cache lookup, queueing and parsing.",
+    ("method", "endpoint", "cache"),
+)
+cache_requests = metrics.counter(
+    "trading212_cache_requests",
+    "Cacheable GET requests by cache result (hit or miss).",
+    ("endpoint", "result"),
+)
+cache_hit_ratio = metrics.gauge(
+    "trading212_cache_hit_ratio",
+    "Share of GET requests served from the response cache.",
+    ("endpoint",),
+)
+validation_duration = metrics.histogram(
+    "trading212_validation_duration_seconds",
+    "Time spent decoding and validating response bodies.",
+    ("model",),
+)
+tool_duration = metrics.histogram(
+    "trading212_mcp_tool_duration_seconds",
+    "MCP tool call latency.",
+    ("tool", "status"),
+)
+resource_duration = metrics.histogram(
+    "trading212_mcp_resource_duration_seconds",
+    "MCP resource read latency.",
+    ("resource", "status"),
+)
+mcp_in_flight = metrics.gauge(
+    "trading212_mcp_in_flight",
+    "MCP tool calls and resource reads currently running.",
+    ("kind",),
+)
+refresh_reads = metrics.counter(
+    "trading212_refresh_reads",
+    "Reads of background-refreshed endpoints by snapshot state (fresh, stale or miss).",
+    ("endpoint", "result"),
+)
+refreshes = metrics.counter(
+    "trading212_refreshes",
+    "Snapshot refreshes of hot endpoints by result (ok or error).",
+    ("endpoint", "result"),
+)
+subscription_notifications = metrics.counter(
+    "trading212_subscription_notifications",
+    "Resource update notifications by result (sent, or dropped with the session).",
+    ("result",),
+)
+order_waits = metrics.counter(
+    "trading212_order_waits",
+    "wait_for_order calls by result (reached, final or timeout).",
+    ("result",),
+)
+tenant_clients = metrics.gauge(
+    "trading212_tenant_clients",
+    "Accounts with a pooled client, besides the default one.",
+)
+tenant_evictions = metrics.counter(
+    "trading212_tenant_evictions",
+    "Account clients evicted from the pool as least recently used.",
+)
+
+
+@metrics.collector
+def _update_cache_hit_ratio() -> None:
+    totals: dict[str, list[float]] = {}
+    for (endpoint, result), count in cache_requests.values().items():
+        hits_and_total = totals.setdefault(endpoint, [0, 0])
+        hits_and_total[1] += count
+        if result == "hit":
+            hits_and_total[0] += count
+    for endpoint, (hits, total) in totals.items():
+        cache_hit_ratio.set(hits / total if total else 0.0, endpoint=endpoint)
+
+
+def endpoint_labels(method: str, path: str) -> dict[str, str]:
+    method, _, endpoint = endpoint_key(method, path).partition(" ")
+    return {"method": method, "endpoint": endpoint}
+
+
+def _http_span(request: httpx.Request, labels: dict[str, str]):
+    return span(
+        f"{labels['method']} {labels['endpoint']}",
+        **{
+            "http.request.method": labels["method"],
+            "http.route": labels["endpoint"],
+            "url.full": str(request.url),
+        },
+    )
+
+
+class MetricsTransport(httpx.BaseTransport):
+    """Records latency, in-flight requests and 429s of upstream requests.
+
+    Sits below the RateLimitedTransport, so every retry is measured and
+    time spent waiting for quota is not.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        labels = endpoint_labels(request.method, request.url.path)
+        with http_in_flight.track(**labels), http_request_duration.time(
+            **labels, status="error"
+        ) as observed, _http_span(request, labels) as current:
+            response = self._transport.handle_request(request)
+            observed["status"] = str(response.status_code)
+            current.set_attribute("http.response.status_code", response.status_code)
+        if response.status_code == 429:
+            http_throttled.inc(**labels)
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncMetricsTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of MetricsTransport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        labels = endpoint_labels(request.method, request.url.path)
+        with http_in_flight.track(**labels), http_request_duration.time(
+            **labels, status="error"
+        ) as observed, _http_span(request, labels) as current:
+            response = await self._transport.handle_async_request(request)
+            observed["status"] = str(response.status_code)
+            current.set_attribute("http.response.status_code", response.status_code)
+        if response.status_code == 429:
+            http_throttled.inc(**labels)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
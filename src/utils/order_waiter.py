@@ -0,0 +1,140 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING, Iterable
+
+import httpx
+
+from config import ORDER_WAIT_MAX_INTERVAL, ORDER_WAIT_MAX_TIMEOUT
+from models import HistoricalOrder, OrderStatusEnum, OrderWait
+from utils.metrics import order_waits
+
+if TYPE_CHECKING:
+    from utils.client import AsyncTrading212Client
+    from utils.history_store import HistoryStore
+
+# States an order never leaves; waiting ends on them even if they were not
+# asked for.
+FINAL_STATES = frozenset(
+    {
+        OrderStatusEnum.FILLED,
+        OrderStatusEnum.CANCELLED,
+        OrderStatusEnum.REJECTED,
+        OrderStatusEnum.REPLACED,
+    }
+)
+
+_HISTORY_PATH = "/equity/history/orders"
+# Growth of the pause between polls that saw no change, and the shortest
+# pause, for endpoints the rate limiter has no limit for.
+_BACKOFF = 1.5
+_MIN_INTERVAL = 0.5
+# Pause while the endpoint's quota has no token free.
+_CAPACITY_WAIT = 0.5
+
+
+def _not_found(exc: Exception) -> bool:
+    cause = exc.__cause__
+    return isinstance(cause, httpx.HTTPStatusError) and cause.response.status_code == 404
+
+
+def _matching(items: Iterable[HistoricalOrder], order_id: int) -> list[HistoricalOrder]:
+    return [item for item in items if item.order is not None and item.order.id == order_id]
+
+
+async def wait_for_state(
+    client: "AsyncTrading212Client",
+    history_store: "HistoryStore",
+    order_id: int,
+    states: Iterable[OrderStatusEnum],
+    timeout: float,
+    max_interval: float = ORDER_WAIT_MAX_INTERVAL,
+) -> OrderWait:
+    """Poll an order until it reaches one of ``states``, a final state, or
+    ``timeout`` seconds (at most ORDER_WAIT_MAX_TIMEOUT) pass.
+
+    The order is fetched by id while it is active, first as often as the
+    endpoint's rate limit sustains and then less often, up to every
+    ``max_interval`` seconds, while its status and filled quantity stay
+    the same. Polls after the first are only sent when the quota has a
+    token free, so other calls are not queued behind them. Once the order
+    has left the active list (HTTP 404) it is looked up in the local
+    history, then in the newest page of the order history for its ticker.
+    """
+    wanted = frozenset(states)
+    timeout = min(max(timeout, 0.0), ORDER_WAIT_MAX_TIMEOUT)
+    limiter = client.rate_limiter
+    start = time.monotonic()
+    deadline = start + timeout
+
+    path = f"/equity/orders/{order_id}"
+    interval = delay = max(limiter.min_interval("GET", path), _MIN_INTERVAL)
+    order, fills, source = None, [], None
+    seen = None
+    polls = 0
+
+    def result(outcome: str) -> OrderWait:
+        order_waits.inc(result=outcome)
+        return OrderWait(
+            orderId=order_id,
+            status=order.status if order else None,
+            reached=outcome == "reached",
+            timedOut=outcome == "timeout",
+            source=source,
+            order=order,
+            fills=fills,
+            polls=polls,
+            waitedSeconds=round(time.monotonic() - start, 3),
+        )
+
+    while True:
+        if polls == 0 or limiter.has_capacity("GET", path):
+            polls += 1
+            if path == _HISTORY_PATH:
+                ticker = order.ticker if order else None
+                page = await client.get_historical_order_data(ticker=ticker, limit=50)
+                history = _matching(page.items, order_id)
+            else:
+                try:
+                    order, source = await client.get_order_by_id(order_id), "orders"
+                    history = []
+                except RuntimeError as exc:
+                    if not _not_found(exc):
+                        raise
+                    # Filled, cancelled and rejected orders leave the active
+                    # list; their final state is in the history.
+                    path = _HISTORY_PATH
+                    interval = delay = max(
+                        delay, limiter.min_interval("GET", path), _MIN_INTERVAL
+                    )
+                    stored = await asyncio.to_thread(
+                        history_store.query, "orders", order_id=order_id
+                    )
+                    history = _matching(stored, order_id)
+                    if not history:
+                        # Look the order up in the API's history straight away.
+                        continue
+            if history:
+                # Newest first, with one item per fill.
+                order, source = history[0].order, "history"
+                fills = [item.fill for item in history if item.fill is not None]
+
+            status = order.status if order else None
+            if status in wanted:
+                return result("reached")
+            if status in FINAL_STATES:
+                return result("final")
+            progress = (path, status, order.filledQuantity if order else None)
+            if progress != seen:
+                seen, delay = progress, interval
+            else:
+                delay = min(delay * _BACKOFF, max(max_interval, interval))
+            pause = delay
+        else:
+            pause = min(delay, _CAPACITY_WAIT)
+
+        remaining = deadline - time.monotonic()
+        if remaining <= pause:
+            # Nothing would be polled before the deadline.
+            await asyncio.sleep(max(remaining, 0.0))
+            return result("timeout")
+        await asyncio.sleep(pause)
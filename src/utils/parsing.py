@@ -0,0 +1,42 @@
+import json
+from functools import lru_cache
+from typing import Any
+
+from pydantic import TypeAdapter
+
+from config import VALIDATION_MODE
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def json_loads(content: bytes) -> Any:
+    """Decode a response body, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+@lru_cache(maxsize=None)
+def type_adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def parse_json(
+    content: bytes,
+    response_model: Any = None,
+    strict: bool = VALIDATION_MODE == "strict",
+) -> Any:
+    """Decode ``content``, validating it as ``response_model`` when given.
+
+    Models are validated straight from the raw bytes by a cached
+    TypeAdapter, so pydantic-core parses and validates a whole response
+    (including every item of a list) in a single pass instead of
+    building intermediate dicts and validating item by item. ``strict``
+    additionally rejects type coercions such as ``"1"`` for an integer.
+    """
+    if response_model is None:
+        return json_loads(content)
+    return type_adapter(response_model).validate_json(content, strict=strict)
@@ -0,0 +1,243 @@
+import math
+from typing import Mapping
+
+from models import (
+    AccountBucketResultResponse,
+    AccountSummary,
+    Exposure,
+    PiesSummary,
+    PortfolioAnalytics,
+    PortfolioConcentration,
+    Position,
+    PositionWeight,
+)
+
+# NumPy is imported by the first PortfolioFrame: the other modules only
+# need MINOR_CURRENCIES, and the import costs server startup ~0.1 s.
+np = None
+
+# Currencies the API quotes in minor units, with their major currency and
+# the number of minor units per major unit.
+MINOR_CURRENCIES: dict[str, tuple[str, float]] = {"GBX": ("GBP", 100.0)}
+
+UNKNOWN = "UNKNOWN"
+
+
+def _money(value: float) -> float:
+    return round(float(value), 2)
+
+
+def _share(value: float) -> float:
+    return round(float(value), 4)
+
+
+def _ratio(numerator: float, denominator: float) -> float | None:
+    return _share(numerator / denominator) if denominator else None
+
+
+def _load_numpy() -> None:
+    global np
+    if np is not None:
+        return
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError(
+            "portfolio analytics require NumPy: "
+            'pip install "trading212-mcp-server[analytics]"'
+        ) from None
+    np = numpy
+
+
+def _column(values: list) -> "np.ndarray":
+    return np.fromiter(
+        (math.nan if value is None else value for value in values),
+        dtype=np.float64,
+        count=len(values),
+    )
+
+
+def _exposure(keys: list[str], value, pnl, invested: float) -> list[Exposure]:
+    """Sum ``value`` and ``pnl`` per key, largest first."""
+    labels, groups = np.unique(np.array(keys, dtype=object), return_inverse=True)
+    values = np.bincount(groups, weights=value, minlength=len(labels))
+    pnls = np.bincount(groups, weights=pnl, minlength=len(labels))
+    counts = np.bincount(groups, minlength=len(labels))
+    return [
+        Exposure(
+            key=labels[i],
+            positions=int(counts[i]),
+            value=_money(values[i]),
+            weight=_share(values[i] / invested) if invested else 0.0,
+            unrealizedProfitLoss=_money(pnls[i]),
+        )
+        for i in np.argsort(-values, kind="stable")
+    ]
+
+
+class PortfolioFrame:
+    """Positions as parallel NumPy columns, in the account currency.
+
+    The wallet impact of a position is already converted to the account
+    currency. Positions without one fall back to quantity x price in the
+    instrument currency, with minor units (GBX) converted to the major
+    currency, which is exact only when that is the account currency.
+    """
+
+    def __init__(self, positions: list[Position]):
+        _load_numpy()
+        instruments = [position.instrument for position in positions]
+        wallets = [position.walletImpact for position in positions]
+
+        self.tickers = [
+            (instrument.ticker if instrument else None) or UNKNOWN
+            for instrument in instruments
+        ]
+        self.names = [instrument.name if instrument else None for instrument in instruments]
+        currencies = [
+            ((instrument.currency if instrument else None) or UNKNOWN).upper()
+            for instrument in instruments
+        ]
+        minor = [MINOR_CURRENCIES.get(currency) for currency in currencies]
+        self.currencies = [
+            unit[0] if unit else currency for currency, unit in zip(currencies, minor)
+        ]
+        units = np.array([unit[1] if unit else 1.0 for unit in minor])
+
+        quantity = np.nan_to_num(_column([position.quantity for position in positions]))
+        in_pies = np.nan_to_num(_column([position.quantityInPies for position in positions]))
+        price = _column([position.currentPrice for position in positions])
+        average_price = _column([position.averagePricePaid for position in positions])
+
+        def wallet(field: str):
+            return _column([getattr(item, field, None) if item else None for item in wallets])
+
+        self.value = np.nan_to_num(
+            np.where(
+                np.isnan(wallet("currentValue")),
+                quantity * price / units,
+                wallet("currentValue"),
+            )
+        )
+        self.cost = np.nan_to_num(
+            np.where(
+                np.isnan(wallet("totalCost")),
+                quantity * average_price / units,
+                wallet("totalCost"),
+            )
+        )
+        self.pnl = np.where(
+            np.isnan(wallet("unrealizedProfitLoss")),
+            self.value - self.cost,
+            wallet("unrealizedProfitLoss"),
+        )
+        self.fx_impact = np.nan_to_num(wallet("fxImpact"))
+        self.in_pies = np.divide(
+            in_pies, quantity, out=np.zeros_like(quantity), where=quantity > 0
+        ).clip(0, 1)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+
+def analyse_portfolio(
+    positions: list[Position],
+    summary: AccountSummary | None = None,
+    pies: list[AccountBucketResultResponse] | None = None,
+    instrument_types: Mapping[str, str | None] | None = None,
+    exchanges: Mapping[str, str | None] | None = None,
+    top: int = 10,
+) -> PortfolioAnalytics:
+    """Weights, P&L, exposure and concentration of the open positions.
+
+    ``instrument_types`` and ``exchanges`` map tickers onto the breakdown
+    keys; tickers missing from them are grouped under UNKNOWN.
+    """
+    frame = PortfolioFrame(positions)
+    instrument_types = instrument_types or {}
+    exchanges = exchanges or {}
+
+    invested = float(frame.value.sum())
+    cost = float(frame.cost.sum())
+    pnl = float(frame.pnl.sum())
+    weights = frame.value / invested if invested else np.zeros(len(frame))
+
+    cash = 0.0
+    if summary and summary.cash:
+        cash = sum(
+            amount or 0.0
+            for amount in (
+                summary.cash.availableToTrade,
+                summary.cash.reservedForOrders,
+                summary.cash.inPies,
+            )
+        )
+    total_value = (summary.totalValue if summary else None) or invested + cash
+
+    ranked = np.argsort(-frame.value, kind="stable")
+    ranked_weights = weights[ranked]
+    cumulative = np.cumsum(ranked_weights)
+    herfindahl = float(np.square(weights).sum())
+
+    def top_weight(count: int) -> float:
+        return _share(cumulative[min(count, len(cumulative)) - 1]) if len(cumulative) else 0.0
+
+    pie_summary = None
+    if pies:
+        results = [pie.result for pie in pies]
+        pie_summary = PiesSummary(
+            pies=len(pies),
+            value=_money(sum((r.priceAvgValue or 0.0) for r in results if r)),
+            investedValue=_money(sum((r.priceAvgInvestedValue or 0.0) for r in results if r)),
+            result=_money(sum((r.priceAvgResult or 0.0) for r in results if r)),
+            cash=_money(sum(pie.cash or 0.0 for pie in pies)),
+            positionValueInPies=_money((frame.value * frame.in_pies).sum()),
+        )
+
+    investments = summary.investments if summary else None
+    return PortfolioAnalytics(
+        currency=summary.currency if summary else None,
+        totalValue=_money(total_value),
+        cash=_money(cash),
+        cashWeight=_ratio(cash, total_value),
+        investedValue=_money(invested),
+        totalCost=_money(cost),
+        unrealizedProfitLoss=_money(pnl),
+        unrealizedProfitLossPct=_ratio(pnl, cost),
+        fxImpact=_money(frame.fx_impact.sum()),
+        realizedProfitLoss=investments.realizedProfitLoss if investments else None,
+        positions=len(frame),
+        concentration=PortfolioConcentration(
+            herfindahlIndex=_share(herfindahl),
+            effectiveHoldings=round(1 / herfindahl, 2) if herfindahl else 0.0,
+            top1Weight=top_weight(1),
+            top5Weight=top_weight(5),
+            top10Weight=top_weight(10),
+        ),
+        topPositions=[
+            PositionWeight(
+                ticker=frame.tickers[i],
+                name=frame.names[i],
+                currency=frame.currencies[i],
+                value=_money(frame.value[i]),
+                weight=_share(weights[i]),
+                unrealizedProfitLoss=_money(frame.pnl[i]),
+                unrealizedProfitLossPct=_ratio(frame.pnl[i], frame.cost[i]),
+            )
+            for i in ranked[:top]
+        ],
+        currencyExposure=_exposure(frame.currencies, frame.value, frame.pnl, invested),
+        exchangeExposure=_exposure(
+            [exchanges.get(ticker) or UNKNOWN for ticker in frame.tickers],
+            frame.value,
+            frame.pnl,
+            invested,
+        ),
+        typeExposure=_exposure(
+            [instrument_types.get(ticker) or UNKNOWN for ticker in frame.tickers],
+            frame.value,
+            frame.pnl,
+            invested,
+        ),
+        pies=pie_summary,
+    )
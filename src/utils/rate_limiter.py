@@ -0,0 +1,394 @@
+import asyncio
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+import httpx
+
+from config import RATE_LIMIT_MAX_RETRIES
+from utils.retry import RetryPolicy, retry_after
+
+# Published limits from docs/api.json, keyed by "<METHOD> <path template>".
+# Trading 212 applies them per account, so every client sharing an API key
+# should also share a RateLimiter.
+DEFAULT_RATE_LIMITS: dict[str, tuple[int, float]] = {
+    "GET /equity/account/summary": (1, 5),
+    "GET /equity/positions": (1, 1),
+    "GET /equity/orders": (1, 5),
+    "GET /equity/orders/{id}": (1, 1),
+    "DELETE /equity/orders/{id}": (50, 60),
+    "POST /equity/orders/limit": (1, 2),
+    "POST /equity/orders/market": (50, 60),
+    "POST /equity/orders/stop": (1, 2),
+    "POST /equity/orders/stop_limit": (1, 2),
+    "GET /equity/pies": (1, 30),
+    "POST /equity/pies": (1, 5),
+    "GET /equity/pies/{id}": (1, 5),
+    "POST /equity/pies/{id}": (1, 5),
+    "DELETE /equity/pies/{id}": (1, 5),
+    "POST /equity/pies/{id}/duplicate": (1, 5),
+    "GET /equity/history/orders": (6, 60),
+    "GET /equity/history/dividends": (6, 60),
+    "GET /equity/history/transactions": (6, 60),
+    "GET /equity/history/exports": (1, 60),
+    "POST /equity/history/exports": (1, 30),
+    "GET /equity/metadata/instruments": (1, 50),
+    "GET /equity/metadata/exchanges": (1, 30),
+}
+
+
+def endpoint_key(method: str, path: str) -> str:
+    """Map a concrete request onto the rate-limit key for its endpoint."""
+    if path.startswith("/api/"):
+        _, _, path = path.partition("/api/v0")
+    path = re.sub(r"/\d+(?=/|$)", "/{id}", path.rstrip("/") or "/")
+    return f"{method.upper()} {path}"
+
+
+@dataclass
+class BucketStats:
+    requests: int = 0
+    queued: int = 0
+    throttled: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+class TokenBucket:
+    """A token bucket that hands out reservations instead of blocking.
+
+    Callers take a token even when the bucket is empty and are told how
+    long to wait for it, so waiters are served in arrival order and the
+    same bucket can back both the sync and the async transport.
+    """
+
+    def __init__(self, limit: int, period: float):
+        self.limit = limit
+        self.period = period
+        self.tokens = float(limit)
+        self.blocked_until = 0.0
+        self.stats = BucketStats()
+        self._updated_at = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.limit / self.period
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        self.tokens = min(self.limit, self.tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it."""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        wait = max(0.0, -self.tokens / self.rate, self.blocked_until - now)
+        self.stats.requests += 1
+        self.stats.total_wait += wait
+        self.stats.max_wait = max(self.stats.max_wait, wait)
+        return wait
+
+    def block_for(self, seconds: float) -> None:
+        """Hold back new reservations for ``seconds`` and drain the bucket."""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+    def update_from_headers(self, headers: httpx.Headers) -> None:
+        """Resynchronise with the ``x-ratelimit-*`` headers of a response."""
+        try:
+            limit = int(headers["x-ratelimit-limit"])
+            period = float(headers["x-ratelimit-period"])
+            remaining = int(headers["x-ratelimit-remaining"])
+        except (KeyError, ValueError):
+            return
+
+        if limit > 0 and period > 0:
+            self.limit, self.period = limit, period
+
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, float(remaining))
+
+        if remaining <= 0:
+            try:
+                reset = float(headers["x-ratelimit-reset"])
+            except (KeyError, ValueError):
+                reset = time.time() + self.period
+            self.block_for(max(0.0, reset - time.time()))
+
+    def snapshot(self) -> dict:
+        self._refill(time.monotonic())
+        return {
+            "limit": self.limit,
+            "period": self.period,
+            "tokens": round(self.tokens, 3),
+            "queued": self.stats.queued,
+            "requests": self.stats.requests,
+            "throttled": self.stats.throttled,
+            "total_wait": round(self.stats.total_wait, 3),
+            "max_wait": round(self.stats.max_wait, 3),
+        }
+
+
+class RateLimiter:
+    """Per-endpoint token buckets for one Trading 212 account."""
+
+    def __init__(self, limits: dict[str, tuple[int, float]] | None = None):
+        self._limits = dict(DEFAULT_RATE_LIMITS if limits is None else limits)
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, method: str, path: str) -> TokenBucket | None:
+        key = endpoint_key(method, path)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None and key in self._limits:
+                bucket = self._buckets[key] = TokenBucket(*self._limits[key])
+            return bucket
+
+    def _observe(self, key: str, response: httpx.Response) -> TokenBucket | None:
+        # Endpoints missing from the table still get a bucket once the API
+        # tells us their quota.
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None and "x-ratelimit-limit" in response.headers:
+                bucket = self._buckets[key] = TokenBucket(1, 1)
+            if bucket is not None:
+                bucket.update_from_headers(response.headers)
+                if response.status_code == 429:
+                    bucket.stats.throttled += 1
+                    wait = retry_after(response.headers)
+                    if wait is not None:
+                        bucket.block_for(wait)
+                    elif bucket.blocked_until <= time.monotonic():
+                        bucket.block_for(bucket.period / bucket.limit)
+            return bucket
+
+    def _reserve(self, bucket: TokenBucket | None) -> float:
+        if bucket is None:
+            return 0.0
+        with self._lock:
+            return bucket.reserve()
+
+    def acquire(self, method: str, path: str) -> None:
+        """Block until a request to ``path`` fits inside its quota."""
+        bucket = self.bucket(method, path)
+        wait = self._reserve(bucket)
+        if wait > 0:
+            bucket.stats.queued += 1
+            try:
+                time.sleep(wait)
+            finally:
+                bucket.stats.queued -= 1
+
+    async def acquire_async(self, method: str, path: str) -> None:
+        """Wait without blocking the event loop until ``path`` has quota."""
+        bucket = self.bucket(method, path)
+        wait = self._reserve(bucket)
+        if wait > 0:
+            bucket.stats.queued += 1
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                bucket.stats.queued -= 1
+
+    def min_interval(self, method: str, path: str) -> float:
+        """Seconds between requests to ``path`` that its quota sustains."""
+        bucket = self.bucket(method, path)
+        return bucket.period / bucket.limit if bucket else 0.0
+
+    def has_capacity(self, method: str, path: str) -> bool:
+        """Whether a request to ``path`` could be sent now without waiting
+        or taking a turn from a queued one."""
+        bucket = self.bucket(method, path)
+        if bucket is None:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            bucket._refill(now)
+            return (
+                bucket.tokens >= 1
+                and bucket.blocked_until <= now
+                and not bucket.stats.queued
+            )
+
+    def wait_time(self, bucket: TokenBucket) -> float:
+        """Seconds a request reserved from ``bucket`` now would wait."""
+        with self._lock:
+            now = time.monotonic()
+            bucket._refill(now)
+            return max(
+                0.0, (1 - bucket.tokens) / bucket.rate, bucket.blocked_until - now
+            )
+
+    def observe(
+        self, method: str, path: str, response: httpx.Response
+    ) -> TokenBucket | None:
+        """Learn from a response; returns the endpoint's bucket, if it has one."""
+        return self._observe(endpoint_key(method, path), response)
+
+    def stats(self) -> dict[str, dict]:
+        """Queue depth, wait time and 429 counts for every active bucket."""
+        with self._lock:
+            return {key: bucket.snapshot() for key, bucket in self._buckets.items()}
+
+
+def _rewindable(request: httpx.Request) -> httpx.Request:
+    # hishel replaces request bodies with a one-shot stream, so buffer them
+    # before we might have to send the same request twice.
+    request.stream = httpx.ByteStream(request.read())
+    return request
+
+
+def _throttle_delay(
+    response: httpx.Response, attempt: int, retry_policy: RetryPolicy
+) -> float:
+    delay = retry_after(response.headers)
+    return retry_policy.backoff(attempt) if delay is None else delay
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """Queues requests against a RateLimiter and re-sends failed ones.
+
+    Requests rejected with HTTP 429 are re-sent up to ``max_retries`` times
+    once their quota allows, or after ``Retry-After`` (else a backoff) for
+    endpoints without a known quota; they are rejected before they are
+    processed, so this is safe even for order placement. Transport errors
+    and 5xx responses are re-sent according to ``retry_policy``. Either
+    way, a response whose wait would run past the retry budget is
+    returned as is.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport,
+        rate_limiter: RateLimiter,
+        max_retries: int = RATE_LIMIT_MAX_RETRIES,
+        retry_policy: RetryPolicy | None = None,
+    ):
+        self._transport = transport
+        self._rate_limiter = rate_limiter
+        self._max_retries = max_retries
+        self._retry_policy = retry_policy or RetryPolicy()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request = _rewindable(request)
+        method, path = request.method, request.url.path
+        started, throttled, failures = time.monotonic(), 0, 0
+
+        while True:
+            self._rate_limiter.acquire(method, path)
+            try:
+                response = self._transport.handle_request(request)
+            except httpx.TransportError as exc:
+                delay = self._retry_policy.delay_after_error(
+                    method, exc, failures, started
+                )
+                if delay is None:
+                    raise
+                failures += 1
+                time.sleep(delay)
+                continue
+
+            bucket = self._rate_limiter.observe(method, path, response)
+            if response.status_code == 429:
+                if throttled == self._max_retries:
+                    return response
+                if bucket is None:
+                    # No quota for acquire() to hold the request back on.
+                    wait = _throttle_delay(response, throttled + 1, self._retry_policy)
+                else:
+                    wait = self._rate_limiter.wait_time(bucket)
+                delay = self._retry_policy.delay_after_throttle(wait, started)
+                if delay is None:
+                    return response
+                throttled += 1
+                response.close()
+                if bucket is None:
+                    time.sleep(delay)
+                continue
+
+            delay = self._retry_policy.delay_after_response(
+                method, response, failures, started
+            )
+            if delay is None:
+                return response
+            failures += 1
+            response.close()
+            time.sleep(delay)
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of RateLimitedTransport."""
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        rate_limiter: RateLimiter,
+        max_retries: int = RATE_LIMIT_MAX_RETRIES,
+        retry_policy: RetryPolicy | None = None,
+    ):
+        self._transport = transport
+        self._rate_limiter = rate_limiter
+        self._max_retries = max_retries
+        self._retry_policy = retry_policy or RetryPolicy()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request = _rewindable(request)
+        method, path = request.method, request.url.path
+        started, throttled, failures = time.monotonic(), 0, 0
+
+        while True:
+            await self._rate_limiter.acquire_async(method, path)
+            try:
+                response = await self._transport.handle_async_request(request)
+            except httpx.TransportError as exc:
+                delay = self._retry_policy.delay_after_error(
+                    method, exc, failures, started
+                )
+                if delay is None:
+                    raise
+                failures += 1
+                await asyncio.sleep(delay)
+                continue
+
+            bucket = self._rate_limiter.observe(method, path, response)
+            if response.status_code == 429:
+                if throttled == self._max_retries:
+                    return response
+                if bucket is None:
+                    # No quota for acquire() to hold the request back on.
+                    wait = _throttle_delay(response, throttled + 1, self._retry_policy)
+                else:
+                    wait = self._rate_limiter.wait_time(bucket)
+                delay = self._retry_policy.delay_after_throttle(wait, started)
+                if delay is None:
+                    return response
+                throttled += 1
+                await response.aclose()
+                if bucket is None:
+                    await asyncio.sleep(delay)
+                continue
+
+            delay = self._retry_policy.delay_after_response(
+                method, response, failures, started
+            )
+            if delay is None:
+                return response
+            failures += 1
+            await response.aclose()
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+# Shared by every client in this process that uses the configured API key.
+rate_limiter = RateLimiter()
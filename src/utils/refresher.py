@@ -0,0 +1,177 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from config import (
+    REFRESH_ENDPOINTS,
+    REFRESH_IDLE_TIMEOUT,
+    REFRESH_INTERVAL,
+    REFRESH_MAX_STALE,
+)
+from models import AccountSummary, Order, Position
+from utils.metrics import refresh_reads, refreshes
+
+if TYPE_CHECKING:
+    from utils.client import AsyncTrading212Client
+
+
+@dataclass(frozen=True)
+class HotEndpoint:
+    name: str
+    path: str
+    response_model: Any
+
+
+# Endpoints that can be kept fresh in the background, selected by name
+# with REFRESH_ENDPOINTS.
+HOT_ENDPOINTS = {
+    endpoint.name: endpoint
+    for endpoint in (
+        HotEndpoint("account", "/equity/account/summary", AccountSummary),
+        HotEndpoint("positions", "/equity/positions", list[Position]),
+        HotEndpoint("orders", "/equity/orders", list[Order]),
+    )
+}
+
+
+@dataclass
+class _Snapshot:
+    value: Any
+    fetched_at: float
+    generation: int
+
+
+class Refresher:
+    """Keeps snapshots of hot endpoints fresh in the background.
+
+    Reads are served from the latest snapshot while it is younger than
+    ``max_stale``; a snapshot older than the refresh interval is refreshed
+    in the background (stale-while-revalidate). Each endpoint is refreshed
+    at most every ``interval`` seconds and never more often than every
+    other request its rate limit allows, and only when its quota has a
+    token free and nobody is queued, so foreground requests keep the rest
+    of the budget. A write that invalidates an endpoint's cached responses
+    also discards its snapshot. The loop stops after ``idle_timeout``
+    seconds without reads and restarts with the next one.
+    """
+
+    def __init__(
+        self,
+        client: "AsyncTrading212Client",
+        endpoints: list[str] = REFRESH_ENDPOINTS,
+        interval: float = REFRESH_INTERVAL,
+        max_stale: float = REFRESH_MAX_STALE,
+        idle_timeout: float = REFRESH_IDLE_TIMEOUT,
+    ):
+        unknown = set(endpoints) - HOT_ENDPOINTS.keys()
+        if unknown:
+            raise ValueError(
+                f"Unknown REFRESH_ENDPOINTS {sorted(unknown)}; "
+                f"expected some of {', '.join(HOT_ENDPOINTS)}"
+            )
+        self.client = client
+        self.endpoints = {
+            HOT_ENDPOINTS[name].path: HOT_ENDPOINTS[name] for name in endpoints
+        }
+        self.interval = interval
+        self.max_stale = max(max_stale, interval)
+        self.idle_timeout = idle_timeout
+        self._snapshots: dict[str, _Snapshot] = {}
+        self._last_read = time.monotonic()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def handles(self, path: str, response_model: Any) -> bool:
+        endpoint = self.endpoints.get(path)
+        return endpoint is not None and endpoint.response_model == response_model
+
+    def _interval(self, endpoint: HotEndpoint) -> float:
+        limiter = self.client.rate_limiter
+        return max(self.interval, 2 * limiter.min_interval("GET", endpoint.path))
+
+    def _generation(self, endpoint: HotEndpoint) -> int:
+        policy = self.client.controller.policy
+        return policy.generation(endpoint.path, self.client.cache_namespace)
+
+    def _usable(self, endpoint: HotEndpoint, now: float) -> _Snapshot | None:
+        snapshot = self._snapshots.get(endpoint.path)
+        if (
+            snapshot is None
+            or snapshot.generation != self._generation(endpoint)
+            or now - snapshot.fetched_at > self.max_stale
+        ):
+            return None
+        return snapshot
+
+    async def get(self, path: str) -> Any:
+        """The endpoint's response, from its snapshot when there is one."""
+        endpoint = self.endpoints[path]
+        now = self._last_read = time.monotonic()
+        self.start()
+        snapshot = self._usable(endpoint, now)
+        if snapshot is None:
+            refresh_reads.inc(endpoint=endpoint.name, result="miss")
+            return await self._refresh(endpoint)
+        if now - snapshot.fetched_at >= self._interval(endpoint):
+            refresh_reads.inc(endpoint=endpoint.name, result="stale")
+            self._wake.set()
+        else:
+            refresh_reads.inc(endpoint=endpoint.name, result="fresh")
+        return snapshot.value
+
+    async def _refresh(self, endpoint: HotEndpoint) -> Any:
+        # Responses fetched across a write would be stale: keep the
+        # generation from before the request.
+        generation = self._generation(endpoint)
+        try:
+            value = await self.client._fetch(endpoint.path, endpoint.response_model)
+        except Exception:
+            refreshes.inc(endpoint=endpoint.name, result="error")
+            raise
+        refreshes.inc(endpoint=endpoint.name, result="ok")
+        self._snapshots[endpoint.path] = _Snapshot(value, time.monotonic(), generation)
+        return value
+
+    def start(self) -> None:
+        """Run the refresh loop in the background, if it is not running."""
+        if self.endpoints and (self._task is None or self._task.done()):
+            self._last_read = time.monotonic()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while time.monotonic() - self._last_read < self.idle_timeout:
+            now = time.monotonic()
+            wait = self.interval
+            for endpoint in self.endpoints.values():
+                snapshot = self._usable(endpoint, now)
+                due = 0.0 if snapshot is None else (
+                    snapshot.fetched_at + self._interval(endpoint) - now
+                )
+                if due > 0:
+                    wait = min(wait, due)
+                elif self.client.rate_limiter.has_capacity("GET", endpoint.path):
+                    try:
+                        await self._refresh(endpoint)
+                    except Exception:
+                        # Kept out of the loop; reads fall back to a request
+                        # of their own once the snapshot is too old.
+                        pass
+                    wait = min(wait, self._interval(endpoint))
+                else:
+                    wait = min(wait, 0.5)
+            wait = min(wait, self._last_read + self.idle_timeout - time.monotonic())
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(wait, 0.1))
+            except asyncio.TimeoutError:
+                pass
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
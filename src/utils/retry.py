@@ -0,0 +1,81 @@
+import random
+import time
+
+import httpx
+
+from config import RETRY_BASE_DELAY, RETRY_BUDGET, RETRY_MAX_DELAY, RETRY_MAX_RETRIES
+
+# Methods whose effect does not depend on how often they are sent. Placing
+# an order or creating a pie is not, so POSTs are only re-sent when they
+# provably never reached the server.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "DELETE"})
+RETRY_STATUS_CODES = frozenset({500, 502, 503, 504})
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def retry_after(headers: httpx.Headers) -> float | None:
+    try:
+        return max(0.0, float(headers["retry-after"]))
+    except (KeyError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter inside a total time budget.
+
+    Transport errors and 5xx responses are retried for idempotent methods,
+    waiting ``Retry-After`` when a 503 carries one and a random delay of up
+    to ``base_delay * 2 ** attempt`` otherwise, so clients that failed
+    together do not retry together. HTTP 429 is left to the RateLimiter,
+    but waiting it out counts against the same budget.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = RETRY_MAX_RETRIES,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+        budget: float = RETRY_BUDGET,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def _within_budget(self, attempt: int, started: float, delay: float) -> float | None:
+        if attempt >= self.max_retries:
+            return None
+        if time.monotonic() - started + delay > self.budget:
+            return None
+        return delay
+
+    def delay_after_response(
+        self, method: str, response: httpx.Response, attempt: int, started: float
+    ) -> float | None:
+        """Seconds to wait before re-sending, or None to return ``response``."""
+        if method not in IDEMPOTENT_METHODS:
+            return None
+        if response.status_code not in RETRY_STATUS_CODES:
+            return None
+        delay = retry_after(response.headers) if response.status_code == 503 else None
+        if delay is None:
+            delay = self.backoff(attempt)
+        return self._within_budget(attempt, started, delay)
+
+    def delay_after_throttle(self, wait: float, started: float) -> float | None:
+        """``wait`` if a throttled request can still be re-sent after it
+        within the budget, or None to return the 429."""
+        if time.monotonic() - started + wait > self.budget:
+            return None
+        return wait
+
+    def delay_after_error(
+        self, method: str, error: httpx.TransportError, attempt: int, started: float
+    ) -> float | None:
+        """Seconds to wait before re-sending, or None to raise ``error``."""
+        if method not in IDEMPOTENT_METHODS and not isinstance(error, _NOT_SENT_ERRORS):
+            return None
+        return self._within_budget(attempt, started, self.backoff(attempt))
@@ -0,0 +1,263 @@
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable
+
+from mcp import types
+
+from config import SUBSCRIPTION_POLL_INTERVAL
+from models import Order, Position
+from utils.metrics import subscription_notifications
+
+if TYPE_CHECKING:
+    from mcp.server.session import ServerSession
+
+    from utils.client import AsyncTrading212Client
+
+
+def _position_ticker(position: Position) -> str | None:
+    return position.instrument.ticker if position.instrument else None
+
+
+@dataclass(frozen=True)
+class Watch:
+    name: str
+    path: str
+    fetch: str
+    key: Callable[[Any], Any]
+    # Fields compared between polls; None compares every field.
+    fields: tuple[str, ...] | None = None
+
+
+# Positions are compared on what is held, not on what it is worth, so
+# price moves do not notify.
+WATCHES = {
+    watch.name: watch
+    for watch in (
+        Watch("orders", "/equity/orders", "get_orders", key=lambda order: order.id),
+        Watch(
+            "positions",
+            "/equity/positions",
+            "get_account_positions",
+            key=_position_ticker,
+            fields=(
+                "quantity",
+                "quantityAvailableForTrading",
+                "quantityInPies",
+                "averagePricePaid",
+            ),
+        ),
+    )
+}
+
+# Subscribable resource URIs: a whole list, or one order or position in it.
+_SUBSCRIBABLE = [
+    (re.compile(r"trading212://orders(?:/(?P<key>\d+))?"), "orders"),
+    (
+        re.compile(
+            r"trading212://(?:positions|account/positions|account/portfolio)"
+            r"(?:/(?P<key>[^/]+))?"
+        ),
+        "positions",
+    ),
+]
+
+
+def parse_subscription(uri: str) -> tuple[Watch, str | None]:
+    """The watch behind a resource URI and the order id or ticker it names."""
+    for pattern, name in _SUBSCRIBABLE:
+        match = pattern.fullmatch(uri)
+        if match:
+            return WATCHES[name], match.group("key")
+    raise ValueError(
+        f"Resource {uri} does not support subscriptions; subscribe to "
+        "trading212://orders, trading212://positions or one item of them"
+    )
+
+
+def diff_snapshots(
+    before: dict[str, dict], after: dict[str, dict], fields: tuple[str, ...] | None = None
+) -> dict[str, list]:
+    """Items added, removed and changed between two snapshots keyed by id."""
+    changed = []
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        changes = {
+            field: {"old": old.get(field), "new": new.get(field)}
+            for field in (fields or sorted(old.keys() | new.keys()))
+            if old.get(field) != new.get(field)
+        }
+        if changes:
+            changed.append({"key": key, "changes": changes, "item": new})
+    return {
+        "added": [after[key] for key in sorted(after.keys() - before.keys())],
+        "removed": [before[key] for key in sorted(before.keys() - after.keys())],
+        "changed": changed,
+    }
+
+
+def _delta_for(delta: dict[str, list], watch: Watch, key: str | None) -> dict[str, list]:
+    if key is None:
+        return delta
+    return {
+        "added": [item for item in delta["added"] if _item_key(watch, item) == key],
+        "removed": [item for item in delta["removed"] if _item_key(watch, item) == key],
+        "changed": [change for change in delta["changed"] if change["key"] == key],
+    }
+
+
+def _item_key(watch: Watch, item: dict) -> str | None:
+    if watch.name == "positions":
+        return (item.get("instrument") or {}).get("ticker")
+    return None if item.get("id") is None else str(item["id"])
+
+
+class Subscriptions:
+    """Resource subscriptions of one account, served by a single poller.
+
+    However many sessions subscribe, each watched list is fetched once per
+    interval (or less often, to use at most half of its rate limit, and
+    only when a request can be sent without queueing). Successive
+    snapshots are diffed by order id or ticker, and subscribers are sent
+    ``notifications/resources/updated`` only when something changed, with
+    the change in ``_meta.delta``. The poller stops with the last
+    subscription. Sessions are dropped when they end (see
+    remove_session), or when they can no longer be notified.
+    """
+
+    def __init__(
+        self,
+        client: "AsyncTrading212Client",
+        interval: float = SUBSCRIPTION_POLL_INTERVAL,
+    ):
+        self.client = client
+        self.interval = interval
+        # uri -> sessions subscribed to it
+        self._subscribers: dict[str, set["ServerSession"]] = {}
+        # watch name -> key -> item, as JSON
+        self._snapshots: dict[str, dict[str, dict]] = {}
+        self._polled_at: dict[str, float] = {}
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def active(self) -> bool:
+        return bool(self._subscribers)
+
+    def has_session(self, session: "ServerSession") -> bool:
+        """Whether ``session`` is subscribed to any resource."""
+        return any(session in sessions for sessions in self._subscribers.values())
+
+    def _watches(self) -> set[str]:
+        return {parse_subscription(uri)[0].name for uri in self._subscribers}
+
+    def _interval(self, watch: Watch) -> float:
+        limiter = self.client.rate_limiter
+        return max(self.interval, 2 * limiter.min_interval("GET", watch.path))
+
+    async def subscribe(self, uri: str, session: "ServerSession") -> None:
+        watch, _ = parse_subscription(uri)
+        async with self._lock:
+            if watch.name not in self._snapshots:
+                # Changes are reported from the moment of subscribing.
+                self._snapshots[watch.name] = await self._fetch(watch)
+                self._polled_at[watch.name] = time.monotonic()
+            self._subscribers.setdefault(uri, set()).add(session)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def unsubscribe(self, uri: str, session: "ServerSession") -> None:
+        async with self._lock:
+            self._remove(uri, session)
+
+    async def remove_session(self, session: "ServerSession") -> None:
+        """Drop every subscription of ``session``, e.g. once it has ended."""
+        async with self._lock:
+            for uri in list(self._subscribers):
+                self._remove(uri, session)
+
+    def _remove(self, uri: str, session: "ServerSession") -> None:
+        sessions = self._subscribers.get(uri)
+        if sessions is None:
+            return
+        sessions.discard(session)
+        if not sessions:
+            del self._subscribers[uri]
+        for name in self._snapshots.keys() - self._watches():
+            del self._snapshots[name]
+            self._polled_at.pop(name, None)
+
+    async def _fetch(self, watch: Watch) -> dict[str, dict]:
+        items = await getattr(self.client, watch.fetch)()
+        return {
+            str(key): item.model_dump(mode="json")
+            for item in items
+            if (key := watch.key(item)) is not None
+        }
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            wait = self.interval
+            for name in self._watches():
+                watch = WATCHES[name]
+                due = self._polled_at.get(name, 0.0) + self._interval(watch) - time.monotonic()
+                if due > 0:
+                    wait = min(wait, due)
+                elif self.client.rate_limiter.has_capacity("GET", watch.path):
+                    try:
+                        await self._poll(watch)
+                    except Exception:
+                        # Polled again next interval; subscribers are only
+                        # told about changes that were seen.
+                        self._polled_at[name] = time.monotonic()
+                    wait = min(wait, self._interval(watch))
+                else:
+                    wait = min(wait, 0.5)
+            await asyncio.sleep(max(wait, 0.1))
+
+    async def _poll(self, watch: Watch) -> None:
+        snapshot = await self._fetch(watch)
+        async with self._lock:
+            self._polled_at[watch.name] = time.monotonic()
+            if watch.name not in self._snapshots:
+                return
+            delta = diff_snapshots(self._snapshots[watch.name], snapshot, watch.fields)
+            self._snapshots[watch.name] = snapshot
+            targets = []
+            for uri, sessions in self._subscribers.items():
+                subscribed, key = parse_subscription(uri)
+                if subscribed is not watch:
+                    continue
+                changes = _delta_for(delta, watch, key)
+                if any(changes.values()):
+                    targets.extend((uri, session, changes) for session in sessions)
+        for uri, session, changes in targets:
+            await self._notify(uri, session, changes)
+
+    async def _notify(self, uri: str, session: "ServerSession", delta: dict) -> None:
+        params = types.ResourceUpdatedNotificationParams(uri=uri, _meta={"delta": delta})
+        try:
+            await session.send_notification(
+                types.ServerNotification(
+                    types.ResourceUpdatedNotification(
+                        method="notifications/resources/updated", params=params
+                    )
+                )
+            )
+        except Exception:
+            # The session has ended (or, with stateless HTTP, its request).
+            subscription_notifications.inc(result="dropped")
+            await self.remove_session(session)
+            return
+        subscription_notifications.inc(result="sent")
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._subscribers.clear()
@@ -0,0 +1,299 @@
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Mapping
+
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from config import (
+    HISTORY_DB_PATH,
+    HTTP_ALLOW_DEFAULT_ACCOUNT,
+    TENANT_MAX_CLIENTS,
+    TENANT_MAX_SUBSCRIBED,
+)
+from models import Environment
+from utils.client import AsyncTrading212Client
+from utils.cost_basis import CostBasisLedger
+from utils.dividends import DividendLedger
+from utils.history_store import HistoryStore
+from utils.metrics import tenant_clients, tenant_evictions
+from utils.rate_limiter import RateLimiter, rate_limiter as default_rate_limiter
+from utils.subscriptions import Subscriptions
+
+API_KEY_HEADER = "x-trading212-api-key"
+API_SECRET_HEADER = "x-trading212-api-secret"
+ENVIRONMENT_HEADER = "x-trading212-environment"
+
+
+@dataclass(frozen=True)
+class Credentials:
+    api_key: str
+    api_secret: str | None = None
+    environment: str | None = None
+
+    @property
+    def tenant_id(self) -> str:
+        """Stable, non-reversible id of the account, used in file names."""
+        data = "\0".join((self.environment or "", self.api_key, self.api_secret or ""))
+        return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+    @classmethod
+    def from_headers(cls, headers: Mapping[str, str]) -> "Credentials | None":
+        """Credentials sent with an HTTP request, or None to use the
+        server's own (TRADING212_API_KEY)."""
+        api_key = headers.get(API_KEY_HEADER)
+        api_secret = headers.get(API_SECRET_HEADER) or None
+        environment = headers.get(ENVIRONMENT_HEADER) or None
+        if not api_key:
+            if api_secret or environment:
+                raise ValueError(f"{API_KEY_HEADER} header is required")
+            return None
+        if environment is not None:
+            try:
+                environment = Environment(environment.lower()).value
+            except ValueError:
+                raise ValueError(
+                    f"Invalid {ENVIRONMENT_HEADER} {environment!r}; expected demo or live"
+                ) from None
+        return cls(api_key=api_key, api_secret=api_secret, environment=environment)
+
+
+# Credentials of the HTTP request being served. The MCP session task is
+# started from the request that opened it and inherits this, so it holds
+# for every message of a stateless request, or of a session.
+current_credentials: ContextVar[Credentials | None] = ContextVar(
+    "current_credentials", default=None
+)
+# Tenant bound for the duration of a tool call or resource read.
+current_tenant: ContextVar["Tenant | None"] = ContextVar("current_tenant", default=None)
+
+
+class Tenant:
+    """Client, rate limits, history and subscriptions of one Trading 212
+    account."""
+
+    def __init__(
+        self,
+        tenant_id: str,
+        client: AsyncTrading212Client,
+        history_store: HistoryStore,
+    ):
+        self.tenant_id = tenant_id
+        self.client = client
+        self.history_store = history_store
+        self.cost_basis = CostBasisLedger()
+        self.dividend_ledger = DividendLedger()
+        self.subscriptions = Subscriptions(client)
+        self.users = 0
+        self.evicted = False
+
+    async def aclose(self) -> None:
+        await self.subscriptions.aclose()
+        await self.client.aclose()
+        await asyncio.to_thread(self.history_store.close)
+
+
+class TenantRegistry:
+    """Per-account tenants for the HTTP transports, least recently used first.
+
+    Requests with credentials in their headers (see Credentials.from_headers)
+    get a tenant of their own: a client with its own rate limiter and cache
+    namespace, and a history store in a file named after the account. At
+    most ``max_tenants`` are kept; the least recently used one is evicted
+    and closed once its running calls finish, so memory stays bounded
+    however many accounts use the server. Tenants with resource
+    subscriptions are not evicted, and at most ``max_subscribed`` of them
+    may have subscriptions at once. Requests without credentials, and
+    the stdio transport, use the default tenant configured from the
+    environment, which is created on first use and never evicted.
+    """
+
+    def __init__(
+        self,
+        max_tenants: int = TENANT_MAX_CLIENTS,
+        history_path: str = HISTORY_DB_PATH,
+        max_subscribed: int = TENANT_MAX_SUBSCRIBED,
+    ):
+        self.max_tenants = max(1, max_tenants)
+        self.max_subscribed = max_subscribed
+        self.history_path = history_path
+        self._tenants: OrderedDict[str, Tenant] = OrderedDict()
+        self._default: Tenant | None = None
+        self._closing: set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def default(self) -> Tenant:
+        with self._lock:
+            if self._default is None:
+                self._default = Tenant(
+                    "default",
+                    AsyncTrading212Client(rate_limiter=default_rate_limiter),
+                    HistoryStore(self.history_path),
+                )
+            return self._default
+
+    def set_default(self, client: AsyncTrading212Client) -> Tenant:
+        """Serve the default tenant with ``client``, e.g. one with other rate
+        limits in a script or benchmark. A previous default is closed."""
+        with self._lock:
+            previous = self._default
+            self._default = Tenant("default", client, HistoryStore(self.history_path))
+            tenant = self._default
+        if previous is not None:
+            self._close(previous)
+        return tenant
+
+    def _history_path(self, tenant_id: str) -> str:
+        if self.history_path == ":memory:":
+            return self.history_path
+        return str(Path(self.history_path).parent / "tenants" / f"{tenant_id}.sqlite3")
+
+    def get(self, credentials: Credentials | None) -> Tenant:
+        """The tenant of ``credentials``, created (and the least recently
+        used one evicted) if needed."""
+        if credentials is None:
+            return self.default
+        tenant_id = credentials.tenant_id
+        evicted = []
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+            if tenant is not None:
+                self._tenants.move_to_end(tenant_id)
+                return tenant
+            tenant = Tenant(
+                tenant_id,
+                AsyncTrading212Client(
+                    api_key=credentials.api_key,
+                    api_secret=credentials.api_secret,
+                    environment=credentials.environment,
+                    rate_limiter=RateLimiter(),
+                ),
+                HistoryStore(self._history_path(tenant_id)),
+            )
+            self._tenants[tenant_id] = tenant
+            excess = len(self._tenants) - self.max_tenants
+            for oldest in list(self._tenants.values())[:-1]:
+                if excess <= 0:
+                    break
+                if oldest.subscriptions.active:
+                    continue
+                del self._tenants[oldest.tenant_id]
+                oldest.evicted = True
+                evicted.append(oldest)
+                excess -= 1
+            tenant_clients.set(len(self._tenants))
+        for oldest in evicted:
+            tenant_evictions.inc()
+            if oldest.users == 0:
+                self._close(oldest)
+        return tenant
+
+    def check_subscribable(self, tenant: Tenant) -> None:
+        """Raise ValueError if ``tenant`` may not start subscriptions, as
+        ``max_subscribed`` other accounts already hold some."""
+        if tenant is self._default or tenant.subscriptions.active:
+            return
+        with self._lock:
+            subscribed = sum(
+                1 for other in self._tenants.values() if other.subscriptions.active
+            )
+        if subscribed >= self.max_subscribed:
+            raise ValueError(
+                f"{subscribed} accounts already have resource subscriptions, the "
+                "most this server allows (TENANT_MAX_SUBSCRIBED); try again later"
+            )
+
+    def current(self) -> Tenant:
+        """The tenant of the running call, or of the current request."""
+        return current_tenant.get() or self.get(current_credentials.get())
+
+    @asynccontextmanager
+    async def use(self) -> AsyncIterator[Tenant]:
+        """Bind the current tenant for a tool call or resource read, so it
+        is not closed while the call runs."""
+        tenant = self.current()
+        tenant.users += 1
+        token = current_tenant.set(tenant)
+        try:
+            yield tenant
+        finally:
+            current_tenant.reset(token)
+            tenant.users -= 1
+            if tenant.evicted and tenant.users == 0:
+                self._close(tenant)
+
+    def _close(self, tenant: Tenant) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop in this thread: the client's connections are
+            # released when it is garbage collected.
+            tenant.history_store.close()
+            return
+        task = loop.create_task(tenant.aclose())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def proxy(self, attribute: str) -> Any:
+        """Stand-in for an attribute of the current tenant, so module-level
+        names such as ``client`` follow the account of each call."""
+        return _TenantProxy(self, attribute)
+
+
+class _TenantProxy:
+    def __init__(self, registry: TenantRegistry, attribute: str):
+        self._registry = registry
+        self._attribute = attribute
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(getattr(self._registry.current(), self._attribute), name)
+
+    def __repr__(self) -> str:
+        return f"<current tenant's {self._attribute}>"
+
+
+class TenantMiddleware:
+    """ASGI middleware that reads the credentials of each HTTP request to
+    the MCP endpoints (``paths``) into ``current_credentials``. Invalid
+    credential headers are rejected with HTTP 400, and requests without
+    them with HTTP 401 unless ``allow_default`` lets them use the server's
+    own account."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: tuple[str, ...],
+        allow_default: bool = HTTP_ALLOW_DEFAULT_ACCOUNT,
+    ):
+        self.app = app
+        self.paths = tuple(path.rstrip("/") for path in paths)
+        self.allow_default = allow_default
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+        try:
+            credentials = Credentials.from_headers(Headers(scope=scope))
+        except ValueError as exc:
+            await PlainTextResponse(str(exc), status_code=400)(scope, receive, send)
+            return
+        if credentials is None and not self.allow_default:
+            response = PlainTextResponse(
+                f"{API_KEY_HEADER} header is required", status_code=401
+            )
+            await response(scope, receive, send)
+            return
+        token = current_credentials.set(credentials)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_credentials.reset(token)
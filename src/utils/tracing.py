@@ -0,0 +1,86 @@
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+from config import TRACING_EXPORTER, TRACING_FILE_PATH, TRACING_SERVICE_NAME
+
+try:
+    from opentelemetry import trace
+except ImportError:  # pragma: no cover
+    trace = None
+
+
+class _NoSpan:
+    """Stand-in used while tracing is off."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        return
+
+    def set_attributes(self, attributes: dict[str, Any]) -> None:
+        return
+
+
+_NO_SPAN = _NoSpan()
+_tracer = None
+
+
+def _exporter(name: str):
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        return OTLPSpanExporter()
+
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "file":
+        path = Path(TRACING_FILE_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return ConsoleSpanExporter(
+            out=path.open("a", encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    raise ValueError(
+        f"Unknown TRACING_EXPORTER {name!r}; expected off, otlp, file or console"
+    )
+
+
+def setup_tracing(exporter: str = TRACING_EXPORTER) -> bool:
+    """Install a tracer provider exporting to ``exporter``.
+
+    Returns False, leaving every span() a no-op, when tracing is off.
+    """
+    global _tracer
+    if exporter == "off":
+        return False
+    if trace is None:
+        raise RuntimeError(
+            "TRACING_EXPORTER requires OpenTelemetry: "
+            'pip install "trading212-mcp-server[tracing]"'
+        )
+
+    from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    provider = TracerProvider(
+        resource=Resource.create({SERVICE_NAME: TRACING_SERVICE_NAME})
+    )
+    provider.add_span_processor(BatchSpanProcessor(_exporter(exporter)))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("trading212")
+    return True
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """Run the block in a child span of the current one, if tracing is on."""
+    if _tracer is None:
+        yield _NO_SPAN
+        return
+    attributes = {key: value for key, value in attributes.items() if value is not None}
+    with _tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current